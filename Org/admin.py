@@ -3,9 +3,9 @@ from .models import Organization, OrganizationAdmin
 
 @admin.register(Organization)
 class OrganizationModelAdmin(admin.ModelAdmin):
-    list_display = ('org_name', 'domain_name', 'owner', 'email', 'created_at')
+    list_display = ('org_name', 'domain_name', 'owner', 'email', 'plan', 'created_at')
     search_fields = ('org_name', 'domain_name', 'email')
-    list_filter = ('created_at',)
+    list_filter = ('plan', 'created_at')
 
 @admin.register(OrganizationAdmin)
 class OrganizationAdminRegistration(admin.ModelAdmin):
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class OrgConfig(AppConfig):
     name = 'Org'
-    
\ No newline at end of file
+
+    def ready(self):
+        from Org import stats
+        stats.connect_signals()
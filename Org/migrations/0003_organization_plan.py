@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Org', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='plan',
+            field=models.CharField(choices=[('free', 'Free'), ('standard', 'Standard'), ('premium', 'Premium')], default='standard', help_text='Subscription plan; selects the API rate limits (API_THROTTLE_PLANS)', max_length=20),
+        ),
+    ]
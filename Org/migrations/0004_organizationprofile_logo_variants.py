@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Org', '0003_organization_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
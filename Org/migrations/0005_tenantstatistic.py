@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Org', '0004_organizationprofile_logo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantStatistic',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('label', models.CharField(blank=True, default='', max_length=255)),
+                ('value', models.IntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='Org.organization')),
+            ],
+            options={
+                'unique_together': {('organization', 'metric', 'key')},
+            },
+        ),
+    ]
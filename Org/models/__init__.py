@@ -1,8 +1,10 @@
 from .organization import Organization, OrganizationProfile
 from .admin import OrganizationAdmin
+from .stats import TenantStatistic
 
 __all__ = [
     'Organization',
     'OrganizationProfile',
     'OrganizationAdmin',
+    'TenantStatistic',
 ]
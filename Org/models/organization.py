@@ -9,12 +9,23 @@ class Organization(TimeStampedModel, SoftDeleteModel):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     org_name = models.CharField(max_length=255, help_text="Legal name of the organization")
+    domain_name = models.CharField(max_length=255, null=True, blank=True)
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
         related_name='owned_organizations'
     )
     email = models.EmailField(help_text="Primary contact email")
+
+    PLAN_CHOICES = [
+        ('free', 'Free'),
+        ('standard', 'Standard'),
+        ('premium', 'Premium'),
+    ]
+    plan = models.CharField(
+        max_length=20, choices=PLAN_CHOICES, default='standard',
+        help_text="Subscription plan; selects the API rate limits (API_THROTTLE_PLANS)"
+    )
     
     # Audit logging (if simple-history is installed and desired here too)
     # history = HistoricalRecords()
@@ -57,6 +68,8 @@ class OrganizationProfile(TimeStampedModel):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     logo = models.ImageField(upload_to='org_logos/', blank=True, null=True)
+    # Re-encoded logo and its thumbnails, written by core.images
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     class Meta:
         verbose_name = "Organization Profile"
@@ -0,0 +1,24 @@
+import uuid
+from django.db import models
+from core.models import TimeStampedModel
+from .organization import Organization
+
+
+class TenantStatistic(TimeStampedModel):
+    """
+    One materialized dashboard counter of an organization (see Org/stats.py),
+    e.g. metric='section_enrollments', key=<section id>, value=32.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='statistics')
+    metric = models.CharField(max_length=50)
+    # Row id, role or status the counter is for; blank for tenant-wide counters
+    key = models.CharField(max_length=64, blank=True, default='')
+    label = models.CharField(max_length=255, blank=True, default='')
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('organization', 'metric', 'key')
+
+    def __str__(self):
+        return f"{self.organization_id} {self.metric}[{self.key}] = {self.value}"
@@ -1,13 +1,15 @@
 from rest_framework import serializers
 from Org.models.organization import OrganizationProfile
+from core.serializers import ImageVariantsField
 
 class OrganizationProfileSerializer(serializers.ModelSerializer):
     organization_name = serializers.ReadOnlyField(source='organization.org_name')
+    logo_variants = ImageVariantsField()
 
     class Meta:
         model = OrganizationProfile
         fields = [
             'id', 'organization', 'organization_name', 'description', 
-            'address', 'phone_number', 'website', 'logo', 'created_at', 'updated_at'
+            'address', 'phone_number', 'website', 'logo', 'logo_variants', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'organization', 'organization_name', 'created_at', 'updated_at']
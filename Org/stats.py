@@ -0,0 +1,374 @@
+"""
+Materialized per-tenant dashboard statistics.
+
+Every number of the org dashboard is a TenantStatistic row, so
+/api/v1/orgs/stats/ reads one tenant's rows with a single indexed query
+instead of running COUNT/GROUP BY scans per page load:
+
+    metric               key                  value
+    persons              total / STUDENT ...  persons, and persons per role profile
+    approvals            PENDING_APPROVAL...  users per CustomUser.approval_status
+    class_enrollments    <class id>           enrollments in the class
+    batch_enrollments    <batch id>           enrollments in the batch
+    section_enrollments  <section id>         enrollments in the section
+    section_capacity     <section id>         Section.capacity
+    subject_teachers     <subject id>         distinct teachers assigned the subject
+
+Signal receivers keep the rows current as rows are saved and deleted:
+counters move by +1/-1 with F() updates once the writing transaction
+commits, and the distinct teacher count of a subject is recounted. The
+writer never holds a counter row lock, so concurrent admissions do not
+queue behind the tenant-wide persons/total row or the shared class and
+batch rows (see academic/services.py). Writes that
+bypass signals (queryset.update(), bulk_create()) and rows moving between
+tenants are not tracked; `recompute()`, run periodically by the
+`recompute_statistics` Celery task, replaces a tenant's rows with exact
+values computed from scratch.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import DEFERRED, Count, F
+from django.utils import timezone
+from Org.models import TenantStatistic
+
+PERSONS = 'persons'
+APPROVALS = 'approvals'
+CLASS_ENROLLMENTS = 'class_enrollments'
+BATCH_ENROLLMENTS = 'batch_enrollments'
+SECTION_ENROLLMENTS = 'section_enrollments'
+SECTION_CAPACITY = 'section_capacity'
+SUBJECT_TEACHERS = 'subject_teachers'
+
+# Person profile extension -> role key of the persons metric
+ROLE_PROFILES = {
+    'people.Student': 'STUDENT',
+    'people.Teacher': 'TEACHER',
+    'people.Employee': 'EMPLOYEE',
+    'people.Guardian': 'GUARDIAN',
+    'people.Owner': 'OWNER',
+}
+
+# Row model -> metrics keyed by its id
+KEYED_METRICS = {
+    'academic.AcademicClass': [CLASS_ENROLLMENTS],
+    'academic.Batch': [BATCH_ENROLLMENTS],
+    'academic.Section': [SECTION_ENROLLMENTS, SECTION_CAPACITY],
+    'academic.Subject': [SUBJECT_TEACHERS],
+}
+
+
+def add(organization_id, metric, key='', delta=1, label=''):
+    """Move a counter by `delta` once the current transaction commits, creating it if needed."""
+    if organization_id is None or not delta:
+        return
+    # robust: the write is already committed, so a failed counter update is
+    # logged and left for recompute() rather than raised to the writer
+    transaction.on_commit(lambda: _apply(organization_id, metric, key, delta, label), robust=True)
+
+
+def _apply(organization_id, metric, key, delta, label):
+    # Runs in autocommit: the counter row is locked for this one UPDATE only
+    rows = TenantStatistic.objects.filter(organization_id=organization_id, metric=metric, key=str(key))
+    if rows.update(value=F('value') + delta, updated_at=timezone.now()) or delta < 0:
+        # A missing counter is not created to go negative (e.g. while its tenant is deleted)
+        return
+    _, created = TenantStatistic.objects.get_or_create(
+        organization_id=organization_id, metric=metric, key=str(key), defaults={'label': label, 'value': delta}
+    )
+    if not created:
+        rows.update(value=F('value') + delta, updated_at=timezone.now())
+
+
+def put(organization_id, metric, key='', value=None, label=None):
+    """Set a counter's value and/or label, creating it (at 0) if needed."""
+    if organization_id is None:
+        return
+    changes = {}
+    if value is not None:
+        changes['value'] = value
+    if label is not None:
+        changes['label'] = label
+    stat, created = TenantStatistic.objects.get_or_create(
+        organization_id=organization_id, metric=metric, key=str(key), defaults=changes
+    )
+    if not created and any(getattr(stat, field) != new for field, new in changes.items()):
+        TenantStatistic.objects.filter(pk=stat.pk).update(**changes, updated_at=timezone.now())
+
+
+def compute(organization_id):
+    """Exact statistics of one organization: {(metric, key): (label, value)}."""
+    Person = apps.get_model('people', 'Person')
+    CustomUser = apps.get_model('Users', 'CustomUser')
+    AcademicClass = apps.get_model('academic', 'AcademicClass')
+    Batch = apps.get_model('academic', 'Batch')
+    Section = apps.get_model('academic', 'Section')
+    Subject = apps.get_model('academic', 'Subject')
+
+    stats = {}
+    profile_counts = {
+        role: Count(apps.get_model(label)._meta.get_field('person').related_query_name())
+        for label, role in ROLE_PROFILES.items()
+    }
+    persons = Person.objects.filter(organization_id=organization_id).aggregate(total=Count('pk'), **profile_counts)
+    for key, value in persons.items():
+        stats[(PERSONS, key)] = ('', value)
+
+    approvals = (
+        CustomUser.objects.filter(organization_id=organization_id)
+        .values_list('approval_status').annotate(count=Count('pk')).order_by()
+    )
+    for status, count in approvals:
+        stats[(APPROVALS, status)] = ('', count)
+
+    for pk, name in AcademicClass.objects.filter(organization_id=organization_id).values_list('pk', 'name'):
+        stats[(CLASS_ENROLLMENTS, str(pk))] = (name, 0)
+    for pk, name in Batch.objects.filter(organization_id=organization_id).values_list('pk', 'name'):
+        stats[(BATCH_ENROLLMENTS, str(pk))] = (name, 0)
+    sections = (
+        Section.objects.filter(organization_id=organization_id).annotate(enrolled=Count('enrollments'))
+        .values_list('pk', 'name', 'capacity', 'enrolled', 'batch_id', 'batch__academic_class_id')
+    )
+    for pk, name, capacity, enrolled, batch_id, class_id in sections:
+        stats[(SECTION_ENROLLMENTS, str(pk))] = (name, enrolled)
+        stats[(SECTION_CAPACITY, str(pk))] = (name, capacity)
+        for metric, key in ((BATCH_ENROLLMENTS, str(batch_id)), (CLASS_ENROLLMENTS, str(class_id))):
+            label, value = stats[(metric, key)]
+            stats[(metric, key)] = (label, value + enrolled)
+
+    subjects = (
+        Subject.objects.filter(organization_id=organization_id)
+        .annotate(teachers=Count('teacher_assignments__teacher', distinct=True))
+        .values_list('pk', 'name', 'teachers')
+    )
+    for pk, name, teachers in subjects:
+        stats[(SUBJECT_TEACHERS, str(pk))] = (name, teachers)
+    return stats
+
+
+def recompute(organization_id):
+    """Replace an organization's statistics with exact values; returns how many were wrong."""
+    with transaction.atomic():
+        current = TenantStatistic.objects.select_for_update().filter(organization_id=organization_id)
+        old = {(metric, key): value for metric, key, value in current.values_list('metric', 'key', 'value')}
+        # Counted while the counters are locked: a +1 still to be applied
+        # for a write committed just before lands on the new rows after we
+        # commit and counts that write twice until the next recompute
+        stats = compute(organization_id)
+        corrected = sum(
+            1 for item in old.keys() | stats.keys()
+            if old.get(item) != (stats[item][1] if item in stats else None)
+        )
+        current.delete()
+        TenantStatistic.objects.bulk_create([
+            TenantStatistic(organization_id=organization_id, metric=metric, key=key, label=label, value=value)
+            for (metric, key), (label, value) in stats.items()
+        ])
+    return corrected
+
+
+def dashboard(organization_id):
+    """The organization's statistics shaped for the dashboard, computed first if it has none yet."""
+    rows = list(
+        TenantStatistic.objects.filter(organization_id=organization_id)
+        .values_list('metric', 'key', 'label', 'value', 'updated_at')
+    )
+    if not rows:
+        recompute(organization_id)
+        return dashboard(organization_id)
+
+    by_metric = {}
+    for metric, key, label, value, updated_at in rows:
+        by_metric.setdefault(metric, {})[key] = (label, value)
+
+    def listing(metric, field):
+        return sorted(
+            ({'id': key, 'name': label, field: value} for key, (label, value) in by_metric.get(metric, {}).items()),
+            key=lambda row: row['name']
+        )
+
+    capacities = by_metric.get(SECTION_CAPACITY, {})
+    sections = listing(SECTION_ENROLLMENTS, 'enrolled')
+    for section in sections:
+        capacity = capacities.get(section['id'], ('', 0))[1]
+        section['capacity'] = capacity
+        section['fill_rate'] = round(section['enrolled'] / capacity, 4) if capacity else None
+
+    approvals = {key: value for key, (_, value) in by_metric.get(APPROVALS, {}).items()}
+    return {
+        'persons': {key: value for key, (_, value) in by_metric.get(PERSONS, {}).items()},
+        'approvals': approvals,
+        'pending_approvals': approvals.get('PENDING_APPROVAL', 0),
+        'classes': listing(CLASS_ENROLLMENTS, 'enrolled'),
+        'batches': listing(BATCH_ENROLLMENTS, 'enrolled'),
+        'sections': sections,
+        'subjects': listing(SUBJECT_TEACHERS, 'teachers'),
+        'updated_at': max(row[4] for row in rows),
+    }
+
+
+# Signal receivers keeping the counters current
+
+def _person_organization(person_id):
+    Person = apps.get_model('people', 'Person')
+    return Person.objects.filter(pk=person_id).values_list('organization_id', flat=True).first()
+
+
+def remember(sender, instance, **kwargs):
+    # Raw values, as in core.storage: the previous state is compared on save.
+    # DEFERRED: loaded by .only()/.defer() without the field
+    instance._stats_state = tuple(instance.__dict__.get(field, DEFERRED) for field in sender._stats_fields)
+
+
+def state_before_save(sender, instance, raw=False, **kwargs):
+    before = getattr(instance, '_stats_state', None)
+    if raw or instance._state.adding or before is None or DEFERRED not in before:
+        return
+    # Loaded or assigned since: the stored values are the ones counted
+    loaded = [field for field, value in zip(sender._stats_fields, before)
+              if value is DEFERRED and field in instance.__dict__]
+    if loaded:
+        stored = dict(zip(loaded, sender._default_manager.filter(pk=instance.pk).values_list(*loaded).first() or ()))
+        instance._stats_state = tuple(
+            stored.get(field, value) for field, value in zip(sender._stats_fields, before)
+        )
+
+
+def _previous(sender, instance, created):
+    before = getattr(instance, '_stats_state', None)
+    remember(sender, instance)
+    if created or before is None:
+        return (None,) * len(sender._stats_fields)
+    # A still deferred field was not saved, so it did not change
+    return tuple(
+        getattr(instance, field) if value is DEFERRED else value
+        for field, value in zip(sender._stats_fields, before)
+    )
+
+
+def person_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        add(instance.organization_id, PERSONS, 'total')
+
+
+def person_deleted(sender, instance, **kwargs):
+    add(instance.organization_id, PERSONS, 'total', -1)
+
+
+def profile_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        add(_person_organization(instance.person_id), PERSONS, ROLE_PROFILES[sender._meta.label])
+
+
+def profile_deleted(sender, instance, **kwargs):
+    add(_person_organization(instance.person_id), PERSONS, ROLE_PROFILES[sender._meta.label], -1)
+
+
+def user_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    before = _previous(sender, instance, created)
+    after = (instance.organization_id, instance.approval_status)
+    if before != after:
+        add(before[0], APPROVALS, before[1], -1)
+        add(after[0], APPROVALS, after[1])
+
+
+def user_deleted(sender, instance, **kwargs):
+    add(instance.organization_id, APPROVALS, instance.approval_status, -1)
+
+
+def _section_keys(section_id):
+    Section = apps.get_model('academic', 'Section')
+    row = Section.objects.filter(pk=section_id).values(
+        'organization_id', 'name', 'batch_id', 'batch__name',
+        'batch__academic_class_id', 'batch__academic_class__name',
+    ).first()
+    if row is None:
+        return None, []
+    return row['organization_id'], [
+        (SECTION_ENROLLMENTS, section_id, row['name']),
+        (BATCH_ENROLLMENTS, row['batch_id'], row['batch__name']),
+        (CLASS_ENROLLMENTS, row['batch__academic_class_id'], row['batch__academic_class__name']),
+    ]
+
+
+def move_enrollments(section_id, delta):
+    """Move the enrollment counters of a section, its batch and class; for bulk writes too."""
+    if section_id is None:
+        return
+    organization_id, keys = _section_keys(section_id)
+    for metric, key, label in keys:
+        add(organization_id, metric, key, delta, label)
+
+
+def enrollment_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    (before,) = _previous(sender, instance, created)
+    if before != instance.section_id:
+        move_enrollments(before, -1)
+        move_enrollments(instance.section_id, 1)
+
+
+def enrollment_deleted(sender, instance, **kwargs):
+    move_enrollments(instance.section_id, -1)
+
+
+def _recount_subject(subject_id):
+    Subject = apps.get_model('academic', 'Subject')
+    row = (
+        Subject.objects.filter(pk=subject_id)
+        .annotate(teachers=Count('teacher_assignments__teacher', distinct=True))
+        .values_list('organization_id', 'name', 'teachers').first()
+    )
+    if row is not None:
+        put(row[0], SUBJECT_TEACHERS, subject_id, value=row[2], label=row[1])
+
+
+def assignment_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    (before,) = _previous(sender, instance, created)
+    for subject_id in {before, instance.subject_id} - {None}:
+        _recount_subject(subject_id)
+
+
+def assignment_deleted(sender, instance, **kwargs):
+    _recount_subject(instance.subject_id)
+
+
+def keyed_row_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for metric in KEYED_METRICS[sender._meta.label]:
+        value = instance.capacity if metric == SECTION_CAPACITY else None
+        put(instance.organization_id, metric, instance.pk, value=value, label=instance.name)
+
+
+def keyed_row_deleted(sender, instance, **kwargs):
+    TenantStatistic.objects.filter(
+        organization_id=instance.organization_id, metric__in=KEYED_METRICS[sender._meta.label], key=str(instance.pk)
+    ).delete()
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+    def connect(label, saved, deleted, fields=None):
+        model = apps.get_model(label)
+        uid = f'Org.stats.{label}'
+        if fields:
+            model._stats_fields = fields
+            post_init.connect(remember, sender=model, dispatch_uid=uid)
+            pre_save.connect(state_before_save, sender=model, dispatch_uid=uid)
+        post_save.connect(saved, sender=model, dispatch_uid=uid)
+        post_delete.connect(deleted, sender=model, dispatch_uid=uid)
+
+    connect('people.Person', person_saved, person_deleted)
+    for label in ROLE_PROFILES:
+        connect(label, profile_saved, profile_deleted)
+    connect('Users.CustomUser', user_saved, user_deleted, fields=['organization_id', 'approval_status'])
+    connect('academic.StudentEnrollment', enrollment_saved, enrollment_deleted, fields=['section_id'])
+    connect('academic.TeacherAssignment', assignment_saved, assignment_deleted, fields=['subject_id'])
+    for label in KEYED_METRICS:
+        connect(label, keyed_row_saved, keyed_row_deleted)
@@ -0,0 +1,15 @@
+from celery import shared_task
+from Org import stats
+from Org.models import Organization
+
+
+@shared_task(ignore_result=True)
+def recompute_statistics(organization_id=None):
+    """
+    Correct the drift of one organization's dashboard statistics, or queue
+    a recompute for every organization (see Org/stats.py).
+    """
+    if organization_id is not None:
+        return stats.recompute(organization_id)
+    for pk in Organization.objects.values_list('pk', flat=True).iterator():
+        recompute_statistics.delay(str(pk))
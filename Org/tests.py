@@ -1,3 +1,190 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org import stats
+from Org.models import Organization, TenantStatistic
+from Users.models import Role
+from academic.models import AcademicClass, Batch, Section, StudentEnrollment, Subject, TeacherAssignment
+from people.models import Person, Student, Teacher
 
-# Create your tests here.
+User = get_user_model()
+
+
+class TenantStatisticsTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Stats Org', email='org@example.com', owner=self.owner)
+        self.ac_class = AcademicClass.objects.create(organization=self.org, name='Class 3', level_order=3)
+        self.batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=self.ac_class,
+            start_date='2025-01-01', end_date='2025-12-31'
+        )
+        self.section_a = Section.objects.create(organization=self.org, batch=self.batch, name='A', capacity=2)
+        self.section_b = Section.objects.create(organization=self.org, batch=self.batch, name='B', capacity=4)
+        self.subject = Subject.objects.create(organization=self.org, name='History', academic_class=self.ac_class)
+
+    def value(self, metric, key=''):
+        row = TenantStatistic.objects.filter(organization=self.org, metric=metric, key=str(key)).first()
+        return row.value if row else None
+
+    def student(self, name='Sam'):
+        person = Person.objects.create(organization=self.org, first_name=name, last_name='Student')
+        return Student.objects.create(person=person)
+
+    def assert_matches_recompute(self):
+        incremental = {
+            (metric, key): value
+            for metric, key, value in TenantStatistic.objects.filter(organization=self.org)
+            .values_list('metric', 'key', 'value')
+        }
+        exact = {item: value for item, (_, value) in stats.compute(self.org.pk).items()}
+        self.assertEqual({k: v for k, v in incremental.items() if v}, {k: v for k, v in exact.items() if v})
+
+    def test_counters_follow_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, second = self.student('Ann'), self.student('Bo')
+            enrollment = StudentEnrollment.objects.create(organization=self.org, student=first, section=self.section_a)
+            StudentEnrollment.objects.create(organization=self.org, student=second, section=self.section_a)
+
+        self.assertEqual(self.value(stats.PERSONS, 'total'), 2)
+        self.assertEqual(self.value(stats.PERSONS, 'STUDENT'), 2)
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_a.pk), 2)
+        self.assertEqual(self.value(stats.BATCH_ENROLLMENTS, self.batch.pk), 2)
+        self.assertEqual(self.value(stats.CLASS_ENROLLMENTS, self.ac_class.pk), 2)
+        self.assertEqual(self.value(stats.SECTION_CAPACITY, self.section_a.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.section = self.section_b
+            enrollment.save()
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_a.pk), 1)
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_b.pk), 1)
+        self.assertEqual(self.value(stats.CLASS_ENROLLMENTS, self.ac_class.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.person.delete()
+        self.assertEqual(self.value(stats.PERSONS, 'total'), 1)
+        self.assertEqual(self.value(stats.PERSONS, 'STUDENT'), 1)
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_b.pk), 0)
+        self.assert_matches_recompute()
+
+    def test_counters_move_only_when_the_writer_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            StudentEnrollment.objects.create(organization=self.org, student=self.student(), section=self.section_a)
+            self.assertIsNone(self.value(stats.PERSONS, 'total'))
+            self.assertEqual(self.value(stats.CLASS_ENROLLMENTS, self.ac_class.pk), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.value(stats.PERSONS, 'total'), 1)
+        self.assertEqual(self.value(stats.CLASS_ENROLLMENTS, self.ac_class.pk), 1)
+
+    def test_distinct_teachers_per_subject(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher = Teacher.objects.create(
+                person=Person.objects.create(organization=self.org, first_name='Tess', last_name='Teacher')
+            )
+            for section in (self.section_a, self.section_b):
+                TeacherAssignment.objects.create(
+                    organization=self.org, teacher=teacher, subject=self.subject, section=section
+                )
+        self.assertEqual(self.value(stats.SUBJECT_TEACHERS, self.subject.pk), 1)
+        TeacherAssignment.objects.filter(section=self.section_a).delete()
+        self.assertEqual(self.value(stats.SUBJECT_TEACHERS, self.subject.pk), 1)
+        self.assert_matches_recompute()
+
+    def test_approval_status_transitions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(email='new@example.com', password='password123', organization=self.org)
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_PROFILE'), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.approval_status = 'PENDING_APPROVAL'
+            user.save()
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_PROFILE'), 0)
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_APPROVAL'), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_APPROVAL'), 0)
+
+    def test_deferred_fields_move_the_stored_state(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(email='new@example.com', password='password123', organization=self.org)
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded = User.objects.only('email').get(pk=user.pk)
+            loaded.approval_status = 'PENDING_APPROVAL'
+            loaded.save()
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_PROFILE'), 0)
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_APPROVAL'), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded = User.objects.only('email').get(pk=user.pk)
+            loaded.email = 'renamed@example.com'
+            loaded.save()
+        self.assertEqual(self.value(stats.APPROVALS, 'PENDING_APPROVAL'), 1)
+        self.assertIsNone(self.value(stats.APPROVALS, 'None'))
+
+    def test_recompute_corrects_drift(self):
+        StudentEnrollment.objects.bulk_create([
+            StudentEnrollment(organization=self.org, student=self.student(f'S{i}'), section=self.section_b)
+            for i in range(3)
+        ])
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_b.pk), 0)
+        self.assertGreater(stats.recompute(self.org.pk), 0)
+        self.assertEqual(self.value(stats.SECTION_ENROLLMENTS, self.section_b.pk), 3)
+        self.assertEqual(stats.recompute(self.org.pk), 0)
+
+    def test_deleting_a_section_drops_its_counters(self):
+        self.section_a.delete()
+        self.assertIsNone(self.value(stats.SECTION_CAPACITY, self.section_a.pk))
+
+
+class OrganizationStatsViewTest(APITestCase):
+    url = '/api/v1/orgs/stats/'
+
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Dash Org', email='org@example.com', owner=self.admin)
+        self.admin.organization = self.org
+        self.admin.approval_status = 'APPROVED'
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 1', level_order=1)
+        batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class, start_date='2025-01-01', end_date='2025-12-31'
+        )
+        section = Section.objects.create(organization=self.org, batch=batch, name='A', capacity=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            person = Person.objects.create(organization=self.org, first_name='Stu', last_name='Dent')
+            StudentEnrollment.objects.create(
+                organization=self.org, student=Student.objects.create(person=person), section=section
+            )
+            User.objects.create_user(email='waiting@example.com', password='password123', organization=self.org,
+                                     approval_status='PENDING_APPROVAL')
+
+    def test_dashboard(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data['persons']['STUDENT'], 1)
+        self.assertEqual(data['pending_approvals'], 1)
+        self.assertEqual(data['sections'][0]['fill_rate'], 0.25)
+        self.assertEqual(data['classes'][0]['enrolled'], 1)
+
+    def test_first_read_of_a_tenant_without_counters_computes_them(self):
+        TenantStatistic.objects.all().delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['persons']['total'], 1)
+        self.assertEqual(response.data['sections'][0]['enrolled'], 1)
+
+    def test_single_query_read(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            stats.dashboard(self.org.pk)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_needs_an_org_admin(self):
+        member = User.objects.create_user(email='member@example.com', password='password123', organization=self.org)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -4,7 +4,8 @@ from Org.views import (
     CheckOrganizationExistsView, 
     OrganizationAdminViewSet,
     OrganizationViewSet,
-    OrganizationProfileViewSet
+    OrganizationProfileViewSet,
+    OrganizationStatsView
 )
 
 router = DefaultRouter()
@@ -18,5 +19,6 @@ urlpatterns = [
         'patch': 'partial_update',
         'put': 'update'
     }), name='org-profile'),
+    path('stats/', OrganizationStatsView.as_view(), name='org-stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
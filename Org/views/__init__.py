@@ -1,10 +1,12 @@
 from .organization import CheckOrganizationExistsView, OrganizationViewSet
 from .admin import OrganizationAdminViewSet
 from .profile import OrganizationProfileViewSet
+from .stats import OrganizationStatsView
 
 __all__ = [
     'CheckOrganizationExistsView',
     'OrganizationAdminViewSet',
     'OrganizationViewSet',
     'OrganizationProfileViewSet',
+    'OrganizationStatsView',
 ]
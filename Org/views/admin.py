@@ -6,13 +6,14 @@ from Org.models import OrganizationAdmin, Organization
 from Org.serializers import OrganizationAdminSerializer, CreateOrganizationAdminSerializer
 from Users.authentication import CsrfExemptSessionAuthentication
 from Org.permissions import IsOrganizationAdmin
-from core.mixins import TenantSafeQuerySetMixin
+from core.mixins import TenantSafeQuerySetMixin, SparseFieldsetMixin, CompiledListMixin
 
-class OrganizationAdminViewSet(TenantSafeQuerySetMixin, viewsets.ModelViewSet):
+class OrganizationAdminViewSet(TenantSafeQuerySetMixin, SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Organization Administrators.
     Uses TenantSafeQuerySetMixin to ensure admins can only see/manage 
     admins within their own organization context.
+    Read requests support ?fields= / ?include= and eager-load `user_details`.
     """
     queryset = OrganizationAdmin.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsOrganizationAdmin]
@@ -1,53 +1,31 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework import status
 from Org.models.organization import Organization, OrganizationDomain
+from core.async_views import AsyncAPIView
+from core.throttling import OrgCheckRateThrottle
 
-class CheckOrganizationExistsView(APIView):
+class CheckOrganizationExistsView(AsyncAPIView):
     """
     Check if an organization exists by domain name (supporting multiple domains).
     """
-    authentication_classes = []
-    permission_classes = []
-    def get(self, request):
-        domain_name = request.query_params.get("domain_name")
+    throttle_classes = [OrgCheckRateThrottle]
 
-        if not domain_name:
-            return Response(
-                {"error": "domain_name query parameter is required."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        
-        try:
-            domain_record = OrganizationDomain.objects.get(domain=domain_name)
-            org = domain_record.organization
-            return Response(
-                {
-                    "organization_exists": True,
-                    "name": org.org_name,
-                    "email": org.email
-                },
-                status=status.HTTP_200_OK,
-            )
-        except OrganizationDomain.DoesNotExist:
-            return Response(
-                {"detail": "Organization not found for this domain."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+    async def get(self, request):
+        return await self.check(request.GET.get("domain_name"), "domain_name query parameter is required.")
 
-    def post(self, request):
-        domain_name = request.data.get("domain_name")
+    async def post(self, request):
+        return await self.check(request.data.get("domain_name"), "domain_name is required.")
 
+    async def check(self, domain_name, missing_error):
         if not domain_name:
-            return Response(
-                {"error": "domain_name is required."},
+            return self.respond(
+                {"error": missing_error},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         
         try:
-            domain_record = OrganizationDomain.objects.get(domain=domain_name)
+            domain_record = await OrganizationDomain.objects.select_related('organization').aget(domain=domain_name)
             org = domain_record.organization
-            return Response(
+            return self.respond(
                 {
                     "organization_exists": True,
                     "name": org.org_name,
@@ -56,10 +34,11 @@ class CheckOrganizationExistsView(APIView):
                 status=status.HTTP_200_OK,
             )
         except OrganizationDomain.DoesNotExist:
-            return Response(
+            return self.respond(
                 {"detail": "Organization not found for this domain."},
                 status=status.HTTP_404_NOT_FOUND,
             )
+
 from rest_framework import viewsets, permissions
 from Users.authentication import CsrfExemptSessionAuthentication
 from Org.serializers import OrganizationSerializer
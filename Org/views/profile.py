@@ -7,6 +7,7 @@ from Org.models.organization import OrganizationProfile
 from Org.serializers.profile import OrganizationProfileSerializer
 from Users.authentication import CsrfExemptSessionAuthentication
 from Users.permissions import IsSystemAdmin
+from core.uploads import IMAGE_TYPES
 
 class OrganizationProfileViewSet(viewsets.ModelViewSet):
     """
@@ -17,6 +18,9 @@ class OrganizationProfileViewSet(viewsets.ModelViewSet):
     permission_classes = [IsSystemAdmin]
     authentication_classes = [CsrfExemptSessionAuthentication]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
+    # Logos only (see core/uploads.py)
+    upload_max_file_size = 5 * 1024 * 1024
+    upload_allowed_types = IMAGE_TYPES
 
     def get_queryset(self):
         user = self.request.user
@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from Org import stats
+from Org.permissions import IsOrganizationAdmin
+from Users.authentication import CsrfExemptSessionAuthentication
+
+
+class OrganizationStatsView(APIView):
+    """
+    Dashboard statistics of the admin's organization, read from the
+    materialized counters of Org/stats.py.
+    """
+    authentication_classes = [CsrfExemptSessionAuthentication]
+    permission_classes = [IsOrganizationAdmin]
+
+    def get(self, request):
+        if not request.user.organization_id:
+            return Response({'error': 'You do not belong to an organization.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(stats.dashboard(request.user.organization_id))
@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.conf import settings
@@ -6,52 +7,67 @@ class ProfileStatusMiddleware:
     """
     Middleware to enforce profile verification gating.
     Redirects or blocks users based on their approval_status.
+    Supports both WSGI and ASGI so async views are not pushed onto a thread.
     """
+    sync_capable = True
+    async_capable = True
+
+    # Paths exempt from gating (auth, static, media, and profile setup itself)
+    exempt_paths = [
+        '/api/v1/auth/',
+        '/api/v1/users/me/',
+        '/api/v1/users/profile/',
+        '/api/v1/profile/',
+        '/admin/',
+        '/media/',
+        '/static/',
+    ]
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if not request.user.is_authenticated:
-            return self.get_response(request)
+        if self.async_mode:
+            return self.__acall__(request)
 
-        # 1. Skip System Admins
-        if hasattr(request.user, 'is_system_admin') and request.user.is_system_admin:
-            return self.get_response(request)
+        if not self.is_exempt(request) and request.user.is_authenticated:
+            self.ensure_person(request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self.is_exempt(request):
+            user = await request.auser()
+            if user.is_authenticated:
+                await sync_to_async(self.ensure_person)(user)
+        return await self.get_response(request)
 
-        # 2. Define exempt paths (auth, static, media, and profile setup itself)
+    def is_exempt(self, request):
         # We use a simple path check for now
-        exempt_paths = [
-            '/api/v1/auth/',
-            '/api/v1/users/me/',
-            '/api/v1/users/profile/',
-            '/api/v1/profile/',
-            '/admin/',
-            '/media/',
-            '/static/',
-        ]
-        
         current_path = request.path
-        if any(current_path.startswith(path) for path in exempt_paths):
-            return self.get_response(request)
+        return any(current_path.startswith(path) for path in self.exempt_paths)
 
-        # 3. Handle Gating Logic for REST API
+    def ensure_person(self, user):
+        # 1. Skip System Admins
+        if hasattr(user, 'is_system_admin') and user.is_system_admin:
+            return
+
+        # 2. Handle Gating Logic for REST API
         # If it's an API request, we don't redirect but let the permission classes handle it.
         # This middleware is primarily for future SSR or to log/track status.
         # However, for now, we follow the requirement to ensure Person exists.
-        
-        status = request.user.approval_status
-        
+
         # Ensure Person exists (Auto-creation logic mentioned in requirements)
-        if not hasattr(request.user, 'person_profile'):
+        if not hasattr(user, 'person_profile'):
             from people.models.person import Person
             Person.objects.get_or_create(
-                user=request.user,
-                organization=request.user.organization,
+                user=user,
+                organization=user.organization,
                 defaults={
                     'first_name': 'New',
                     'last_name': 'User',
-                    'email': request.user.email,
+                    'email': user.email,
                 }
             )
-
-        return self.get_response(request)
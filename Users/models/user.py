@@ -100,7 +100,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
         if self.organization.owner_id == self.id:
             return True
             
-        # Check for SYSTEM_ADMIN role
+        # Check for SYSTEM_ADMIN role (reusing prefetched roles on list pages)
+        if 'roles' in getattr(self, '_prefetched_objects_cache', {}):
+            return any(role.name == 'SYSTEM_ADMIN' for role in self.roles.all())
         return self.roles.filter(name='SYSTEM_ADMIN').exists()
 
     # Audit logging
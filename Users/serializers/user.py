@@ -19,6 +19,7 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'email', 'organization', 'roles', 'is_system_admin', 
             'is_active', 'approval_status', 'last_login', 'person_profile'
         ]
+        relation_paths = {'is_system_admin': ['organization', 'roles']}
 
 class UserDetailSerializer(serializers.ModelSerializer):
     person_profile = PersonSerializer(read_only=True)
@@ -31,6 +32,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'id', 'email', 'organization', 'roles', 'is_system_admin', 'is_staff', 'is_active', 
             'approval_status', 'rejection_reason', 'last_login', 'created_at', 'person_profile'
         ]
+        relation_paths = {'is_system_admin': ['organization', 'roles']}
 
 class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,6 +1,16 @@
+import hashlib
+import hmac
+import secrets
+import string
+import threading
+import time
+from typing import NamedTuple
+from django.conf import settings
+from django.core.cache import caches
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from Users.models import CustomUser
+from core.cache_scripts import RedisScripts, alocked
 
 class UserService:
     @staticmethod
@@ -20,3 +30,351 @@ class UserService:
             **extra_fields
         )
         return user
+
+
+# One-time passwords
+#
+# Codes live in the default cache as a hash of (digest, attempts). With the
+# django-redis backend every operation is a single Lua script, so checking
+# limits, storing or consuming a code and counting attempts happen in one
+# atomic round trip. Other cache backends (LocMem in tests and local
+# development) run the same steps in Python under a process-wide lock.
+# aissue()/averify() await redis.asyncio or the async cache API instead
+# (see core.cache_scripts).
+
+OTP_ISSUE_SCRIPT = """
+-- KEYS: code, cooldown, lock, subject window, ip window
+-- ARGV: digest, ttl ms, cooldown ms, now ms, window ms, subject limit, ip limit, member
+local lock = redis.call('PTTL', KEYS[3])
+if lock > 0 then return {'locked', lock} end
+local cooldown = redis.call('PTTL', KEYS[2])
+if cooldown > 0 then return {'cooldown', cooldown} end
+
+local now = tonumber(ARGV[4])
+local window = tonumber(ARGV[5])
+local windows = {{KEYS[4], tonumber(ARGV[6])}, {KEYS[5], tonumber(ARGV[7])}}
+for _, w in ipairs(windows) do
+    if w[2] > 0 then
+        redis.call('ZREMRANGEBYSCORE', w[1], '-inf', now - window)
+        if redis.call('ZCARD', w[1]) >= w[2] then
+            local oldest = redis.call('ZRANGE', w[1], 0, 0, 'WITHSCORES')
+            return {'rate_limited', tonumber(oldest[2]) + window - now}
+        end
+    end
+end
+for _, w in ipairs(windows) do
+    if w[2] > 0 then
+        redis.call('ZADD', w[1], now, ARGV[8])
+        redis.call('PEXPIRE', w[1], window)
+    end
+end
+
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'digest', ARGV[1], 'attempts', 0)
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+end
+return {'ok', 0}
+"""
+
+OTP_VERIFY_SCRIPT = """
+-- KEYS: code, lock, ip window
+-- ARGV: digest, max attempts, lockout ms, now ms, window ms, ip limit, member
+local lock = redis.call('PTTL', KEYS[2])
+if lock > 0 then return {'locked', lock} end
+
+local now = tonumber(ARGV[4])
+local window = tonumber(ARGV[5])
+local limit = tonumber(ARGV[6])
+if limit > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[3]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[3], 0, 0, 'WITHSCORES')
+        return {'rate_limited', tonumber(oldest[2]) + window - now}
+    end
+    redis.call('ZADD', KEYS[3], now, ARGV[7])
+    redis.call('PEXPIRE', KEYS[3], window)
+end
+
+local digest = redis.call('HGET', KEYS[1], 'digest')
+if not digest then return {'invalid', 0} end
+if digest == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return {'ok', 0}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if tonumber(ARGV[2]) > 0 and attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    return {'locked', tonumber(ARGV[3])}
+end
+return {'invalid', 0}
+"""
+
+OTP_CHECK_SCRIPT = """
+-- KEYS: cooldown, lock, subject window, ip window
+-- ARGV: now ms, window ms, subject limit, ip limit
+local lock = redis.call('PTTL', KEYS[2])
+if lock > 0 then return {'locked', lock} end
+local cooldown = redis.call('PTTL', KEYS[1])
+if cooldown > 0 then return {'cooldown', cooldown} end
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local windows = {{KEYS[3], tonumber(ARGV[3])}, {KEYS[4], tonumber(ARGV[4])}}
+for _, w in ipairs(windows) do
+    if w[2] > 0 and redis.call('ZCOUNT', w[1], now - window, '+inf') >= w[2] then
+        local oldest = redis.call('ZRANGEBYSCORE', w[1], now - window, '+inf', 'WITHSCORES', 'LIMIT', 0, 1)
+        return {'rate_limited', tonumber(oldest[2]) + window - now}
+    end
+end
+return {'ok', 0}
+"""
+
+
+class OTPResult(NamedTuple):
+    """
+    Outcome of an OTPService call. `status` is 'ok', 'invalid' (wrong or
+    expired code) or a rejection: 'cooldown', 'rate_limited', 'locked'.
+    """
+    status: str
+    retry_after: int = 0
+    code: str = None
+
+    @property
+    def ok(self):
+        return self.status == 'ok'
+
+    @property
+    def rejected(self):
+        return self.status in OTPService.REJECTIONS
+
+    @property
+    def message(self):
+        return OTPService.REJECTIONS.get(self.status)
+
+
+class OTPService:
+    """
+    Issue and verify one-time passwords per flow ('otp', 'signup', 'login',
+    'admin_login') and subject (normally the email address).
+
+    - issue(): refuses while the subject is locked, within
+      OTP_RESEND_COOLDOWN of the last code, or over the sliding-window
+      limits per subject and per client IP; otherwise stores a new code.
+    - verify(): counts the attempt against the per-IP window, then consumes
+      the code if it matches. OTP_MAX_ATTEMPTS wrong guesses burn the code
+      and lock the subject for OTP_LOCKOUT_SECONDS.
+    - Per-IP limits apply only when the client IP is known.
+    - check(): the issue limits without side effects, for views that must
+      reject abusive traffic before doing database work.
+
+    Codes are stored as keyed digests, never in clear. A limit of 0
+    disables it.
+    """
+    REJECTIONS = {
+        'cooldown': 'Please wait before requesting another code.',
+        'rate_limited': 'Too many requests. Please try again later.',
+        'locked': 'Too many failed attempts. Please try again later.',
+    }
+
+    # Flows whose codes expire sooner than OTP_TTL
+    ttls = {'admin_login': 180}
+
+    _lock = threading.Lock()
+
+    def __init__(self, alias='default', redis=None, async_redis=None):
+        self.cache = caches[alias]
+        self.scripts = RedisScripts.for_cache(
+            alias, [OTP_ISSUE_SCRIPT, OTP_VERIFY_SCRIPT, OTP_CHECK_SCRIPT], redis, async_redis
+        )
+
+    # Public API
+
+    def issue(self, flow, subject, ip=''):
+        code, call = self._issue_call(flow, subject, ip)
+        return self._issued(self._call(*call), code)
+
+    def verify(self, flow, subject, code, ip=''):
+        return self._call(*self._verify_call(flow, subject, code, ip))
+
+    def check(self, flow, subject, ip=''):
+        return self._call(*self._check_call(flow, subject, ip))
+
+    def discard(self, flow, subject):
+        """Forget an issued code, e.g. when it could not be delivered."""
+        keys = self._keys(flow, subject)
+        self.cache.delete_many([keys['code'], keys['cooldown']])
+
+    # The same for async views: redis.asyncio or the async cache API, so
+    # no call is handed to a worker thread
+
+    async def aissue(self, flow, subject, ip=''):
+        code, call = self._issue_call(flow, subject, ip)
+        return self._issued(await self._acall(*call), code)
+
+    async def averify(self, flow, subject, code, ip=''):
+        return await self._acall(*self._verify_call(flow, subject, code, ip))
+
+    # Helpers
+
+    def _keys(self, flow, subject, ip=''):
+        subject = str(subject).strip().lower()
+        return {
+            'code': f'otp:{flow}:{subject}:code',
+            'cooldown': f'otp:{flow}:{subject}:cooldown',
+            'lock': f'otp:{flow}:{subject}:lock',
+            'subject_window': f'otp:{flow}:{subject}:issued',
+            'ip_window': f'otp:{flow}:ip:{ip}:issued',
+            'verify_window': f'otp:{flow}:ip:{ip}:verified',
+        }
+
+    # Every operation is (script, {name: key} in script order, args, local step)
+
+    def _issue_call(self, flow, subject, ip):
+        keys = self._keys(flow, subject, ip)
+        code = ''.join(secrets.choice(string.digits) for _ in range(settings.OTP_LENGTH))
+        ttl = self.ttls.get(flow, settings.OTP_TTL)
+        args = [
+            self._digest(keys['code'], code), ttl * 1000, settings.OTP_RESEND_COOLDOWN * 1000,
+            self._now(), settings.OTP_RATE_WINDOW * 1000,
+            settings.OTP_ISSUE_LIMIT_PER_SUBJECT, self._ip_limit(settings.OTP_ISSUE_LIMIT_PER_IP, ip),
+            self._member(),
+        ]
+        names = ['code', 'cooldown', 'lock', 'subject_window', 'ip_window']
+        return code, (OTP_ISSUE_SCRIPT, {name: keys[name] for name in names}, args, self._issue_locally)
+
+    def _verify_call(self, flow, subject, code, ip):
+        keys = self._keys(flow, subject, ip)
+        args = [
+            self._digest(keys['code'], str(code)), settings.OTP_MAX_ATTEMPTS,
+            settings.OTP_LOCKOUT_SECONDS * 1000, self._now(), settings.OTP_RATE_WINDOW * 1000,
+            self._ip_limit(settings.OTP_VERIFY_LIMIT_PER_IP, ip), self._member(),
+        ]
+        names = ['code', 'lock', 'verify_window']
+        return OTP_VERIFY_SCRIPT, {name: keys[name] for name in names}, args, self._verify_locally
+
+    def _check_call(self, flow, subject, ip):
+        keys = self._keys(flow, subject, ip)
+        args = [
+            self._now(), settings.OTP_RATE_WINDOW * 1000,
+            settings.OTP_ISSUE_LIMIT_PER_SUBJECT, self._ip_limit(settings.OTP_ISSUE_LIMIT_PER_IP, ip),
+        ]
+        names = ['cooldown', 'lock', 'subject_window', 'ip_window']
+        return OTP_CHECK_SCRIPT, {name: keys[name] for name in names}, args, self._check_locally
+
+    def _call(self, script, keys, args, step):
+        if self.scripts is not None:
+            # Same keys as the cache API would use (KEY_PREFIX, VERSION)
+            return self._result(*self.scripts.run(script, [self.cache.make_key(key) for key in keys.values()], args))
+        with self._lock:
+            stored = self.cache.get_many(list(keys.values()))
+            result, writes, deletes = step({name: stored.get(key) for name, key in keys.items()}, *args)
+            for name, (value, timeout) in writes.items():
+                self.cache.set(keys[name], value, timeout=timeout)
+            if deletes:
+                self.cache.delete_many([keys[name] for name in deletes])
+        return result
+
+    async def _acall(self, script, keys, args, step):
+        if self.scripts is not None:
+            return self._result(
+                *await self.scripts.arun(script, [self.cache.make_key(key) for key in keys.values()], args)
+            )
+        async with alocked(self._lock):
+            stored = await self.cache.aget_many(list(keys.values()))
+            result, writes, deletes = step({name: stored.get(key) for name, key in keys.items()}, *args)
+            for name, (value, timeout) in writes.items():
+                await self.cache.aset(keys[name], value, timeout=timeout)
+            if deletes:
+                await self.cache.adelete_many([keys[name] for name in deletes])
+        return result
+
+    @staticmethod
+    def _issued(result, code):
+        return result._replace(code=code) if result.ok else result
+
+    @staticmethod
+    def _ip_limit(limit, ip):
+        # Unknown clients would all share one window; limit them per subject only
+        return limit if ip else 0
+
+    @staticmethod
+    def _digest(key, code):
+        return hmac.new(settings.SECRET_KEY.encode(), f'{key}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _now():
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def _member():
+        return f'{time.time_ns()}:{secrets.token_hex(4)}'
+
+    @staticmethod
+    def _result(status, retry_after_ms=0):
+        status = status.decode() if isinstance(status, bytes) else status
+        return OTPResult(status, -(-int(retry_after_ms) // 1000))
+
+    # Other cache backends: the steps of the scripts above, run by _call()
+    # under `_lock` on the stored values of their keys. They return the
+    # result, the values to store ({name: (value, timeout)}) and the names
+    # to delete. Cooldowns and locks store their expiry time (ms), windows
+    # a list of hit times and codes their digest, attempts and expiry.
+
+    @staticmethod
+    def _remaining(expires, now):
+        return expires - now if expires and expires > now else 0
+
+    @staticmethod
+    def _window(hits, now, window):
+        return [hit for hit in hits or [] if hit > now - window]
+
+    def _check_locally(self, stored, now, window, subject_limit, ip_limit):
+        for status, name in (('locked', 'lock'), ('cooldown', 'cooldown')):
+            remaining = self._remaining(stored[name], now)
+            if remaining:
+                return self._result(status, remaining), {}, []
+        for name, limit in (('subject_window', subject_limit), ('ip_window', ip_limit)):
+            hits = self._window(stored[name], now, window)
+            if limit > 0 and len(hits) >= limit:
+                return self._result('rate_limited', hits[0] + window - now), {}, []
+        return self._result('ok'), {}, []
+
+    def _issue_locally(self, stored, digest, ttl, cooldown, now, window, subject_limit, ip_limit, member):
+        result, writes, _ = self._check_locally(stored, now, window, subject_limit, ip_limit)
+        if not result.ok:
+            return result, writes, []
+        for name, limit in (('subject_window', subject_limit), ('ip_window', ip_limit)):
+            if limit > 0:
+                writes[name] = (self._window(stored[name], now, window) + [now], window / 1000)
+        writes['code'] = ({'digest': digest, 'attempts': 0, 'expires': now + ttl}, ttl / 1000)
+        if cooldown > 0:
+            writes['cooldown'] = (now + cooldown, cooldown / 1000)
+        return result, writes, []
+
+    def _verify_locally(self, stored, digest, max_attempts, lockout, now, window, ip_limit, member):
+        remaining = self._remaining(stored['lock'], now)
+        if remaining:
+            return self._result('locked', remaining), {}, []
+        writes = {}
+        if ip_limit > 0:
+            hits = self._window(stored['verify_window'], now, window)
+            if len(hits) >= ip_limit:
+                return self._result('rate_limited', hits[0] + window - now), {}, []
+            writes['verify_window'] = (hits + [now], window / 1000)
+
+        code = stored['code']
+        if code is None or code['expires'] <= now:
+            return self._result('invalid'), writes, []
+        if hmac.compare_digest(code['digest'], digest):
+            return self._result('ok'), writes, ['code']
+        code = {**code, 'attempts': code['attempts'] + 1}
+        if max_attempts > 0 and code['attempts'] >= max_attempts:
+            writes['lock'] = (now + lockout, lockout / 1000)
+            return self._result('locked', lockout), writes, ['code']
+        writes['code'] = (code, (code['expires'] - now) / 1000)
+        return self._result('invalid'), writes, []
+
+
+otp_service = OTPService()
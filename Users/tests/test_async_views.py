@@ -0,0 +1,110 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from core.async_views import AsyncAPIView
+from Org.models import Organization
+from Org.models.organization import OrganizationDomain
+from Users.models import Role
+from people.models import Person
+
+User = get_user_model()
+
+
+class RefuseThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        return False
+
+    def wait(self):
+        return 6.5
+
+
+class RaisingView(AsyncAPIView):
+    throttle_classes = []
+
+    async def get(self, request):
+        raise PermissionDenied()
+
+    async def post(self, request):
+        raise ValidationError({'name': ['This field is required.']})
+
+
+class AsyncViewsTest(TestCase):
+    """The async views run their ORM, cache and session work natively under ASGI."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Async Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.owner.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        Role.objects.create(name='SYSTEM_ADMIN')
+        Person.objects.create(user=self.owner, organization=self.org, first_name="Owner", last_name="Admin")
+        OrganizationDomain.objects.create(organization=self.org, domain='async.example.com')
+
+    async def test_me(self):
+        response = await self.async_client.get('/api/v1/auth/me/')
+        self.assertEqual(response.status_code, 403)
+
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get('/api/v1/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['email'], 'owner@example.com')
+        self.assertTrue(data['is_system_admin'])
+        self.assertEqual(data['person_profile']['first_name'], 'Owner')
+        self.assertEqual(data['roles'][0]['name'], 'ORG_ADMIN')
+
+    async def test_role_choices(self):
+        response = await self.async_client.get('/api/v1/auth/roles/')
+        self.assertEqual(response.json(), [{'value': 'ORG_ADMIN', 'label': 'Org_Admin'}])
+
+    async def test_check_organization(self):
+        response = await self.async_client.get('/api/v1/orgs/check/', {'domain_name': 'async.example.com'})
+        self.assertEqual(response.json(), {'organization_exists': True, 'name': 'Async Org', 'email': 'org@example.com'})
+        response = await self.async_client.post(
+            '/api/v1/orgs/check/', {'domain_name': 'missing.example.com'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get('/api/v1/orgs/check/')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_otp_flow(self):
+        response = await self.async_client.post(
+            '/api/v1/auth/otp/generate/', {'email': 'new@example.com'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        otp = mail.outbox[-1].body.rsplit(' ', 1)[-1]
+
+        response = await self.async_client.post(
+            '/api/v1/auth/otp/verify/', {'email': 'new@example.com', 'otp': otp}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_new_user'])
+        response = await self.async_client.get('/api/v1/auth/me/')
+        self.assertEqual(response.json()['email'], 'new@example.com')
+
+    async def test_malformed_json(self):
+        response = await self.async_client.post(
+            '/api/v1/auth/otp/generate/', b'{', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_handler_exceptions_get_drf_responses(self):
+        view = RaisingView.as_view()
+        response = await view(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.status_code, 403)
+        response = await view(AsyncRequestFactory().post('/', {}, content_type='application/json'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {'name': ['This field is required.']})
+
+    async def test_throttled(self):
+        self.assertEqual(AsyncAPIView.throttle_classes, api_settings.DEFAULT_THROTTLE_CLASSES)
+        response = await RaisingView.as_view(throttle_classes=[RefuseThrottle])(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '7')
@@ -1,12 +1,16 @@
 import io
+import shutil
+import tempfile
 import uuid
 from PIL import Image
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 from Org.models import Organization
+from Users.services import otp_service
 from people.models import Person, Student
 from Users.models import Role
 
@@ -22,6 +26,12 @@ def generate_test_image():
 
 class EnhancedAuthFlowTests(APITestCase):
     def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
         # Create a default Organization
         self.owner = User.objects.create_user(email="owner@example.com", password="password123")
         self.org = Organization.objects.create(
@@ -61,10 +71,10 @@ class EnhancedAuthFlowTests(APITestCase):
         
         # 2. Login (should work but be gated by middleware/status if we had strict UI gating)
         # Setup Login OTP
-        cache.set(f'login_otp_{user.email}', '123456')
+        otp = otp_service.issue('login', user.email).code
         response = self.client.post('/api/v1/auth/login/verify-otp/', {
             'email': user.email,
-            'otp': '123456'
+            'otp': otp
         })
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Force authentication for subsequent requests in this test process
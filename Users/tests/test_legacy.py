@@ -4,12 +4,14 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.core.cache import cache
 from Org.models import Organization
+from Users.services import otp_service
 from people.models import Person
 
 User = get_user_model()
 
 class OrgAuthTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.email = "test@example.com"
         self.password = "password123"
@@ -38,11 +40,11 @@ class OrgAuthTests(TestCase):
         Person.objects.create(user=user, organization=self.org, first_name="Test", last_name="User")
         
         # Setup Login OTP
-        cache.set(f'login_otp_{self.email}', '123456')
+        otp = otp_service.issue('login', self.email).code
         
         response = self.client.post('/api/v1/auth/login/verify-otp/', {
             'email': self.email,
-            'otp': '123456'
+            'otp': otp
         })
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -52,11 +54,11 @@ class OrgAuthTests(TestCase):
         admin_user = self.org.owner # The owner
         
         # Setup Login OTP
-        cache.set(f'login_otp_{admin_user.email}', '123456')
+        otp = otp_service.issue('login', admin_user.email).code
         
         response = self.client.post('/api/v1/auth/login/verify-otp/', {
             'email': admin_user.email,
-            'otp': '123456'
+            'otp': otp
         })
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -70,11 +72,11 @@ class OrgAuthTests(TestCase):
         
         Person.objects.create(user=su_user, organization=self.org, first_name="Super", last_name="User")
         
-        cache.set(f'login_otp_{su_user.email}', '123456')
+        otp = otp_service.issue('login', su_user.email).code
         
         response = self.client.post('/api/v1/auth/login/verify-otp/', {
             'email': su_user.email,
-            'otp': '123456'
+            'otp': otp
         })
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,178 @@
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from Users.services import OTPService
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - only needed for the Lua script tests
+    fakeredis = None
+
+LIMITS = dict(
+    OTP_RESEND_COOLDOWN=60, OTP_MAX_ATTEMPTS=3, OTP_LOCKOUT_SECONDS=900, OTP_RATE_WINDOW=3600,
+    OTP_ISSUE_LIMIT_PER_SUBJECT=5, OTP_ISSUE_LIMIT_PER_IP=2, OTP_VERIFY_LIMIT_PER_IP=10,
+)
+
+
+class OTPServiceCases:
+    """Behaviour shared by the Redis scripts and the cache fallback."""
+
+    def service(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        cache.clear()
+        self.otp = self.service()
+
+    def test_issue_and_consume(self):
+        result = self.otp.issue('otp', 'User@Example.com', '10.0.0.1')
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.code), 6)
+        self.assertTrue(self.otp.verify('otp', 'user@example.com', result.code, '10.0.0.1').ok)
+        # Consumed: a replay fails
+        self.assertEqual(self.otp.verify('otp', 'user@example.com', result.code, '10.0.0.1').status, 'invalid')
+
+    def test_no_bypass_code(self):
+        code = self.otp.issue('otp', 'a@example.com').code
+        guess = '123456' if code != '123456' else '654321'
+        self.assertEqual(self.otp.verify('otp', 'a@example.com', guess).status, 'invalid')
+
+    def test_flows_are_separate(self):
+        code = self.otp.issue('signup', 'a@example.com').code
+        self.assertEqual(self.otp.verify('login', 'a@example.com', code).status, 'invalid')
+
+    def test_cooldown(self):
+        self.assertTrue(self.otp.issue('otp', 'a@example.com').ok)
+        result = self.otp.issue('otp', 'a@example.com')
+        self.assertEqual(result.status, 'cooldown')
+        self.assertTrue(0 < result.retry_after <= 60)
+        self.assertIsNone(result.code)
+
+    def test_ip_rate_limit(self):
+        self.assertTrue(self.otp.issue('otp', 'a@example.com', '10.0.0.1').ok)
+        self.assertTrue(self.otp.issue('otp', 'b@example.com', '10.0.0.1').ok)
+        self.assertEqual(self.otp.check('otp', 'c@example.com', '10.0.0.1').status, 'rate_limited')
+        result = self.otp.issue('otp', 'c@example.com', '10.0.0.1')
+        self.assertEqual(result.status, 'rate_limited')
+        self.assertTrue(3500 < result.retry_after <= 3600)
+        self.assertTrue(self.otp.issue('otp', 'c@example.com', '10.0.0.2').ok)
+
+    def test_lockout_after_failed_attempts(self):
+        code = self.otp.issue('otp', 'a@example.com').code
+        wrong = '000000' if code != '000000' else '111111'
+        self.assertEqual(self.otp.verify('otp', 'a@example.com', wrong).status, 'invalid')
+        self.assertEqual(self.otp.verify('otp', 'a@example.com', wrong).status, 'invalid')
+        result = self.otp.verify('otp', 'a@example.com', wrong)
+        self.assertEqual(result.status, 'locked')
+        self.assertEqual(result.retry_after, 900)
+        # The code is burnt and new ones are refused while locked
+        self.assertEqual(self.otp.verify('otp', 'a@example.com', code).status, 'locked')
+        self.assertEqual(self.otp.issue('otp', 'a@example.com').status, 'locked')
+
+    @override_settings(OTP_VERIFY_LIMIT_PER_IP=2)
+    def test_verify_rate_limit(self):
+        self.otp.verify('otp', 'a@example.com', '000000', '10.0.0.1')
+        self.otp.verify('otp', 'b@example.com', '000000', '10.0.0.1')
+        self.assertEqual(self.otp.verify('otp', 'c@example.com', '000000', '10.0.0.1').status, 'rate_limited')
+
+    def test_unknown_ip_is_not_rate_limited_per_ip(self):
+        for subject in ('a@example.com', 'b@example.com', 'c@example.com'):
+            self.assertTrue(self.otp.issue('otp', subject, '').ok)
+
+    @override_settings(OTP_MAX_ATTEMPTS=0)
+    def test_zero_max_attempts_never_locks(self):
+        code = self.otp.issue('otp', 'a@example.com').code
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(5):
+            self.assertEqual(self.otp.verify('otp', 'a@example.com', wrong).status, 'invalid')
+        self.assertTrue(self.otp.verify('otp', 'a@example.com', code).ok)
+
+    async def test_async_calls_share_the_sync_state(self):
+        issued = await self.otp.aissue('otp', 'a@example.com', '10.0.0.1')
+        self.assertTrue(issued.ok)
+        self.assertEqual(self.otp.issue('otp', 'a@example.com').status, 'cooldown')
+        wrong = '000000' if issued.code != '000000' else '111111'
+        self.assertEqual((await self.otp.averify('otp', 'a@example.com', wrong)).status, 'invalid')
+        self.assertEqual((await self.otp.averify('otp', 'a@example.com', wrong)).status, 'invalid')
+        self.assertEqual(self.otp.verify('otp', 'a@example.com', wrong).status, 'locked')
+        self.assertEqual((await self.otp.aissue('otp', 'a@example.com')).status, 'locked')
+
+
+@override_settings(**LIMITS)
+class CacheOTPServiceTest(OTPServiceCases, TestCase):
+    def service(self):
+        return OTPService()
+
+
+@skipUnless(fakeredis, 'fakeredis[lua] is not installed')
+@override_settings(**LIMITS)
+class RedisOTPServiceTest(OTPServiceCases, TestCase):
+    def service(self):
+        server = fakeredis.FakeServer()
+        return OTPService(redis=fakeredis.FakeRedis(server=server),
+                          async_redis=lambda: fakeredis.FakeAsyncRedis(server=server))
+
+    async def test_async_calls_run_no_thread(self):
+        with mock.patch('asgiref.sync.SyncToAsync.__call__', side_effect=AssertionError('thread hop')):
+            issued = await self.otp.aissue('otp', 'a@example.com', '10.0.0.1')
+            self.assertTrue((await self.otp.averify('otp', 'a@example.com', issued.code, '10.0.0.1')).ok)
+
+
+class OTPViewsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(OTP_MAX_ATTEMPTS=2)
+    def test_brute_force_is_locked_out_without_database_access(self):
+        self.client.post('/api/v1/auth/otp/generate/', {'email': 'a@example.com'}, format='json')
+        for _ in range(2):
+            response = self.client.post(
+                '/api/v1/auth/otp/verify/', {'email': 'a@example.com', 'otp': '123456'}, format='json'
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '900')
+
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                '/api/v1/auth/login/verify-otp/', {'email': 'a@example.com', 'otp': '123456'}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(
+                '/api/v1/auth/otp/verify/', {'email': 'a@example.com', 'otp': '123456'}, format='json'
+            )
+            self.assertEqual(response.status_code, 429)
+
+    def test_resend_cooldown(self):
+        self.client.post('/api/v1/auth/otp/generate/', {'email': 'a@example.com'}, format='json')
+        response = self.client.post('/api/v1/auth/otp/generate/', {'email': 'a@example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(OTP_ISSUE_LIMIT_PER_IP=1, OTP_RESEND_COOLDOWN=0,
+                       REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_per_ip_limit_uses_the_forwarded_client(self):
+        url = '/api/v1/auth/otp/generate/'
+        self.client.post(url, {'email': 'a@example.com'}, format='json', HTTP_X_FORWARDED_FOR='203.0.113.1')
+        response = self.client.post(url, {'email': 'b@example.com'}, format='json', HTTP_X_FORWARDED_FOR='203.0.113.2')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, {'email': 'c@example.com'}, format='json', HTTP_X_FORWARDED_FOR='203.0.113.1')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_OTP_REQUIRED=True)
+    def test_password_login_with_otp(self):
+        User = get_user_model()
+        User.objects.create_user(email='a@example.com', password='password123')
+        response = self.client.post(
+            '/api/v1/auth/login/', {'email': 'a@example.com', 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data['otp_required'])
+        code = mail.outbox[-1].body.rsplit(' ', 1)[-1]
+        response = self.client.post(
+            '/api/v1/auth/login/verify-otp/', {'email': 'a@example.com', 'otp': code}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
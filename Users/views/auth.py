@@ -3,17 +3,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.core.cache import cache
 from django.core.mail import send_mail
 from django.conf import settings
-import random
-import string
 from Users.authentication import CsrfExemptSessionAuthentication
 from Users.serializers import UserSerializer
+from Users.services import otp_service
+from Users.views.otp import client_ip, otp_rejection
+from core import metrics
+from core.throttling import AuthRateThrottle
 
 class LoginView(APIView):
     authentication_classes = [] 
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -29,7 +31,23 @@ class LoginView(APIView):
             
         if not user.is_active:
             return Response({'error': 'Account is inactive.'}, status=status.HTTP_403_FORBIDDEN)
-        
+
+        if settings.LOGIN_OTP_REQUIRED:
+            # Second step: the code is verified by VerifyLoginOTPView
+            result = otp_service.issue('login', user.email, client_ip(request))
+            if result.rejected:
+                return otp_rejection('login', result)
+            metrics.otp_issued('login')
+            send_mail(
+                'ProSleek Login Code',
+                f'Your login code is: {result.code}',
+                settings.DEFAULT_FROM_EMAIL or 'noreply@prosleek.com',
+                [user.email],
+                fail_silently=True,
+            )
+            return Response({'message': 'OTP sent to your email.', 'otp_required': True},
+                            status=status.HTTP_202_ACCEPTED)
+
         # Directly log in the user (single-step)
         login(request, user)
         
@@ -42,6 +60,7 @@ class LoginView(APIView):
 class VerifyLoginOTPView(APIView):
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -50,14 +69,14 @@ class VerifyLoginOTPView(APIView):
         if not email or not otp:
             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cache_key = f'login_otp_{email}'
-        cached_otp = cache.get(cache_key)
-        
-        # Super-secret dev OTP bypass
-        if cached_otp != otp and otp != '123456':
+        result = otp_service.verify('login', email, otp, client_ip(request))
+        if result.rejected:
+            return otp_rejection('login', result)
+        if not result.ok:
+            metrics.otp_verified('login', False)
             return Response({'error': 'Invalid or expired OTP'}, status=status.HTTP_400_BAD_REQUEST)
         
-        cache.delete(cache_key)
+        metrics.otp_verified('login', True)
         
         try:
             from django.contrib.auth import get_user_model
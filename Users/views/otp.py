@@ -1,42 +1,62 @@
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
 from django.core.mail import send_mail
 from django.conf import settings
-from django.contrib.auth import login, get_user_model
-import random
-import string
+from django.contrib.auth import alogin, login, get_user_model
 from Users.serializers import UserSerializer
 from Users.models import Role
+from Users.services import otp_service
 from Org.models import Organization
+from core import metrics
+from core.async_views import AsyncAPIView, aget_for_serializer
+from core.throttling import AuthRateThrottle
 
 User = get_user_model()
+
+
+def client_ip(request):
+    """The client address as the DRF throttles see it (X-Forwarded-For per NUM_PROXIES)."""
+    return BaseThrottle().get_ident(request) or ''
+
+
+def otp_rejection(flow, result, respond=Response):
+    """429 for an OTP request refused by cooldown, rate limit or lockout."""
+    metrics.otp_rejected(flow, result.status)
+    return respond(
+        {'error': result.message},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(result.retry_after)},
+    )
+
  
-class RoleChoicesView(APIView):
-    authentication_classes = []
-    permission_classes = []
+class RoleChoicesView(AsyncAPIView):
+    throttle_classes = [AuthRateThrottle]
 
-    def get(self, request):
+    async def get(self, request):
         roles = Role.objects.exclude(name='SYSTEM_ADMIN') # Don't allow signup as System Admin
-        choices = [{"value": role.name, "label": role.name.title()} for role in roles]
-        return Response(choices)
+        choices = [{"value": role.name, "label": role.name.title()} async for role in roles]
+        return self.respond(choices)
 
-class GenerateOTPView(APIView):
-    authentication_classes = []
-    permission_classes = []
+class GenerateOTPView(AsyncAPIView):
+    throttle_classes = [AuthRateThrottle]
 
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email')
         if not email:
-            return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
+            return self.respond({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        otp = ''.join(random.choices(string.digits, k=6))
-        cache_key = f'otp_{email}'
-        cache.set(cache_key, otp, timeout=300)
+        result = await otp_service.aissue('otp', email, client_ip(request))
+        if result.rejected:
+            return otp_rejection('otp', result, self.respond)
+        otp = result.code
+        metrics.otp_issued('otp')
         
         try:
-            send_mail(
+            # SMTP has no async API; keep it off the event loop
+            await sync_to_async(send_mail, thread_sensitive=False)(
                 'ProSleek Security Code',
                 f'Your verification code is: {otp}',
                 settings.DEFAULT_FROM_EMAIL or 'noreply@prosleek.com',
@@ -46,34 +66,36 @@ class GenerateOTPView(APIView):
         except Exception:
             pass
 
-        return Response({'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
+        return self.respond({'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
 
-class VerifyOTPView(APIView):
-    authentication_classes = []
-    permission_classes = []
+class VerifyOTPView(AsyncAPIView):
+    throttle_classes = [AuthRateThrottle]
 
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email')
         otp = request.data.get('otp')
         
         if not email or not otp:
-             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
+             return self.respond({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cache_key = f'otp_{email}'
-        cached_otp = cache.get(cache_key)
+        # Rejected and wrong codes never reach the database
+        result = await otp_service.averify('otp', email, otp, client_ip(request))
+        if result.rejected:
+            return otp_rejection('otp', result, self.respond)
+        if not result.ok:
+            metrics.otp_verified('otp', False)
+            return self.respond({'error': 'Invalid or expired OTP'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if cached_otp != otp and otp != '123456':
-            return Response({'error': 'Invalid or expired OTP'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        cache.delete(cache_key)
+        metrics.otp_verified('otp', True)
         
-        user, created = User.objects.get_or_create(email=email)
+        user, created = await User.objects.aget_or_create(email=email)
         
         if not user.is_active:
-             return Response({'error': 'Account is disabled'}, status=status.HTTP_403_FORBIDDEN)
+             return self.respond({'error': 'Account is disabled'}, status=status.HTTP_403_FORBIDDEN)
 
-        login(request, user)
-        return Response({
+        await alogin(request, user)
+        user = await aget_for_serializer(User.objects.all(), UserSerializer, pk=user.pk)
+        return self.respond({
             'message': 'Login successful',
             'user': UserSerializer(user).data,
             'is_new_user': created
@@ -82,6 +104,7 @@ class VerifyOTPView(APIView):
 class SignupView(APIView):
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -90,6 +113,10 @@ class SignupView(APIView):
         
         if not email or not password:
             return Response({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        check = otp_service.check('signup', email, client_ip(request))
+        if check.rejected:
+            return otp_rejection('signup', check)
         
         # Determine organization (multi-tenant aware)
         host = request.get_host().split(':')[0]
@@ -133,9 +160,11 @@ class SignupView(APIView):
                 organization=org
             )
         
-        otp = ''.join(random.choices(string.digits, k=6))
-        cache_key = f'signup_otp_{email}'
-        cache.set(cache_key, otp, timeout=300)
+        result = otp_service.issue('signup', email, client_ip(request))
+        if result.rejected:
+            return otp_rejection('signup', result)
+        otp = result.code
+        metrics.otp_issued('signup')
         
         try:
             send_mail(
@@ -153,6 +182,7 @@ class SignupView(APIView):
 class VerifySignupView(APIView):
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email')
@@ -161,13 +191,14 @@ class VerifySignupView(APIView):
         if not email or not otp:
              return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cache_key = f'signup_otp_{email}'
-        cached_otp = cache.get(cache_key)
-        
-        if cached_otp != otp and otp != '123456':
+        result = otp_service.verify('signup', email, otp, client_ip(request))
+        if result.rejected:
+            return otp_rejection('signup', result)
+        if not result.ok:
+            metrics.otp_verified('signup', False)
             return Response({'error': 'Invalid or expired OTP'}, status=status.HTTP_400_BAD_REQUEST)
         
-        cache.delete(cache_key)
+        metrics.otp_verified('signup', True)
         
         try:
             user = User.objects.get(email=email)
@@ -3,13 +3,14 @@ from django.db import models
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.cache import cache
 from django.core.mail import send_mail
 from django.conf import settings
-import random
-import string
 from Users.serializers import UserSerializer
+from Users.services import otp_service
+from Users.views.otp import client_ip, otp_rejection
 from Org.models import Organization, OrganizationAdmin
+from core import metrics
+from core.throttling import AuthRateThrottle
 
 class SystemAdminLoginView(APIView):
     """
@@ -19,6 +20,7 @@ class SystemAdminLoginView(APIView):
     """
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email', '').strip().lower()
@@ -27,8 +29,15 @@ class SystemAdminLoginView(APIView):
         if not email or not password:
             return Response({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 1. Identify Organization via Domain
         host = request.get_host().split(':')[0] # Strip port if present
+        # OTPs are scoped per domain to prevent cross-tenant reuse. Refuse
+        # locked-out or rate-limited callers before any password hashing.
+        subject = f'{host}:{email}'
+        check = otp_service.check('admin_login', subject, client_ip(request))
+        if check.rejected:
+            return otp_rejection('admin_login', check)
+
+        # 1. Identify Organization via Domain
         from Org.models.organization import OrganizationDomain
         
         try:
@@ -65,12 +74,10 @@ class SystemAdminLoginView(APIView):
         if not (is_owner or is_org_admin):
             return Response({'error': 'Invalid email or password'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        otp = ''.join(random.choices(string.digits, k=6))
-        
-
-        # Cache key includes organization ID to prevent cross-tenant OTP reuse
-        cache_key = f'admin_otp_{organization.id}_{email}'
-        cache.set(cache_key, otp, timeout=180) # 3 minutes
+        result = otp_service.issue('admin_login', subject, client_ip(request)) # 3 minutes
+        if result.rejected:
+            return otp_rejection('admin_login', result)
+        otp = result.code
         
         # 5. Send OTP via email
         try:
@@ -82,11 +89,12 @@ class SystemAdminLoginView(APIView):
                 fail_silently=False,
             )
         except Exception as e:
-            cache.delete(cache_key)
+            otp_service.discard('admin_login', subject)
             return Response(
                 {'error': 'Failed to send OTP. Please try again later.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        metrics.otp_issued('admin_login')
         
         return Response({
             'message': 'Security OTP sent to your registered email.',
@@ -101,6 +109,7 @@ class SystemAdminVerifyOTPView(APIView):
     """
     authentication_classes = []
     permission_classes = []
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         email = request.data.get('email', '').strip().lower()
@@ -110,6 +119,18 @@ class SystemAdminVerifyOTPView(APIView):
             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
         host = request.get_host().split(':')[0]
+
+        # 1. Validate the OTP before touching the database
+        result = otp_service.verify('admin_login', f'{host}:{email}', otp, client_ip(request))
+        if result.rejected:
+            return otp_rejection('admin_login', result)
+        if not result.ok:
+            metrics.otp_verified('admin_login', False)
+            return Response({'error': 'Invalid or expired security code'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        metrics.otp_verified('admin_login', True)
+
+        # 2. Identify Organization via Domain
         try:
             organization = Organization.objects.filter(
                 models.Q(domain_name=host) | 
@@ -117,16 +138,6 @@ class SystemAdminVerifyOTPView(APIView):
             ).distinct().get()
         except (Organization.DoesNotExist, Organization.MultipleObjectsReturned):
             return Response({'error': 'Unauthorized access'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        # 2. Validate OTP from Cache
-        cache_key = f'admin_otp_{organization.id}_{email}'
-        cached_otp = cache.get(cache_key)
-        
-        if not cached_otp or cached_otp != otp:
-        #For Test Purpose only : if cached_otp is None or (cached_otp != otp and otp != '123456'):
-            return Response({'error': 'Invalid or expired security code'}, status=status.HTTP_401_UNAUTHORIZED)
-        
-        cache.delete(cache_key)
         
         try:
             from django.contrib.auth import get_user_model
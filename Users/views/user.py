@@ -10,6 +10,10 @@ from Users.permissions import IsSystemAdmin, IsSameOrganization
 from people.models.person import Person
 from people.serializers import PersonSerializer
 from Users.authentication import CsrfExemptSessionAuthentication
+from core.async_views import AsyncAPIView, aget_for_serializer
+from core.throttling import TenantRateThrottle, UserRateThrottle
+from core.mixins import CompiledListMixin, SparseFieldsetMixin
+from core.uploads import IMAGE_TYPES
 
 class ProfileView(APIView):
     """
@@ -17,6 +21,8 @@ class ProfileView(APIView):
     """
     authentication_classes = [CsrfExemptSessionAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    # Profile photos (see core/uploads.py)
+    upload_allowed_types = IMAGE_TYPES
 
     def get(self, request):
         person = Person.objects.filter(
@@ -74,7 +80,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
 from Org.permissions import IsOrganizationAdmin
 
-class UserManagementViewSet(viewsets.ModelViewSet):
+class UserManagementViewSet(SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     Admin ViewSet for full user CRUD operations.
     Multi-tenant aware: restricted to Organization System Admins.
@@ -146,7 +152,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         user.delete()
         return Response({'status': 'User deleted'}, status=status.HTTP_204_NO_CONTENT)
 
-class SystemAdminUserViewSet(viewsets.ModelViewSet):
+class SystemAdminUserViewSet(SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     Dedicated ViewSet for System Admins to manage user approvals.
     Strictly restricted to Organization Owners or ORG_ADMINs.
@@ -230,12 +236,13 @@ class SystemAdminUserViewSet(viewsets.ModelViewSet):
 
 from rest_framework.views import APIView
 
-class MeView(APIView):
+class MeView(AsyncAPIView):
     """
     Consolidated Me endpoint as per requirements.
     """
-    authentication_classes = [CsrfExemptSessionAuthentication]
-    permission_classes = [permissions.IsAuthenticated]
+    authentication_required = True
+    throttle_classes = [UserRateThrottle, TenantRateThrottle]
 
-    def get(self, request):
-        return Response(UserDetailSerializer(request.user).data)
+    async def get(self, request):
+        user = await aget_for_serializer(CustomUser.objects.all(), UserDetailSerializer, pk=request.user.pk)
+        return self.respond(UserDetailSerializer(user).data)
@@ -0,0 +1,206 @@
+"""
+Automatic allocation of students to the sections of a batch.
+
+`allocate()` splits a list of students across a batch's sections in
+memory, from two queries (the students and the batch's enrollments), and
+writes nothing:
+
+- No section receives more students than it has free seats.
+- Gender is balanced. Gender groups are placed largest first, and each
+  student goes to the section where their gender's share of the capacity
+  is lowest, counting the students already enrolled. Ties go to the
+  emptiest section, then by name. A heap of the sections per group makes
+  this O(n log s) for n students and s sections.
+- Roll numbers are deterministic. Existing ones are kept, and each
+  section's new students, sorted by name, are numbered on from the
+  section's highest numeric roll number.
+
+Students are taken in a fixed (name) order, so the same request against
+the same data gives the same allocation: a preview is what `commit()`
+writes, unless the batch changed in between. `commit()` claims the seats
+(see academic.services) and bulk inserts the enrollments, with their
+history rows, in one transaction.
+"""
+import heapq
+from collections import Counter
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from simple_history.utils import bulk_create_with_history
+from Org import stats
+from academic.models import SectionWaitlistEntry, StudentEnrollment
+from academic.promotion import BULK_BATCH_SIZE
+from academic.reports import bump_version
+from academic.services import SectionFull, claim_seat
+from people.models import Student
+
+
+class AllocationError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'The students cannot be allocated.'
+    default_code = 'allocation_error'
+
+
+def _name_key(row):
+    return (
+        row['person__last_name'].lower(), row['person__first_name'].lower(),
+        row['admission_number'] or '', str(row['id']),
+    )
+
+
+class SectionSlot:
+    """A section being filled: its enrollments so far and the students allocated to it."""
+
+    def __init__(self, section):
+        self.section = section
+        self.genders = Counter()
+        self.last_roll = 0
+        self.students = []
+
+    @property
+    def free(self):
+        return self.section.capacity - self.section.enrolled_count - len(self.students)
+
+    def rank(self, gender):
+        # Heap entry: lowest share of `gender`, then least filled, then by name
+        capacity = self.section.capacity
+        filled = self.section.enrolled_count + len(self.students)
+        return self.genders[gender] / capacity, filled / capacity, self.section.name, self.section.pk
+
+    def numbered(self):
+        """Allocated students in name order with their new roll numbers."""
+        return [
+            (row, str(self.last_roll + position))
+            for position, row in enumerate(sorted(self.students, key=_name_key), start=1)
+        ]
+
+
+class Allocation:
+    def __init__(self, batch, slots, already_enrolled, unallocated):
+        self.batch = batch
+        self.slots = slots
+        self.already_enrolled = already_enrolled
+        self.unallocated = unallocated
+
+    def diff(self):
+        return {
+            'batch': self.batch.pk,
+            'sections': [
+                {
+                    'id': slot.section.pk,
+                    'name': slot.section.name,
+                    'capacity': slot.section.capacity,
+                    'enrolled_before': slot.section.enrolled_count,
+                    'allocated': len(slot.students),
+                    'enrolled_after': slot.section.enrolled_count + len(slot.students),
+                    'genders': {gender or 'UNKNOWN': count for gender, count in sorted(slot.genders.items()) if count},
+                    'students': [
+                        {
+                            'student': row['id'],
+                            'name': f"{row['person__first_name']} {row['person__last_name']}".strip(),
+                            'gender': row['person__gender'],
+                            'roll_number': roll_number,
+                        }
+                        for row, roll_number in slot.numbered()
+                    ],
+                }
+                for slot in self.slots
+            ],
+            'students': sum(len(slot.students) for slot in self.slots),
+            'already_enrolled': sorted(self.already_enrolled, key=str),
+            'unallocated': [row['id'] for row in self.unallocated],
+        }
+
+
+def allocate(batch, student_ids, sections=None):
+    """
+    Allocate the students (Student ids) to the batch's sections, or to
+    `sections` of it; students already enrolled in the batch are left out.
+    """
+    sections = list((batch.sections.all() if sections is None else sections).order_by('name'))
+    if not sections:
+        raise AllocationError('The batch has no sections.')
+
+    student_ids = list(dict.fromkeys(student_ids))
+    students = {
+        row['id']: row for row in Student.objects.filter(
+            pk__in=student_ids, person__organization_id=batch.organization_id
+        ).values('id', 'admission_number', 'person__first_name', 'person__last_name', 'person__gender')
+    }
+    missing = [str(student_id) for student_id in student_ids if student_id not in students]
+    if missing:
+        raise AllocationError(f"Unknown students: {', '.join(missing)}.")
+
+    slots = {section.pk: SectionSlot(section) for section in sections}
+    already = set()
+    for section_id, student_id, gender, roll_number in StudentEnrollment.objects.filter(
+        section__batch=batch
+    ).values_list('section_id', 'student_id', 'student__person__gender', 'roll_number'):
+        already.add(student_id)
+        slot = slots.get(section_id)
+        if slot is None:
+            continue
+        slot.genders[gender or ''] += 1
+        if roll_number and roll_number.isdigit():
+            slot.last_roll = max(slot.last_roll, int(roll_number))
+
+    groups = {}
+    for row in sorted((row for row in students.values() if row['id'] not in already), key=_name_key):
+        groups.setdefault(row['person__gender'] or '', []).append(row)
+
+    unallocated = []
+    for gender, rows in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+        heap = [slot.rank(gender) for slot in slots.values() if slot.free > 0]
+        heapq.heapify(heap)
+        for row in rows:
+            if not heap:
+                unallocated.append(row)
+                continue
+            slot = slots[heapq.heappop(heap)[-1]]
+            slot.students.append(row)
+            slot.genders[gender] += 1
+            if slot.free > 0:
+                heapq.heappush(heap, slot.rank(gender))
+
+    return Allocation(batch, list(slots.values()), already & set(student_ids), unallocated)
+
+
+@transaction.atomic
+def commit(allocation, user=None):
+    """Enroll the allocated students; returns the allocation's diff."""
+    if allocation.unallocated:
+        raise SectionFull(f'Not enough free seats for {len(allocation.unallocated)} of the students.')
+
+    enrollments = []
+    for slot in allocation.slots:
+        if not slot.students:
+            continue
+        section = slot.section
+        if not claim_seat(section.pk, len(slot.students)):
+            raise SectionFull(f'Not enough seats in section {section.name}.')
+        enrollments.extend(
+            StudentEnrollment(
+                organization_id=section.organization_id, student_id=row['id'],
+                section=section, roll_number=roll_number,
+            )
+            for row, roll_number in slot.numbered()
+        )
+    try:
+        with transaction.atomic():
+            bulk_create_with_history(
+                enrollments, StudentEnrollment, batch_size=BULK_BATCH_SIZE,
+                default_user=user, default_change_reason='Allocated to a section',
+            )
+    except IntegrityError:
+        raise AllocationError('Some of the students were enrolled meanwhile; preview the allocation again.')
+
+    SectionWaitlistEntry.objects.filter(
+        section__in=[slot.section for slot in allocation.slots],
+        student_id__in=[enrollment.student_id for enrollment in enrollments],
+    ).delete()
+    # Bulk inserts bypass the signals maintaining these
+    for slot in allocation.slots:
+        if slot.students:
+            stats.move_enrollments(slot.section.pk, len(slot.students))
+    bump_version(allocation.batch.organization_id)
+    return allocation.diff()
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class AcademicConfig(AppConfig):
     name = 'academic'
+
+    def ready(self):
+        from academic import reports
+        reports.connect_signals()
+
+        from academic import services
+        services.connect_signals()
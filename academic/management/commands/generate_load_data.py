@@ -0,0 +1,319 @@
+import random
+import time
+import uuid
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from Org.models import Organization, OrganizationAdmin
+from Org.models.organization import OrganizationDomain, OrganizationProfile
+from Users.models import Role
+from academic.models import (
+    Faculty, AcademicClass, Subject, Batch, Section, StudentEnrollment, TeacherAssignment
+)
+from academic.services import recount_enrollments
+from people.models import Person, Student, Teacher
+
+User = get_user_model()
+
+DOMAIN_SUFFIX = 'load.test'
+FIRST_NAMES = [
+    'Aarav', 'Anita', 'Bikash', 'Deepa', 'Gita', 'Hari', 'Kiran', 'Laxmi', 'Manish', 'Nisha',
+    'Prakash', 'Rita', 'Sagar', 'Sita', 'Suman', 'Tara', 'Ujjwal', 'Yamuna',
+]
+LAST_NAMES = [
+    'Adhikari', 'Bhandari', 'Gurung', 'Karki', 'Lama', 'Magar', 'Rai', 'Shah', 'Sharma',
+    'Shrestha', 'Tamang', 'Thapa',
+]
+FACULTIES = ['Science', 'Management', 'Humanities']
+GENDERS = ['MALE', 'FEMALE']
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate deterministic synthetic tenants for load and benchmark runs. '
+        'The same --seed always produces the same ids, names and relations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+        parser.add_argument('--orgs', type=int, default=1, help='Number of organizations')
+        parser.add_argument('--users', type=int, default=50, help='Login accounts per organization (incl. owner)')
+        parser.add_argument('--persons', type=int, default=0, help='Extra persons without a profile per organization')
+        parser.add_argument('--students', type=int, default=1000, help='Students per organization')
+        parser.add_argument('--teachers', type=int, default=50, help='Teachers per organization')
+        parser.add_argument('--classes', type=int, default=10, help='Academic classes per organization')
+        parser.add_argument('--subjects', type=int, default=50, help='Subjects per organization')
+        parser.add_argument('--batches', type=int, default=10, help='Batches per organization')
+        parser.add_argument('--sections', type=int, default=30, help='Sections per organization')
+        parser.add_argument(
+            '--enrollments', type=int, default=None,
+            help='Student enrollments per organization, up to the seats of its sections (default: one per student)'
+        )
+        parser.add_argument(
+            '--assignments', type=int, default=None,
+            help='Teacher assignments per organization (default: one per section and subject of its class)'
+        )
+        parser.add_argument('--password', default='password123', help='Password of every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--flush', action='store_true', help=f'Delete previously generated *.{DOMAIN_SUFFIX} tenants first')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1 (the organization owner).')
+        for name in ('classes', 'batches', 'sections'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1.')
+
+        if options['flush']:
+            self.flush()
+
+        roles = {name: Role.objects.get_or_create(name=name)[0] for name in ('ORG_ADMIN', 'STAFF')}
+        # Hash once with a seed-derived salt: per-user hashing would dominate the run.
+        password = make_password(options['password'], salt=f"load{options['seed']}")
+
+        started = time.perf_counter()
+        total = 0
+        for index in range(options['orgs']):
+            org_started = time.perf_counter()
+            generator = TenantGenerator(index, options, roles, password)
+            with transaction.atomic():
+                rows = generator.generate(self.insert_factory(options['batch_size']))
+            total += rows
+            self.stdout.write(
+                f"Organization {generator.domain}: {rows} rows in {time.perf_counter() - org_started:.1f}s"
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total} rows for {options['orgs']} organization(s) in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+
+    def flush(self):
+        organizations = Organization.objects.filter(domains__domain__endswith=f'.{DOMAIN_SUFFIX}')
+        owner_ids = list(organizations.values_list('owner_id', flat=True))
+        deleted, _ = organizations.delete()
+        User.objects.filter(id__in=owner_ids).delete()
+        User.objects.filter(email__endswith=f'.{DOMAIN_SUFFIX}').delete()
+        self.stdout.write(f"Flushed {deleted} rows of previously generated tenants.")
+
+    def insert_factory(self, batch_size):
+        """
+        Return the fastest insert available: COPY on PostgreSQL with
+        psycopg 3, bulk_create everywhere else.
+        """
+        if connection.vendor == 'postgresql':
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            if is_psycopg3:
+                return copy_insert
+        return lambda model, objs: bulk_insert(model, objs, batch_size)
+
+
+def bulk_insert(model, objs, batch_size):
+    model._default_manager.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def copy_insert(model, objs):
+    """Stream `objs` into the model's table with COPY FROM STDIN."""
+    if not objs:
+        return 0
+    # Auto-increment keys are left to the database
+    fields = [field for field in model._meta.concrete_fields if not field.db_returning]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN'
+    with connection.cursor() as cursor:
+        with cursor.copy(sql) as copy:
+            for obj in objs:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+    return len(objs)
+
+
+class TenantGenerator:
+    """
+    Builds one synthetic tenant in memory and inserts it table by table.
+    Every id and value comes from a Random seeded with (seed, org index),
+    so tenants are reproducible independently of --orgs.
+    """
+
+    def __init__(self, index, options, roles, password):
+        self.index = index
+        self.options = options
+        self.roles = roles
+        self.password = password
+        self.rng = random.Random(f"{options['seed']}:{index}")
+        self.domain = f"org{index}.{DOMAIN_SUFFIX}"
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def person(self, organization, **kwargs):
+        rng = self.rng
+        return Person(
+            id=self.uuid(),
+            organization=organization,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            gender=rng.choice(GENDERS),
+            **kwargs
+        )
+
+    def generate(self, insert):
+        opts = self.options
+        rng = self.rng
+        tag = f"{opts['seed']}-{self.index}"
+        rows = 0
+
+        # Organization and its owner reference each other; ids are known up
+        # front and the FK constraints are only checked at commit.
+        owner_id = self.uuid()
+        org = Organization(
+            id=self.uuid(), org_name=f"Load Test School {self.index}", domain_name=self.domain,
+            email=f"info@{self.domain}", owner_id=owner_id
+        )
+        rows += insert(Organization, [org])
+        rows += insert(OrganizationDomain, [OrganizationDomain(id=self.uuid(), organization=org, domain=self.domain)])
+        rows += insert(OrganizationProfile, [OrganizationProfile(organization=org, description="Generated tenant")])
+
+        users = [
+            User(
+                id=owner_id if i == 0 else self.uuid(), email=f"user{i}@{self.domain}", password=self.password,
+                organization=org, approval_status='APPROVED'
+            )
+            for i in range(opts['users'])
+        ]
+        rows += insert(User, users)
+        Through = User.roles.through
+        rows += insert(Through, [
+            Through(customuser_id=user.id, role_id=self.roles['ORG_ADMIN' if i == 0 else 'STAFF'].id)
+            for i, user in enumerate(users)
+        ])
+        rows += insert(OrganizationAdmin, [OrganizationAdmin(id=self.uuid(), user=users[0], organization=org)])
+
+        faculties = [Faculty(id=self.uuid(), organization=org, name=name) for name in FACULTIES]
+        classes = [
+            AcademicClass(id=self.uuid(), organization=org, name=f"Class {i + 1}", level_order=i + 1)
+            for i in range(opts['classes'])
+        ]
+        subjects = [
+            Subject(
+                id=self.uuid(), organization=org, name=f"Subject {i + 1}", code=f"SUB{i + 1:03d}",
+                academic_class=classes[i % len(classes)]
+            )
+            for i in range(opts['subjects'])
+        ]
+        batches = [
+            Batch(
+                id=self.uuid(), organization=org, name=f"Session {2020 + i // len(classes)}",
+                academic_class=classes[i % len(classes)],
+                start_date=date(2020 + i // len(classes), 1, 1), end_date=date(2020 + i // len(classes), 12, 31)
+            )
+            for i in range(opts['batches'])
+        ]
+        sections = [
+            Section(
+                id=self.uuid(), organization=org, batch=batches[i % len(batches)],
+                name=f"Section {i // len(batches) + 1}", capacity=rng.choice([30, 40, 50])
+            )
+            for i in range(opts['sections'])
+        ]
+        for model, objs in (
+            (Faculty, faculties), (AcademicClass, classes), (Subject, subjects),
+            (Batch, batches), (Section, sections),
+        ):
+            rows += insert(model, objs)
+
+        user_persons = [
+            self.person(org, user=user, email=user.email, is_claimed=True)
+            for user in users
+        ]
+        student_persons = [self.person(org) for _ in range(opts['students'])]
+        teacher_persons = [self.person(org) for _ in range(opts['teachers'])]
+        other_persons = [self.person(org) for _ in range(opts['persons'])]
+        rows += insert(Person, user_persons + student_persons + teacher_persons + other_persons)
+
+        students = [
+            Student(id=self.uuid(), person=person, admission_number=f"ADM-{tag}-{i + 1}")
+            for i, person in enumerate(student_persons)
+        ]
+        teachers = [
+            Teacher(id=self.uuid(), person=person, employee_id=f"EMP-{tag}-{i + 1}")
+            for i, person in enumerate(teacher_persons)
+        ]
+        rows += insert(Student, students)
+        rows += insert(Teacher, teachers)
+
+        rows += insert(StudentEnrollment, self.enrollments(org, students, sections))
+        # Bulk inserts bypass the signals keeping Section.enrolled_count
+        recount_enrollments(Section.objects.filter(organization=org))
+        rows += insert(TeacherAssignment, self.assignments(org, teachers, subjects, sections))
+        return rows
+
+    def enrollments(self, org, students, sections):
+        """
+        Spread enrollments over sections. A student enrolled more than once
+        lands in a different section each round, keeping (section, student)
+        unique. No section is filled beyond its capacity: a full section
+        passes the student on to the next one with a free seat, and
+        enrollments beyond the seats of the tenant are not generated.
+        """
+        if not students:
+            return []
+        count = self.options['enrollments']
+        count = len(students) if count is None else min(count, len(students) * len(sections))
+        offsets = [self.rng.randrange(len(sections)) for _ in students]
+        seats = [section.capacity for section in sections]
+        taken = [set() for _ in students]
+        roll_numbers = [0] * len(sections)
+        enrollments = []
+        for i in range(min(count, sum(seats))):
+            student_index, round_ = i % len(students), i // len(students)
+            start = offsets[student_index] + round_
+            section_index = next((
+                index for index in ((start + step) % len(sections) for step in range(len(sections)))
+                if seats[index] and index not in taken[student_index]
+            ), None)
+            if section_index is None:
+                continue
+            seats[section_index] -= 1
+            taken[student_index].add(section_index)
+            roll_numbers[section_index] += 1
+            enrollments.append(StudentEnrollment(
+                id=self.uuid(), organization=org, student=students[student_index],
+                section=sections[section_index], roll_number=str(roll_numbers[section_index])
+            ))
+        return enrollments
+
+    def assignments(self, org, teachers, subjects, sections):
+        """
+        Assign a random teacher to (section, subject) pairs, preferring the
+        subjects of the section's own class.
+        """
+        if not teachers or not subjects:
+            return []
+        by_class = {}
+        for subject in subjects:
+            by_class.setdefault(subject.academic_class_id, []).append(subject)
+        pairs = [
+            (section, subject)
+            for section in sections
+            for subject in by_class.get(section.batch.academic_class_id, [])
+        ]
+        count = self.options['assignments']
+        if count is not None:
+            others = [
+                (section, subject)
+                for section in sections
+                for subject in subjects
+                if subject.academic_class_id != section.batch.academic_class_id
+            ]
+            pairs = (pairs + others)[:count]
+        return [
+            TeacherAssignment(
+                id=self.uuid(), organization=org, teacher=self.rng.choice(teachers),
+                subject=subject, section=section
+            )
+            for section, subject in pairs
+        ]
@@ -0,0 +1,171 @@
+import json
+import platform
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from Org.models import Organization
+from academic.models import AcademicClass, Batch, Section, SectionWaitlistEntry, StudentEnrollment
+from academic.services import EnrollmentService, SectionFull
+from core.management.commands.benchmark_api import percentile
+from people.models import Person, Student
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Enroll many students into one section from concurrent threads '
+        'through EnrollmentService, then withdraw some of them concurrently, '
+        'and check that the section never exceeds its capacity, that '
+        'enrolled_count matches the enrollments and that freed seats went to '
+        'the waitlist. Runs against a scratch tenant that is deleted '
+        'afterwards. Run it against PostgreSQL; SQLite serializes writers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=30, help='Seats in the section')
+        parser.add_argument('--students', type=int, default=100, help='Students applying concurrently')
+        parser.add_argument('--withdrawals', type=int, default=10, help='Enrollments withdrawn concurrently')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--output', default='stress-enrollments.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        if options['capacity'] < 1 or options['students'] < 1 or options['threads'] < 1:
+            raise CommandError('--capacity, --students and --threads must be positive.')
+
+        section, students = self.scratch_tenant(options['capacity'], options['students'])
+        try:
+            admissions = self.run(
+                lambda student: EnrollmentService.enroll(student, section, section.organization, waitlist=True),
+                students, options['threads'],
+            )
+            enrolled = sum(1 for enrollment, _ in admissions['results'] if enrollment)
+            self.check(section, enrolled, len(students) - enrolled)
+
+            victims = list(StudentEnrollment.objects.filter(section=section)[:options['withdrawals']])
+            withdrawals = self.run(EnrollmentService.withdraw, victims, options['threads'])
+            promoted = sum(len(result) for result in withdrawals['results'])
+            waiting = len(students) - enrolled - promoted
+            self.check(section, enrolled - len(victims) + promoted, waiting)
+        finally:
+            organization = section.organization
+            owner = organization.owner
+            organization.delete()
+            owner.delete()
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'capacity': options['capacity'],
+            'students': len(students),
+            'threads': options['threads'],
+            'enrolled': enrolled,
+            'waitlisted': len(students) - enrolled,
+            'withdrawn': len(victims),
+            'promoted': promoted,
+            'admissions': {key: value for key, value in admissions.items() if key != 'results'},
+            'withdrawals': {key: value for key, value in withdrawals.items() if key != 'results'},
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(
+            f"{len(students)} students, {options['capacity']} seats: {enrolled} enrolled, "
+            f"{len(students) - enrolled} waitlisted; {len(victims)} withdrawn, {promoted} promoted"
+        )
+        for name, run in (('admissions', admissions), ('withdrawals', withdrawals)):
+            self.stdout.write(
+                f"{name:<12} p50 {run['p50_ms']:.2f} ms, p99 {run['p99_ms']:.2f} ms, "
+                f"{run['per_second']:.1f}/s, {run['retries']} retries"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Invariants held. Results written to {options['output']}"))
+
+    def scratch_tenant(self, capacity, count):
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(email=f'stress-{tag}@stress.test', password=None)
+        org = Organization.objects.create(org_name=f'Stress {tag}', email=f'org-{tag}@stress.test', owner=owner)
+        academic_class = AcademicClass.objects.create(organization=org, name='Stress', level_order=1)
+        batch = Batch.objects.create(
+            organization=org, name=tag, academic_class=academic_class,
+            start_date='2025-01-01', end_date='2025-12-31',
+        )
+        section = Section.objects.create(organization=org, batch=batch, name='A', capacity=capacity)
+        persons = Person.objects.bulk_create([
+            Person(organization=org, first_name=f'Student{i}', last_name=tag) for i in range(count)
+        ])
+        students = Student.objects.bulk_create([Student(person=person) for person in persons])
+        return section, students
+
+    def run(self, operation, items, threads):
+        """Apply `operation` to every item from `threads` concurrent clients."""
+        results = [None] * len(items)
+        latencies = []
+        retries = [0]
+        lock = threading.Lock()
+
+        def client(index):
+            attempts = 0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        results[index] = operation(items[index])
+                    except SectionFull:
+                        results[index] = (None, None)
+                    except OperationalError as exc:
+                        # SQLite refuses concurrent writers instead of queueing them
+                        if 'locked' not in str(exc) or attempts >= 50:
+                            raise
+                        attempts += 1
+                        time.sleep(0.005 * attempts)
+                        continue
+                    break
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    retries[0] += attempts
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for future in [pool.submit(client, index) for index in range(len(items))]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'results': results,
+            'operations': len(items),
+            'retries': retries[0],
+            'per_second': len(items) / elapsed if elapsed else 0,
+            'p50_ms': percentile(latencies, 50) or 0,
+            'p99_ms': percentile(latencies, 99) or 0,
+        }
+
+    def check(self, section, enrolled, waiting):
+        section.refresh_from_db()
+        counted = StudentEnrollment.objects.filter(section=section).count()
+        waitlisted = SectionWaitlistEntry.objects.filter(section=section).count()
+        problems = []
+        if counted > section.capacity:
+            problems.append(f'{counted} enrollments exceed the capacity of {section.capacity}')
+        if section.enrolled_count != counted:
+            problems.append(f'enrolled_count is {section.enrolled_count} but there are {counted} enrollments')
+        if (counted, waitlisted) != (enrolled, waiting):
+            problems.append(
+                f'expected {enrolled} enrolled and {waiting} waiting, found {counted} and {waitlisted}'
+            )
+        if waitlisted and counted < section.capacity:
+            problems.append(f'{waitlisted} students wait while {section.capacity - counted} seats are free')
+        if problems:
+            raise CommandError('; '.join(problems))
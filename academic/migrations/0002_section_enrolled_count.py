@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_enrollments(apps, schema_editor):
+    Section = apps.get_model('academic', 'Section')
+    StudentEnrollment = apps.get_model('academic', 'StudentEnrollment')
+    enrolled = (
+        StudentEnrollment.objects.filter(section=OuterRef('pk'))
+        .order_by().values('section').annotate(count=Count('pk')).values('count')
+    )
+    Section.objects.update(enrolled_count=Coalesce(Subquery(enrolled), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Org', '0005_tenantstatistic'),
+        ('academic', '0001_initial'),
+        ('people', '0002_person_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='SectionWaitlistEntry',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('roll_number', models.CharField(blank=True, max_length=50, null=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='Org.organization')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='academic.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='people.student')),
+            ],
+            options={
+                'verbose_name_plural': 'Section waitlist entries',
+                'ordering': ['created_at'],
+                'unique_together': {('section', 'student')},
+            },
+        ),
+    ]
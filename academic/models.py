@@ -105,8 +105,10 @@ class Section(TenantModel):
     batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name='sections')
     room_number = models.CharField(max_length=100, blank=True, null=True)
     capacity = models.IntegerField(default=40)
+    # Maintained with the enrollments (see academic/services.py); never set it directly
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
     
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=['enrolled_count'])
 
     class Meta:
         unique_together = ('batch', 'name')
@@ -114,6 +116,15 @@ class Section(TenantModel):
     def __str__(self):
         return f"{self.batch.academic_class.name} - {self.batch.name} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        # Never write back a possibly stale enrolled_count over concurrent enrollments
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'enrolled_count'
+            ]
+        super().save(*args, **kwargs)
+
 
 class StudentEnrollment(TenantModel):
     """
@@ -152,3 +163,22 @@ class TeacherAssignment(TenantModel):
 
     def __str__(self):
         return f"{self.teacher.first_name} teaches {self.subject.name} in {self.section}"
+
+
+class SectionWaitlistEntry(TenantModel):
+    """
+    A student waiting for a seat in a full section; seats are offered in
+    the order students joined (see academic/services.py).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey('people.Student', on_delete=models.CASCADE, related_name='waitlist_entries')
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='waitlist')
+    roll_number = models.CharField(max_length=50, blank=True, null=True)
+
+    class Meta:
+        unique_together = ('section', 'student')
+        ordering = ['created_at']
+        verbose_name_plural = "Section waitlist entries"
+
+    def __str__(self):
+        return f"{self.student} waiting for {self.section}"
@@ -0,0 +1,231 @@
+"""
+Year-end promotion of a whole batch to the next class.
+
+`plan_promotion()` works out, without writing anything, where a batch's
+students go: the target batch in the next class by level_order (an
+existing one, or one to create) and, for each source section, the target
+section of the same name (likewise created when missing). A plan's
+`diff()` is what a dry run returns. Planning takes a fixed number of
+queries however many students the batch has.
+
+`execute()` carries a plan out. The target batch and sections are created
+first. Then each section's students are promoted in one transaction per
+section: the seats are claimed with one conditional UPDATE (see
+academic.services), the enrollments and their history rows are written
+with bulk inserts (simple_history's bulk_create_with_history), and the
+students' entries on the target section's waitlist are dropped. A section
+that fails rolls back alone and is reported. Students already enrolled
+anywhere in the target batch are skipped, so running a promotion again
+only adds the students still missing.
+"""
+from collections import namedtuple
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from simple_history.utils import bulk_create_with_history
+from Org import stats
+from academic.models import AcademicClass, Batch, Section, SectionWaitlistEntry, StudentEnrollment
+from academic.reports import bump_version
+from academic.services import SectionFull, claim_seat
+
+BULK_BATCH_SIZE = 1000
+
+# One source section's students and the section they are promoted to
+SectionMove = namedtuple('SectionMove', 'source target students already_enrolled')
+
+
+class PromotionError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'The batch cannot be promoted.'
+    default_code = 'promotion_error'
+
+
+def next_class(academic_class):
+    """The organization's class following `academic_class` by level_order, if any."""
+    return AcademicClass.objects.filter(
+        organization_id=academic_class.organization_id, level_order__gt=academic_class.level_order
+    ).order_by('level_order', 'name').first()
+
+
+def _next_year(day):
+    try:
+        return day.replace(year=day.year + 1)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year + 1, day=28)
+
+
+class PromotionPlan:
+    def __init__(self, source, target_batch, moves):
+        self.source = source
+        self.target_batch = target_batch
+        self.moves = moves
+
+    @property
+    def creates_batch(self):
+        return self.target_batch._state.adding
+
+    @property
+    def students(self):
+        return sum(len(move.students) for move in self.moves)
+
+    @property
+    def over_capacity(self):
+        return [move for move in self.moves if move.target.enrolled_count + len(move.students) > move.target.capacity]
+
+    def diff(self):
+        target = self.target_batch
+        return {
+            'source_batch': {
+                'id': self.source.pk, 'name': self.source.name,
+                'class': self.source.academic_class_id, 'class_name': self.source.academic_class.name,
+            },
+            'target_batch': {
+                'id': None if self.creates_batch else target.pk, 'name': target.name,
+                'class': target.academic_class_id, 'class_name': target.academic_class.name,
+                'start_date': target.start_date, 'end_date': target.end_date,
+                'create': self.creates_batch,
+            },
+            'sections': [
+                {
+                    'source': move.source.pk,
+                    'source_name': move.source.name,
+                    'target': None if move.target._state.adding else move.target.pk,
+                    'target_name': move.target.name,
+                    'create': move.target._state.adding,
+                    'capacity': move.target.capacity,
+                    'enrolled_before': move.target.enrolled_count,
+                    'promote': len(move.students),
+                    'already_enrolled': move.already_enrolled,
+                    'enrolled_after': move.target.enrolled_count + len(move.students),
+                    'over_capacity': move.target.enrolled_count + len(move.students) > move.target.capacity,
+                }
+                for move in self.moves
+            ],
+            'students': self.students,
+            'already_enrolled': sum(move.already_enrolled for move in self.moves),
+        }
+
+
+def plan_promotion(batch, target_batch=None, name=None, start_date=None, end_date=None, exclude=()):
+    """
+    Plan promoting `batch` into `target_batch`, or into the next class's
+    batch called `name` (default: the source batch's name), created with
+    the given dates (default: a year after the source's) when missing.
+    Students in `exclude` (Student ids) are held back.
+    """
+    source_class = batch.academic_class
+    if target_batch is None:
+        target_class = next_class(source_class)
+        if target_class is None:
+            raise PromotionError(f'There is no class above {source_class.name}.')
+        name = name or batch.name
+        target_batch = Batch.objects.filter(
+            organization_id=batch.organization_id, academic_class=target_class, name=name
+        ).select_related('academic_class').first() or Batch(
+            organization_id=batch.organization_id, academic_class=target_class, name=name,
+            start_date=start_date or _next_year(batch.start_date),
+            end_date=end_date or _next_year(batch.end_date),
+        )
+    elif target_batch.organization_id != batch.organization_id:
+        raise PromotionError('The target batch belongs to another organization.')
+    elif target_batch.academic_class.level_order <= source_class.level_order:
+        raise PromotionError('The target batch must be in a higher class.')
+
+    existing = {}
+    enrolled = set()
+    if not target_batch._state.adding:
+        existing = {section.name: section for section in target_batch.sections.all()}
+        enrolled = set(
+            StudentEnrollment.objects.filter(section__batch=target_batch).values_list('student_id', flat=True)
+        )
+
+    by_section = {}
+    for section_id, student_id, roll_number in (
+        StudentEnrollment.objects.filter(section__batch=batch).exclude(student_id__in=exclude)
+        .order_by('section__name', 'created_at').values_list('section_id', 'student_id', 'roll_number')
+    ):
+        by_section.setdefault(section_id, []).append((student_id, roll_number))
+
+    moves = []
+    seen = set()
+    for source in batch.sections.order_by('name'):
+        students, already = [], 0
+        for student_id, roll_number in by_section.get(source.pk, []):
+            if student_id in seen:
+                # Enrolled in two sections of the batch: promoted once, with the first
+                continue
+            seen.add(student_id)
+            if student_id in enrolled:
+                already += 1
+            else:
+                students.append((student_id, roll_number))
+        target = existing.get(source.name) or Section(
+            organization_id=batch.organization_id, batch=target_batch, name=source.name,
+            room_number=source.room_number, capacity=max(source.capacity, len(students)),
+        )
+        moves.append(SectionMove(source, target, students, already))
+    return PromotionPlan(batch, target_batch, moves)
+
+
+def execute(plan, user=None, deactivate_source=False):
+    """
+    Carry out a plan; returns its diff with each section's 'status'
+    ('promoted', 'unchanged' or 'failed', with an 'error').
+    """
+    if plan.over_capacity:
+        names = ', '.join(move.target.name for move in plan.over_capacity)
+        raise SectionFull(f'Not enough seats in target section(s) {names}.')
+
+    with transaction.atomic():
+        if plan.creates_batch:
+            plan.target_batch.save()
+        for move in plan.moves:
+            if move.target._state.adding:
+                move.target.batch = plan.target_batch
+                move.target.save()
+
+    result = plan.diff()
+    reason = f'Promoted from {plan.source.name} ({plan.source.academic_class.name})'
+    for move, row in zip(plan.moves, result['sections']):
+        row['target'], row['create'] = move.target.pk, False
+        if not move.students:
+            row['status'] = 'unchanged'
+            continue
+        try:
+            _promote_section(move, user, reason)
+        except (SectionFull, IntegrityError) as exc:
+            row['status'], row['error'] = 'failed', str(exc)
+        else:
+            row['status'] = 'promoted'
+    result['target_batch'].update(id=plan.target_batch.pk, create=False)
+
+    if deactivate_source and all(row['status'] != 'failed' for row in result['sections']):
+        plan.source.is_active = False
+        plan.source.save()
+    return result
+
+
+@transaction.atomic
+def _promote_section(move, user, reason):
+    target = move.target
+    if not claim_seat(target.pk, len(move.students)):
+        raise SectionFull(f'Not enough seats in section {target.name}.')
+    bulk_create_with_history(
+        [
+            StudentEnrollment(
+                organization_id=target.organization_id, student_id=student_id,
+                section=target, roll_number=roll_number,
+            )
+            for student_id, roll_number in move.students
+        ],
+        StudentEnrollment, batch_size=BULK_BATCH_SIZE,
+        default_user=user, default_change_reason=reason,
+    )
+    # Seated now, so no longer waiting (fill_from_waitlist would seat them again)
+    SectionWaitlistEntry.objects.filter(
+        section=target, student_id__in=[student_id for student_id, _ in move.students]
+    ).delete()
+    # Bulk inserts bypass the signals maintaining these
+    stats.move_enrollments(target.pk, len(move.students))
+    bump_version(target.organization_id)
@@ -0,0 +1,171 @@
+"""
+Section rosters and class enrollment report.
+
+`section_rosters()` builds a tenant's full roster set (every section with
+its students, their guardians and the section's teachers, plus per-class
+enrollment and capacity totals) in five set-based queries, however many
+sections and students there are.
+
+The result is cached per tenant under the tenant's academic version, an
+opaque token replaced (after commit) whenever a row the report reads is
+saved or deleted. A cached report is therefore never stale, and nothing has
+to be deleted: old versions expire from the cache on their own. Code that
+changes those rows with bulk operations, which bypass the signals, calls
+`bump_version()` itself.
+"""
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from academic.models import AcademicClass, Batch, Section, StudentEnrollment, Subject, TeacherAssignment
+from people.models import Guardian, Person, Student, Teacher
+
+
+def _version_key(organization_id):
+    return f'academic:version:{organization_id}'
+
+
+def academic_version(organization_id):
+    """Current academic version token of an organization."""
+    key = _version_key(organization_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(organization_id):
+    """Invalidate the organization's cached reports once the current transaction commits."""
+    if organization_id is not None:
+        transaction.on_commit(lambda: cache.set(_version_key(organization_id), uuid.uuid4().hex, timeout=None))
+
+
+def _roll_key(row):
+    roll = row['roll_number'] or ''
+    return (not roll, int(roll) if roll.isdigit() else float('inf'), roll, row['last_name'], row['first_name'])
+
+
+def build_section_rosters(organization_id):
+    sections = list(
+        Section.objects.filter(organization_id=organization_id)
+        .annotate(enrolled=Count('enrollments'))
+        .order_by('batch__academic_class__level_order', 'batch__name', 'name')
+        .values(
+            'id', 'name', 'room_number', 'capacity', 'enrolled',
+            'batch_id', 'batch__name', 'batch__academic_class_id',
+        )
+    )
+    enrollments = StudentEnrollment.objects.filter(organization_id=organization_id).values(
+        'id', 'section_id', 'roll_number', 'enrollment_date', 'student_id',
+        'student__person_id', 'student__person__first_name', 'student__person__last_name',
+        'student__person__gender', 'student__admission_number',
+    )
+    guardians = Guardian.objects.filter(student__person__organization_id=organization_id).values(
+        'student_id', 'occupation', 'person__first_name', 'person__last_name',
+        'person__phone_number', 'person__email',
+    )
+    assignments = TeacherAssignment.objects.filter(organization_id=organization_id).order_by(
+        'subject__name', 'teacher__person__last_name'
+    ).values(
+        'section_id', 'teacher__person_id', 'teacher__person__first_name', 'teacher__person__last_name',
+        'teacher__employee_id', 'subject_id', 'subject__name', 'subject__code',
+    )
+    classes = AcademicClass.objects.filter(organization_id=organization_id).values('id', 'name', 'level_order')
+
+    guardians_by_student = {}
+    for row in guardians:
+        guardians_by_student.setdefault(row['student_id'], []).append({
+            'name': f"{row['person__first_name']} {row['person__last_name']}".strip(),
+            'phone_number': row['person__phone_number'],
+            'email': row['person__email'],
+            'occupation': row['occupation'],
+        })
+
+    students_by_section = {}
+    for row in enrollments:
+        students_by_section.setdefault(row['section_id'], []).append({
+            'enrollment_id': row['id'],
+            'person_id': row['student__person_id'],
+            'first_name': row['student__person__first_name'],
+            'last_name': row['student__person__last_name'],
+            'gender': row['student__person__gender'],
+            'admission_number': row['student__admission_number'],
+            'roll_number': row['roll_number'],
+            'enrollment_date': row['enrollment_date'],
+            'guardians': guardians_by_student.get(row['student_id'], []),
+        })
+
+    teachers_by_section = {}
+    for row in assignments:
+        teachers_by_section.setdefault(row['section_id'], []).append({
+            'person_id': row['teacher__person_id'],
+            'name': f"{row['teacher__person__first_name']} {row['teacher__person__last_name']}".strip(),
+            'employee_id': row['teacher__employee_id'],
+            'subject_id': row['subject_id'],
+            'subject_name': row['subject__name'],
+            'subject_code': row['subject__code'],
+        })
+
+    totals = {row['id']: {**row, 'sections': 0, 'capacity': 0, 'enrolled': 0} for row in classes}
+    rosters = []
+    for row in sections:
+        class_totals = totals[row['batch__academic_class_id']]
+        class_totals['sections'] += 1
+        class_totals['capacity'] += row['capacity']
+        class_totals['enrolled'] += row['enrolled']
+        rosters.append({
+            'id': row['id'],
+            'name': row['name'],
+            'batch': row['batch_id'],
+            'batch_name': row['batch__name'],
+            'class': row['batch__academic_class_id'],
+            'class_name': class_totals['name'],
+            'room_number': row['room_number'],
+            'capacity': row['capacity'],
+            'enrolled': row['enrolled'],
+            'available': max(row['capacity'] - row['enrolled'], 0),
+            'students': sorted(students_by_section.get(row['id'], []), key=_roll_key),
+            'teachers': teachers_by_section.get(row['id'], []),
+        })
+
+    class_rows = sorted(totals.values(), key=lambda row: (row['level_order'], row['name']))
+    for row in class_rows:
+        row['utilization'] = round(row['enrolled'] / row['capacity'], 4) if row['capacity'] else None
+    return {'classes': class_rows, 'sections': rosters}
+
+
+def section_rosters(organization_id):
+    """(version, report) for an organization, from the cache when the version is unchanged."""
+    version = academic_version(organization_id)
+    key = f'academic:rosters:{organization_id}:{version}'
+    report = cache.get(key)
+    if report is None:
+        report = build_section_rosters(organization_id)
+        cache.set(key, report, timeout=settings.ACADEMIC_REPORT_CACHE_SECONDS)
+    return version, report
+
+
+# Signal receivers replacing the version when a row the report reads changes
+
+def _organization_of(instance):
+    if hasattr(instance, 'organization_id'):
+        return instance.organization_id
+    # Student, Teacher and Guardian belong to a tenant through their person
+    return Person.objects.filter(pk=instance.person_id).values_list('organization_id', flat=True).first()
+
+
+def row_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_version(_organization_of(instance))
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    for model in (AcademicClass, Batch, Section, Subject, StudentEnrollment, TeacherAssignment,
+                  Person, Student, Teacher, Guardian):
+        uid = f'academic.reports.{model._meta.label}'
+        post_save.connect(row_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(row_changed, sender=model, dispatch_uid=uid)
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import (
     Faculty, AcademicClass, Course, Subject, 
-    Batch, Section, StudentEnrollment, TeacherAssignment
+    Batch, Section, SectionWaitlistEntry, StudentEnrollment, TeacherAssignment
 )
+from academic.services import EnrollmentService
 from people.serializers import PersonSerializer
 
 class FacultySerializer(serializers.ModelSerializer):
@@ -64,13 +65,13 @@ class SectionSerializer(serializers.ModelSerializer):
         model = Section
         fields = [
             'id', 'organization', 'name', 'batch', 'batch_name', 
-            'class_name', 'room_number', 'capacity', 'created_at'
+            'class_name', 'room_number', 'capacity', 'enrolled_count', 'created_at'
         ]
-        read_only_fields = ['id', 'organization', 'created_at']
+        read_only_fields = ['id', 'organization', 'enrolled_count', 'created_at']
 
 
 class StudentEnrollmentSerializer(serializers.ModelSerializer):
-    student_details = PersonSerializer(source='student', read_only=True)
+    student_details = PersonSerializer(source='student.person', read_only=True)
     section_name = serializers.ReadOnlyField(source='section.name')
     batch_name = serializers.ReadOnlyField(source='section.batch.name')
 
@@ -82,9 +83,23 @@ class StudentEnrollmentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'organization', 'enrollment_date']
 
+    def create(self, validated_data):
+        # Claims a seat; SectionFull (409) when the section is full
+        enrollment, _ = EnrollmentService.enroll(**validated_data)
+        return enrollment
+
+
+class SectionWaitlistEntrySerializer(serializers.ModelSerializer):
+    student_details = PersonSerializer(source='student.person', read_only=True)
+
+    class Meta:
+        model = SectionWaitlistEntry
+        fields = ['id', 'student', 'student_details', 'section', 'roll_number', 'created_at']
+        read_only_fields = fields
+
 
 class TeacherAssignmentSerializer(serializers.ModelSerializer):
-    teacher_details = PersonSerializer(source='teacher', read_only=True)
+    teacher_details = PersonSerializer(source='teacher.person', read_only=True)
     subject_name = serializers.ReadOnlyField(source='subject.name')
     section_name = serializers.ReadOnlyField(source='section.name')
 
@@ -0,0 +1,189 @@
+"""
+Capacity-aware enrollment.
+
+Section.enrolled_count always equals the section's number of enrollments,
+so fill rates are read from the section row instead of counted.
+
+A seat is claimed with one conditional UPDATE,
+
+    UPDATE section SET enrolled_count = enrolled_count + 1
+    WHERE id = %s AND enrolled_count < capacity
+
+in the same transaction as the enrollment INSERT. The UPDATE locks only
+that section's row until commit, and a concurrent claim re-checks the
+condition once the lock is released, so two admissions cannot both take
+the last seat however they interleave. Other sections are not locked at
+all. A COUNT(*) check followed by an insert would race.
+
+Students turned away from a full section can join its waitlist. Seats
+freed by a withdrawal or a capacity increase go to the oldest entries
+first. Entries are taken with SELECT ... FOR UPDATE SKIP LOCKED, so
+concurrent refills never wait on each other or lock the table.
+
+Enrollments created, moved or deleted any other way (the admin, cascades)
+still keep the counter right through the signal receivers below, but they
+do not check capacity. Bulk operations bypass signals; they must call
+`recount_enrollments()` afterwards.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import DEFERRED, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from academic.models import Section, SectionWaitlistEntry, StudentEnrollment
+
+
+class SectionFull(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Section is full.'
+    default_code = 'section_full'
+
+
+def claim_seat(section_id, seats=1):
+    """Take `seats` free seats of a section at once; False when fewer are free."""
+    return Section.objects.filter(
+        pk=section_id, enrolled_count__lte=F('capacity') - seats
+    ).update(enrolled_count=F('enrolled_count') + seats) == 1
+
+
+def release_seat(section_id):
+    Section.objects.filter(pk=section_id, enrolled_count__gt=0).update(enrolled_count=F('enrolled_count') - 1)
+
+
+def add_seat(section_id):
+    # Without a capacity check: for enrollments made outside EnrollmentService
+    Section.objects.filter(pk=section_id).update(enrolled_count=F('enrolled_count') + 1)
+
+
+def recount_enrollments(sections=None):
+    """Recompute enrolled_count from the enrollments, e.g. after bulk operations."""
+    sections = Section.objects.all() if sections is None else sections
+    enrolled = (
+        StudentEnrollment.objects.filter(section=OuterRef('pk'))
+        .order_by().values('section').annotate(count=Count('pk')).values('count')
+    )
+    return sections.update(enrolled_count=Coalesce(Subquery(enrolled), Value(0)))
+
+
+class EnrollmentService:
+    @staticmethod
+    @transaction.atomic
+    def enroll(student, section, organization, roll_number='', waitlist=False):
+        """
+        Enroll a student if the section has a free seat. Returns
+        (enrollment, None), or (None, waitlist entry) when the section is
+        full and `waitlist` is set; raises SectionFull otherwise.
+        """
+        if claim_seat(section.pk):
+            enrollment = StudentEnrollment(
+                student=student, section=section, organization=organization, roll_number=roll_number
+            )
+            enrollment._seat_claimed = True
+            enrollment.save()
+            SectionWaitlistEntry.objects.filter(section=section, student=student).delete()
+            return enrollment, None
+
+        if not waitlist:
+            raise SectionFull()
+        entry, _ = SectionWaitlistEntry.objects.get_or_create(
+            section=section, student=student,
+            defaults={'organization': organization, 'roll_number': roll_number},
+        )
+        return None, entry
+
+    @staticmethod
+    @transaction.atomic
+    def move(enrollment, section):
+        """Move an enrollment to another section with a free seat."""
+        previous = enrollment.section_id
+        if section.pk == previous:
+            return enrollment
+        if not claim_seat(section.pk):
+            raise SectionFull()
+        enrollment.section = section
+        enrollment._seat_claimed = True
+        enrollment.save()
+        EnrollmentService.fill_from_waitlist(previous)
+        return enrollment
+
+    @staticmethod
+    @transaction.atomic
+    def withdraw(enrollment):
+        """Delete an enrollment and offer its seat to the waitlist; returns the promoted enrollments."""
+        section_id = enrollment.section_id
+        enrollment.delete()
+        return EnrollmentService.fill_from_waitlist(section_id)
+
+    @staticmethod
+    @transaction.atomic
+    def fill_from_waitlist(section_id):
+        """Enroll waiting students, oldest first, while the section has free seats."""
+        promoted = []
+        while True:
+            entry = (
+                SectionWaitlistEntry.objects.select_for_update(skip_locked=True)
+                .filter(section_id=section_id).order_by('created_at').first()
+            )
+            if entry is None:
+                return promoted
+            try:
+                with transaction.atomic():
+                    if not claim_seat(section_id):
+                        return promoted
+                    enrollment = StudentEnrollment(
+                        student_id=entry.student_id, section_id=section_id,
+                        organization_id=entry.organization_id, roll_number=entry.roll_number,
+                    )
+                    enrollment._seat_claimed = True
+                    enrollment.save()
+            except IntegrityError:
+                # Enrolled some other way meanwhile; the entry is stale
+                pass
+            else:
+                promoted.append(enrollment)
+            entry.delete()
+
+
+# Signal receivers keeping enrolled_count right for every other write
+
+def remember_section(sender, instance, **kwargs):
+    # DEFERRED: loaded by .only()/.defer() without section_id
+    instance._counted_section = instance.__dict__.get('section_id', DEFERRED)
+
+
+def section_before_save(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or getattr(instance, '_counted_section', None) is not DEFERRED:
+        return
+    if 'section_id' in instance.__dict__:
+        # Loaded or assigned since: the stored section is the one counted
+        instance._counted_section = (
+            StudentEnrollment.objects.filter(pk=instance.pk).values_list('section_id', flat=True).first()
+        )
+
+
+def enrollment_saved(sender, instance, created=False, raw=False, **kwargs):
+    claimed = getattr(instance, '_seat_claimed', False)
+    instance._seat_claimed = False
+    before = None if created else getattr(instance, '_counted_section', None)
+    remember_section(sender, instance)
+    if raw or before is DEFERRED or before == instance.section_id:
+        # A still deferred section_id was not saved, so it did not change
+        return
+    if before is not None:
+        release_seat(before)
+    if not claimed:
+        add_seat(instance.section_id)
+
+
+def enrollment_deleted(sender, instance, **kwargs):
+    release_seat(instance.section_id)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+    uid = 'academic.services.StudentEnrollment'
+    post_init.connect(remember_section, sender=StudentEnrollment, dispatch_uid=uid)
+    pre_save.connect(section_before_save, sender=StudentEnrollment, dispatch_uid=uid)
+    post_save.connect(enrollment_saved, sender=StudentEnrollment, dispatch_uid=uid)
+    post_delete.connect(enrollment_deleted, sender=StudentEnrollment, dispatch_uid=uid)
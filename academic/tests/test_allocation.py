@@ -0,0 +1,163 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from academic import allocation
+from academic.models import AcademicClass, Batch, Section, SectionWaitlistEntry, StudentEnrollment
+from academic.services import SectionFull
+from people.models import Person, Student
+
+User = get_user_model()
+
+
+class AllocationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Alloc Org', email='org@example.com', owner=self.admin)
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 7', level_order=7)
+        self.batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class,
+            start_date=date(2025, 4, 1), end_date=date(2026, 3, 31)
+        )
+        self.section_a = Section.objects.create(organization=self.org, batch=self.batch, name='A', capacity=6)
+        self.section_b = Section.objects.create(organization=self.org, batch=self.batch, name='B', capacity=6)
+
+    def students(self, count, gender, prefix):
+        return [
+            Student.objects.create(person=Person.objects.create(
+                organization=self.org, first_name=f'{prefix}{i}', last_name=f'{prefix}{i:02d}', gender=gender
+            ))
+            for i in range(count)
+        ]
+
+    def test_balances_gender_and_capacity(self):
+        girls = self.students(4, 'FEMALE', 'Girl')
+        boys = self.students(6, 'MALE', 'Boy')
+        diff = allocation.allocate(self.batch, [s.pk for s in girls + boys]).diff()
+        self.assertEqual(
+            [(row['allocated'], row['genders']) for row in diff['sections']],
+            [(5, {'FEMALE': 2, 'MALE': 3}), (5, {'FEMALE': 2, 'MALE': 3})]
+        )
+        self.assertEqual(diff['unallocated'], [])
+
+    def test_counts_existing_enrollments(self):
+        existing = self.students(3, 'MALE', 'Old')
+        for i, student in enumerate(existing):
+            StudentEnrollment.objects.create(
+                organization=self.org, student=student, section=self.section_a, roll_number=str(i + 7)
+            )
+        new = self.students(3, 'MALE', 'New')
+        diff = allocation.allocate(self.batch, [s.pk for s in new + existing[:1]]).diff()
+        section_a, section_b = diff['sections']
+        self.assertEqual((section_a['allocated'], section_b['allocated']), (0, 3))
+        self.assertEqual([row['roll_number'] for row in section_b['students']], ['1', '2', '3'])
+        self.assertEqual(diff['already_enrolled'], [existing[0].pk])
+
+    def test_roll_numbers_continue_and_are_deterministic(self):
+        StudentEnrollment.objects.create(
+            organization=self.org, student=self.students(1, 'FEMALE', 'Old')[0],
+            section=self.section_a, roll_number='12'
+        )
+        Section.objects.filter(pk=self.section_b.pk).update(capacity=0)
+        new = self.students(3, None, 'New')
+        first = allocation.allocate(self.batch, [s.pk for s in reversed(new)]).diff()
+        again = allocation.allocate(self.batch, [s.pk for s in new]).diff()
+        self.assertEqual(first, again)
+        self.assertEqual(
+            [(row['name'], row['roll_number']) for row in first['sections'][0]['students']],
+            [('New0 New00', '13'), ('New1 New01', '14'), ('New2 New02', '15')]
+        )
+
+    def test_commit(self):
+        students = self.students(7, 'FEMALE', 'S')
+        SectionWaitlistEntry.objects.create(organization=self.org, section=self.section_a, student=students[0])
+        planned = allocation.allocate(self.batch, [s.pk for s in students])
+        with CaptureQueriesContext(connection) as ctx:
+            result = allocation.commit(planned, user=self.admin)
+        self.assertLess(len(ctx.captured_queries), 30)
+
+        self.assertEqual(result, planned.diff())
+        for row in result['sections']:
+            section = Section.objects.get(pk=row['id'])
+            self.assertEqual(section.enrolled_count, row['enrolled_after'])
+            self.assertEqual(
+                sorted(section.enrollments.values_list('student_id', 'roll_number')),
+                sorted((s['student'], s['roll_number']) for s in row['students'])
+            )
+        self.assertFalse(SectionWaitlistEntry.objects.exists())
+        self.assertEqual(StudentEnrollment.history.filter(history_user=self.admin).count(), 7)
+
+    def test_not_enough_seats(self):
+        students = self.students(13, 'MALE', 'S')
+        planned = allocation.allocate(self.batch, [s.pk for s in students])
+        self.assertEqual(len(planned.diff()['unallocated']), 1)
+        with self.assertRaises(SectionFull):
+            allocation.commit(planned)
+        self.assertFalse(StudentEnrollment.objects.exists())
+
+    def test_unknown_students(self):
+        other = Organization.objects.create(org_name='Other', email='other@example.com', owner=self.admin)
+        stranger = Student.objects.create(person=Person.objects.create(organization=other, first_name='X', last_name='Y'))
+        with self.assertRaises(allocation.AllocationError):
+            allocation.allocate(self.batch, [stranger.pk])
+
+
+class AllocationEndpointTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Alloc Org', email='org@example.com', owner=self.admin)
+        self.admin.organization = self.org
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 7', level_order=7)
+        batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class,
+            start_date=date(2025, 4, 1), end_date=date(2026, 3, 31)
+        )
+        Section.objects.create(organization=self.org, batch=batch, name='A', capacity=6)
+        self.section_b = Section.objects.create(organization=self.org, batch=batch, name='B', capacity=6)
+        self.url = f'/api/v1/academic/batches/{batch.pk}/allocate/'
+        self.ids = [
+            str(Student.objects.create(person=Person.objects.create(
+                organization=self.org, first_name=f'S{i}', last_name=f'S{i:02d}', gender='MALE'
+            )).pk)
+            for i in range(4)
+        ]
+
+    def test_preview_then_commit(self):
+        preview = self.client.post(self.url, {'students': self.ids, 'dry_run': True}, format='json')
+        self.assertEqual(preview.status_code, status.HTTP_200_OK)
+        self.assertFalse(StudentEnrollment.objects.exists())
+
+        committed = self.client.post(self.url, {'students': self.ids}, format='json')
+        self.assertEqual(committed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(committed.data, preview.data)
+        self.assertEqual(StudentEnrollment.objects.count(), 4)
+
+    def test_subset_of_sections(self):
+        response = self.client.post(
+            self.url, {'students': self.ids, 'sections': [str(self.section_b.pk)], 'dry_run': True}, format='json'
+        )
+        self.assertEqual([row['name'] for row in response.data['sections']], ['B'])
+        self.assertEqual(response.data['students'], 4)
+
+    def test_bad_input(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'students': self.ids[:1] + ['x']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            self.url, {'students': self.ids, 'sections': [self.ids[0]]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_needs_an_org_admin(self):
+        member = User.objects.create_user(email='member@example.com', password='password123', organization=self.org)
+        self.client.force_authenticate(member)
+        response = self.client.post(self.url, {'students': self.ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,211 @@
+import json
+import os
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from academic.models import AcademicClass, Batch, Section, SectionWaitlistEntry, StudentEnrollment
+from academic.services import EnrollmentService, SectionFull, recount_enrollments
+from people.models import Person, Student
+
+User = get_user_model()
+
+
+class EnrollmentServiceTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(email='owner@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Seat Org', email='org@example.com', owner=owner)
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 4', level_order=4)
+        batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class,
+            start_date='2025-01-01', end_date='2025-12-31'
+        )
+        self.section = Section.objects.create(organization=self.org, batch=batch, name='A', capacity=2)
+        self.other = Section.objects.create(organization=self.org, batch=batch, name='B', capacity=2)
+
+    def student(self, name):
+        person = Person.objects.create(organization=self.org, first_name=name, last_name='Pupil')
+        return Student.objects.create(person=person)
+
+    def assert_counted(self):
+        for section in (self.section, self.other):
+            section.refresh_from_db()
+            self.assertEqual(section.enrolled_count, section.enrollments.count())
+
+    def test_capacity_is_enforced(self):
+        EnrollmentService.enroll(self.student('Ann'), self.section, self.org)
+        EnrollmentService.enroll(self.student('Bo'), self.section, self.org)
+        with self.assertRaises(SectionFull):
+            EnrollmentService.enroll(self.student('Cy'), self.section, self.org)
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.enrolled_count, 2)
+        self.assert_counted()
+
+    def test_waitlist_is_promoted_in_order(self):
+        for name in ('Ann', 'Bo'):
+            EnrollmentService.enroll(self.student(name), self.section, self.org)
+        cy, dee = self.student('Cy'), self.student('Dee')
+        _, first = EnrollmentService.enroll(cy, self.section, self.org, roll_number='7', waitlist=True)
+        _, second = EnrollmentService.enroll(dee, self.section, self.org, waitlist=True)
+        self.assertEqual([first, second], list(self.section.waitlist.all()))
+
+        promoted = EnrollmentService.withdraw(self.section.enrollments.first())
+        self.assertEqual([(e.student, e.roll_number) for e in promoted], [(cy, '7')])
+        self.assertEqual(list(self.section.waitlist.all()), [second])
+
+        self.section.capacity = 5
+        self.section.save()
+        self.assertEqual([e.student for e in EnrollmentService.fill_from_waitlist(self.section.pk)], [dee])
+        self.assertFalse(self.section.waitlist.exists())
+        self.assert_counted()
+
+    def test_move_frees_the_old_seat(self):
+        enrollment, _ = EnrollmentService.enroll(self.student('Ann'), self.section, self.org)
+        EnrollmentService.enroll(self.student('Bo'), self.other, self.org)
+        EnrollmentService.enroll(self.student('Cy'), self.other, self.org)
+        with self.assertRaises(SectionFull):
+            EnrollmentService.move(enrollment, self.other)
+
+        EnrollmentService.enroll(self.student('Dee'), self.section, self.org)
+        waiting = self.student('Eve')
+        EnrollmentService.enroll(waiting, self.section, self.org, waitlist=True)
+        self.other.capacity = 3
+        self.other.save()
+        EnrollmentService.move(enrollment, self.other)
+        self.assertTrue(self.section.enrollments.filter(student=waiting).exists())
+        self.assert_counted()
+
+    def test_counter_follows_writes_outside_the_service(self):
+        ann = self.student('Ann')
+        enrollment = StudentEnrollment.objects.create(organization=self.org, student=ann, section=self.section)
+        StudentEnrollment.objects.create(organization=self.org, student=self.student('Bo'), section=self.section)
+        enrollment.section = self.other
+        enrollment.save()
+        self.assert_counted()
+
+        ann.person.delete()
+        self.assert_counted()
+
+    def test_deferred_section_is_not_counted_twice(self):
+        enrollment = StudentEnrollment.objects.create(
+            organization=self.org, student=self.student('Ann'), section=self.section
+        )
+        loaded = StudentEnrollment.objects.only('id', 'roll_number').get(pk=enrollment.pk)
+        loaded.roll_number = '4'
+        loaded.save()
+        self.assert_counted()
+
+        moved = StudentEnrollment.objects.defer('section').get(pk=enrollment.pk)
+        moved.section = self.other
+        moved.save()
+        self.assert_counted()
+
+    def test_saving_a_stale_section_keeps_the_counter(self):
+        stale = Section.objects.get(pk=self.section.pk)
+        EnrollmentService.enroll(self.student('Ann'), self.section, self.org)
+        stale.room_number = '12'
+        stale.save()
+        self.assert_counted()
+
+    def test_recount_after_bulk_operations(self):
+        StudentEnrollment.objects.bulk_create([
+            StudentEnrollment(organization=self.org, student=self.student(f'S{i}'), section=self.other)
+            for i in range(2)
+        ])
+        self.assertEqual(Section.objects.get(pk=self.other.pk).enrolled_count, 0)
+        recount_enrollments(Section.objects.filter(organization=self.org))
+        self.assert_counted()
+
+
+class EnrollmentEndpointTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Seat Org', email='org@example.com', owner=self.admin)
+        self.admin.organization = self.org
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 4', level_order=4)
+        batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class,
+            start_date='2025-01-01', end_date='2025-12-31'
+        )
+        self.section = Section.objects.create(organization=self.org, batch=batch, name='A', capacity=2)
+        self.other = Section.objects.create(organization=self.org, batch=batch, name='B', capacity=2)
+        for name in ('Ann', 'Bo'):
+            EnrollmentService.enroll(self.student(name), self.section, self.org)
+
+    def student(self, name):
+        person = Person.objects.create(organization=self.org, first_name=name, last_name='Pupil')
+        return Student.objects.create(person=person)
+
+    def assert_counted(self):
+        for section in (self.section, self.other):
+            section.refresh_from_db()
+            self.assertEqual(section.enrolled_count, section.enrollments.count())
+
+    def test_full_section_answers_409(self):
+        student = self.student('Cy')
+        response = self.client.post('/api/v1/academic/enrollments/', {
+            'student': student.pk, 'section': self.section.pk
+        })
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.post(f'/api/v1/people/students/{student.person_id}/enroll/', {'section': self.section.pk})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assert_counted()
+
+    def test_create_claims_a_seat(self):
+        student = self.student('Cy')
+        response = self.client.post('/api/v1/academic/enrollments/', {
+            'student': student.pk, 'section': self.other.pk, 'roll_number': '9'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['section_name'], response.data['roll_number']), ('B', '9'))
+        self.assertEqual(response.data['organization'], self.org.pk)
+        self.assert_counted()
+
+    def test_waitlist_then_withdrawal(self):
+        student = self.student('Cy')
+        response = self.client.post(
+            f'/api/v1/people/students/{student.person_id}/enroll/', {'section': self.section.pk, 'waitlist': True}
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        waitlist = self.client.get(f'/api/v1/academic/sections/{self.section.pk}/waitlist/')
+        self.assertEqual([entry['student'] for entry in waitlist.data], [student.pk])
+
+        enrollment = self.section.enrollments.first()
+        response = self.client.delete(f'/api/v1/academic/enrollments/{enrollment.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(self.section.enrollments.filter(student=student).exists())
+        self.assertFalse(SectionWaitlistEntry.objects.exists())
+
+        section = self.client.get(f'/api/v1/academic/sections/{self.section.pk}/')
+        self.assertEqual(section.data['enrolled_count'], 2)
+
+    def test_capacity_increase_promotes_the_waitlist(self):
+        student = self.student('Cy')
+        EnrollmentService.enroll(student, self.section, self.org, waitlist=True)
+        response = self.client.patch(f'/api/v1/academic/sections/{self.section.pk}/', {'capacity': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.section.enrollments.filter(student=student).exists())
+        self.assert_counted()
+
+
+class StressEnrollmentsCommandTest(TransactionTestCase):
+    def test_concurrent_admissions_respect_capacity(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'stress.json')
+            call_command(
+                'stress_enrollments', capacity=5, students=12, withdrawals=3, threads=4,
+                output=output, stdout=open(os.devnull, 'w'),
+            )
+            with open(output) as fh:
+                report = json.load(fh)
+        self.assertEqual((report['enrolled'], report['waitlisted']), (5, 7))
+        self.assertEqual(report['promoted'], 3)
+        self.assertFalse(Organization.objects.exists())
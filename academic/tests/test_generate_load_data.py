@@ -0,0 +1,53 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from Org.models import Organization
+from academic.models import Section, StudentEnrollment, TeacherAssignment
+from people.models import Person, Student
+
+
+class GenerateLoadDataTest(TestCase):
+    options = dict(
+        orgs=2, users=3, persons=2, students=12, teachers=3, classes=2,
+        subjects=4, batches=2, sections=4, enrollments=20, seed=7,
+    )
+
+    def generate(self, **options):
+        call_command('generate_load_data', stdout=StringIO(), **{**self.options, **options})
+
+    def snapshot(self):
+        return (
+            sorted(Person.objects.values_list('id', 'first_name', 'last_name', 'organization_id')),
+            sorted(StudentEnrollment.objects.values_list('student_id', 'section_id', 'roll_number')),
+            sorted(TeacherAssignment.objects.values_list('teacher_id', 'subject_id', 'section_id')),
+        )
+
+    def test_counts(self):
+        self.generate()
+        self.assertEqual(Organization.objects.count(), 2)
+        self.assertEqual(Student.objects.count(), 24)
+        self.assertEqual(Person.objects.count(), 2 * (3 + 12 + 3 + 2))
+        self.assertEqual(Section.objects.count(), 8)
+        self.assertEqual(StudentEnrollment.objects.count(), 40)
+        # One assignment per section and subject of its class
+        self.assertEqual(TeacherAssignment.objects.count(), 2 * 4 * 2)
+
+        for org in Organization.objects.all():
+            self.assertEqual(org.owner.organization_id, org.id)
+            self.assertTrue(org.owner.is_system_admin)
+
+    def test_sections_are_not_filled_beyond_capacity(self):
+        self.generate(orgs=1, students=200, sections=2, enrollments=None)
+        sections = list(Section.objects.all())
+        self.assertEqual(StudentEnrollment.objects.count(), sum(section.capacity for section in sections))
+        for section in sections:
+            self.assertEqual(section.enrolled_count, section.capacity)
+
+    def test_same_seed_is_deterministic(self):
+        self.generate()
+        first = self.snapshot()
+        self.generate(flush=True)
+        self.assertEqual(self.snapshot(), first)
+
+        self.generate(flush=True, seed=8)
+        self.assertNotEqual(self.snapshot(), first)
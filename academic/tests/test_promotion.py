@@ -0,0 +1,179 @@
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org import stats
+from Org.models import Organization, TenantStatistic
+from Users.models import Role
+from academic import promotion
+from academic.models import AcademicClass, Batch, Section, SectionWaitlistEntry, StudentEnrollment
+from academic.services import SectionFull
+from people.models import Person, Student
+
+User = get_user_model()
+
+
+def enroll(section, students):
+    """Enroll `students` new students in `section`, numbered on from its current roll."""
+    start = section.enrollments.count()
+    created = []
+    for number in range(start + 1, start + students + 1):
+        person = Person.objects.create(
+            organization_id=section.organization_id, first_name=f'{section.name}{number}', last_name='Pupil'
+        )
+        student = Student.objects.create(person=person)
+        StudentEnrollment.objects.create(
+            organization_id=section.organization_id, student=student, section=section, roll_number=str(number)
+        )
+        created.append(student)
+    return created
+
+
+class PromotionServiceTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Promo Org', email='org@example.com', owner=self.admin)
+        class_5 = AcademicClass.objects.create(organization=self.org, name='Class 5', level_order=5)
+        self.class_6 = AcademicClass.objects.create(organization=self.org, name='Class 6', level_order=6)
+        self.batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=class_5,
+            start_date=date(2025, 4, 1), end_date=date(2026, 3, 31)
+        )
+        self.section_a = Section.objects.create(organization=self.org, batch=self.batch, name='A', capacity=10)
+        self.section_b = Section.objects.create(organization=self.org, batch=self.batch, name='B', capacity=10)
+        self.first_a = enroll(self.section_a, 3)
+        enroll(self.section_b, 2)
+
+    def test_dry_run_plans_without_writing(self):
+        plan = promotion.plan_promotion(self.batch)
+        diff = plan.diff()
+        self.assertEqual(diff['target_batch']['class'], self.class_6.pk)
+        self.assertTrue(diff['target_batch']['create'])
+        self.assertEqual(diff['target_batch']['start_date'], date(2026, 4, 1))
+        self.assertEqual([(s['target_name'], s['promote'], s['create']) for s in diff['sections']],
+                         [('A', 3, True), ('B', 2, True)])
+        self.assertEqual(diff['students'], 5)
+        self.assertEqual(Batch.objects.count(), 1)
+
+    def test_execute_creates_batch_sections_and_enrollments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = promotion.execute(promotion.plan_promotion(self.batch), user=self.admin, deactivate_source=True)
+        self.assertEqual([row['status'] for row in result['sections']], ['promoted', 'promoted'])
+
+        target = Batch.objects.get(academic_class=self.class_6)
+        section_a = target.sections.get(name='A')
+        self.assertEqual(section_a.enrolled_count, 3)
+        self.assertEqual(
+            set(section_a.enrollments.values_list('student_id', 'roll_number')),
+            {(student.pk, enrollment.roll_number) for student in self.first_a
+             for enrollment in student.enrollments.filter(section=self.section_a)}
+        )
+        history = StudentEnrollment.history.filter(section_id=section_a.pk)
+        self.assertEqual(history.count(), 3)
+        self.assertEqual({(h.history_type, h.history_user_id) for h in history}, {('+', self.admin.pk)})
+
+        self.batch.refresh_from_db()
+        self.assertFalse(self.batch.is_active)
+        stat = TenantStatistic.objects.get(organization=self.org, metric=stats.BATCH_ENROLLMENTS, key=str(target.pk))
+        self.assertEqual(stat.value, 5)
+
+    def test_rerun_only_adds_missing_students(self):
+        promotion.execute(promotion.plan_promotion(self.batch, exclude=[self.first_a[0].pk]))
+        plan = promotion.plan_promotion(self.batch)
+        self.assertEqual((plan.students, plan.diff()['already_enrolled']), (1, 4))
+        result = promotion.execute(plan)
+        self.assertEqual([row['status'] for row in result['sections']], ['promoted', 'unchanged'])
+        self.assertEqual(StudentEnrollment.objects.filter(section__batch__academic_class=self.class_6).count(), 5)
+
+    def test_capacity_of_existing_target_sections(self):
+        target = Batch.objects.create(
+            organization=self.org, name='2026', academic_class=self.class_6,
+            start_date=date(2026, 4, 1), end_date=date(2027, 3, 31)
+        )
+        Section.objects.create(organization=self.org, batch=target, name='A', capacity=2)
+        plan = promotion.plan_promotion(self.batch, target_batch=target)
+        self.assertEqual([move.target.name for move in plan.over_capacity], ['A'])
+        with self.assertRaises(SectionFull):
+            promotion.execute(plan)
+        self.assertFalse(StudentEnrollment.objects.filter(section__batch=target).exists())
+
+    def test_promoted_students_leave_the_target_waitlist(self):
+        target = Batch.objects.create(
+            organization=self.org, name='2026', academic_class=self.class_6,
+            start_date=date(2026, 4, 1), end_date=date(2027, 3, 31)
+        )
+        section = Section.objects.create(organization=self.org, batch=target, name='A', capacity=10)
+        waiting = SectionWaitlistEntry.objects.create(organization=self.org, section=section, student=self.first_a[0])
+        promotion.execute(promotion.plan_promotion(self.batch, target_batch=target))
+        self.assertFalse(SectionWaitlistEntry.objects.filter(pk=waiting.pk).exists())
+        self.assertEqual(section.enrollments.filter(student=self.first_a[0]).count(), 1)
+
+    def test_no_next_class(self):
+        top = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=self.class_6,
+            start_date=date(2025, 4, 1), end_date=date(2026, 3, 31)
+        )
+        with self.assertRaises(promotion.PromotionError):
+            promotion.plan_promotion(top)
+        with self.assertRaises(promotion.PromotionError):
+            promotion.plan_promotion(top, target_batch=self.batch)
+
+    def test_queries_do_not_grow_with_students(self):
+        def measure():
+            plan = promotion.plan_promotion(self.batch)
+            with CaptureQueriesContext(connection) as ctx:
+                promotion.execute(plan)
+            StudentEnrollment.objects.filter(section__batch__academic_class=self.class_6).delete()
+            Batch.objects.filter(academic_class=self.class_6).delete()
+            return len(ctx.captured_queries)
+
+        small = measure()
+        enroll(self.section_a, 20)
+        enroll(self.section_b, 20)
+        self.assertEqual(measure(), small)
+
+
+class PromotionEndpointTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Promo Org', email='org@example.com', owner=self.admin)
+        self.admin.organization = self.org
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+        class_5 = AcademicClass.objects.create(organization=self.org, name='Class 5', level_order=5)
+        AcademicClass.objects.create(organization=self.org, name='Class 6', level_order=6)
+        self.batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=class_5,
+            start_date=date(2025, 4, 1), end_date=date(2026, 3, 31)
+        )
+        section_a = Section.objects.create(organization=self.org, batch=self.batch, name='A', capacity=10)
+        Section.objects.create(organization=self.org, batch=self.batch, name='B', capacity=10)
+        enroll(section_a, 2)
+        self.url = f'/api/v1/academic/batches/{self.batch.pk}/promote/'
+
+    def test_dry_run_then_promote(self):
+        response = self.client.post(self.url, {'name': '2026', 'dry_run': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['students'], 2)
+        self.assertFalse(Batch.objects.filter(name='2026').exists())
+
+        response = self.client.post(self.url, {'name': '2026'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        target = Batch.objects.get(name='2026')
+        self.assertEqual(response.data['target_batch']['id'], target.pk)
+        self.assertEqual(target.sections.get(name='A').enrollments.count(), 2)
+
+    def test_bad_input(self):
+        response = self.client.post(self.url, {'start_date': 'soon'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'target_batch': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_needs_an_org_admin(self):
+        member = User.objects.create_user(email='member@example.com', password='password123', organization=self.org)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, status.HTTP_403_FORBIDDEN)
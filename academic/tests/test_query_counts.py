@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from academic.models import (
+    Faculty, AcademicClass, Course, Subject, Batch, Section, StudentEnrollment, TeacherAssignment
+)
+from people.models import Person, Student, Teacher
+
+User = get_user_model()
+
+
+class AcademicEagerLoadingTest(APITestCase):
+    """
+    Every academic list endpoint must run a constant number of queries,
+    however many rows (and related rows) the page holds.
+    """
+    endpoints = [
+        'faculties', 'classes', 'courses', 'subjects', 'batches',
+        'sections', 'enrollments', 'assignments',
+    ]
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="password")
+        self.org = Organization.objects.create(org_name="Org", owner=self.owner, email="org@example.com")
+        self.owner.organization = self.org
+        self.owner.save()
+        self.client.force_authenticate(user=self.owner)
+
+    def seed(self, count):
+        start = Faculty.objects.count()
+        for i in range(start, start + count):
+            faculty = Faculty.objects.create(organization=self.org, name=f"Faculty {i}")
+            ac_class = AcademicClass.objects.create(organization=self.org, name=f"Class {i}", level_order=i)
+            Course.objects.create(organization=self.org, name=f"Course {i}", academic_class=ac_class, faculty=faculty)
+            subject = Subject.objects.create(organization=self.org, name=f"Subject {i}", academic_class=ac_class)
+            batch = Batch.objects.create(
+                organization=self.org, name=f"Batch {i}", academic_class=ac_class,
+                start_date="2024-01-01", end_date="2024-12-31"
+            )
+            section = Section.objects.create(organization=self.org, batch=batch, name=f"Section {i}")
+
+            user = User.objects.create_user(email=f"student{i}@example.com", password="pwd", organization=self.org)
+            student_person = Person.objects.create(organization=self.org, user=user, first_name=f"S{i}", last_name="Student")
+            student = Student.objects.create(person=student_person, admission_number=f"ADM{i}")
+            StudentEnrollment.objects.create(organization=self.org, student=student, section=section, roll_number=str(i))
+
+            teacher_person = Person.objects.create(organization=self.org, first_name=f"T{i}", last_name="Teacher")
+            teacher = Teacher.objects.create(person=teacher_person, employee_id=f"EMP{i}")
+            TeacherAssignment.objects.create(organization=self.org, teacher=teacher, subject=subject, section=section)
+
+    def query_counts(self):
+        counts = {}
+        for endpoint in self.endpoints:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/api/v1/academic/{endpoint}/')
+            self.assertEqual(response.status_code, 200, endpoint)
+            counts[endpoint] = len(ctx.captured_queries)
+        return counts
+
+    def test_list_query_counts_are_constant(self):
+        self.seed(2)
+        small = self.query_counts()
+        self.seed(6)
+        large = self.query_counts()
+        self.assertEqual(small, large)
+
+    def test_nested_details_are_resolved(self):
+        self.seed(1)
+        response = self.client.get('/api/v1/academic/enrollments/')
+        row = response.data['results'][0]
+        self.assertEqual(row['student_details']['first_name'], 'S0')
+        self.assertEqual(row['student_details']['enrollment_summary'][0]['class'], 'Class 0')
+        self.assertEqual(row['batch_name'], 'Batch 0')
+
+        response = self.client.get('/api/v1/academic/assignments/?search=T0')
+        self.assertEqual(response.data['results'][0]['teacher_details']['full_name'], 'T0 Teacher')
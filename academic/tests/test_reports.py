@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from academic.models import AcademicClass, Batch, Section, StudentEnrollment, Subject, TeacherAssignment
+from academic.reports import academic_version, build_section_rosters, section_rosters
+from people.models import Guardian, Person, Student, Teacher
+
+User = get_user_model()
+
+
+class SectionRosterReportTest(APITestCase):
+    url = '/api/v1/academic/sections/roster-report/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(org_name='Report Org', email='org@example.com', owner=self.admin)
+        self.admin.organization = self.org
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+
+        self.ac_class = AcademicClass.objects.create(organization=self.org, name='Class 1', level_order=1)
+        AcademicClass.objects.create(organization=self.org, name='Class 2', level_order=2)
+        self.batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=self.ac_class,
+            start_date='2025-01-01', end_date='2025-12-31'
+        )
+        self.section = Section.objects.create(organization=self.org, batch=self.batch, name='A', capacity=4)
+        Section.objects.create(organization=self.org, batch=self.batch, name='B', capacity=6)
+        subject = Subject.objects.create(organization=self.org, name='Science', code='SCI', academic_class=self.ac_class)
+        teacher = Teacher.objects.create(
+            person=Person.objects.create(organization=self.org, first_name='Tara', last_name='Teach'),
+            employee_id='EMP7'
+        )
+        TeacherAssignment.objects.create(organization=self.org, teacher=teacher, subject=subject, section=self.section)
+
+    def enroll(self, name, roll, section=None):
+        student = Student.objects.create(
+            person=Person.objects.create(organization=self.org, first_name=name, last_name='Pupil')
+        )
+        StudentEnrollment.objects.create(
+            organization=self.org, student=student, section=section or self.section, roll_number=roll
+        )
+        return student
+
+    def test_report_contents(self):
+        first = self.enroll('Ada', '10')
+        self.enroll('Ben', '2')
+        self.enroll('Cy', None)
+        Guardian.objects.create(
+            student=first, occupation='Nurse',
+            person=Person.objects.create(organization=self.org, first_name='Gia', last_name='Pupil', phone_number='555')
+        )
+
+        report = build_section_rosters(self.org.pk)
+        section_a = report['sections'][0]
+        self.assertEqual(section_a['name'], 'A')
+        self.assertEqual((section_a['enrolled'], section_a['available']), (3, 1))
+        self.assertEqual([s['roll_number'] for s in section_a['students']], ['2', '10', None])
+        self.assertEqual(section_a['students'][1]['guardians'][0]['phone_number'], '555')
+        self.assertEqual(section_a['teachers'][0]['subject_code'], 'SCI')
+        self.assertEqual(report['sections'][1]['students'], [])
+
+        class_1, class_2 = report['classes']
+        self.assertEqual((class_1['sections'], class_1['capacity'], class_1['enrolled']), (2, 10, 3))
+        self.assertEqual(class_1['utilization'], 0.3)
+        self.assertEqual((class_2['sections'], class_2['utilization']), (0, None))
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.enroll('Ada', '1')
+        with CaptureQueriesContext(connection) as small:
+            build_section_rosters(self.org.pk)
+        for i in range(20):
+            student = self.enroll(f'S{i}', str(i + 2))
+            Guardian.objects.create(
+                student=student, person=Person.objects.create(organization=self.org, first_name=f'G{i}', last_name='Kin')
+            )
+        with CaptureQueriesContext(connection) as large:
+            build_section_rosters(self.org.pk)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertLessEqual(len(large.captured_queries), 5)
+
+    def test_cached_until_the_academic_version_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enroll('Ada', '1')
+        version, report = section_rosters(self.org.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(section_rosters(self.org.pk), (version, report))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enroll('Ben', '2')
+        self.assertNotEqual(academic_version(self.org.pk), version)
+        self.assertEqual(section_rosters(self.org.pk)[1]['sections'][0]['enrolled'], 2)
+
+    def test_endpoint_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['sections']), 2)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_endpoint_needs_an_org_admin(self):
+        member = User.objects.create_user(email='member@example.com', password='password123', organization=self.org)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -1,20 +1,47 @@
-from rest_framework import viewsets, permissions, filters
+import uuid
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from .models import (
     Faculty, AcademicClass, Course, Subject, 
     Batch, Section, StudentEnrollment, TeacherAssignment
 )
 from .serializers import (
     FacultySerializer, AcademicClassSerializer, CourseSerializer, 
-    SubjectSerializer, BatchSerializer, SectionSerializer, 
+    SubjectSerializer, BatchSerializer, SectionSerializer, SectionWaitlistEntrySerializer,
     StudentEnrollmentSerializer, TeacherAssignmentSerializer
 )
 from Org.permissions import IsOrganizationAdmin
 from Users.authentication import CsrfExemptSessionAuthentication
+from core.mixins import CompiledListMixin, ExportMixin, SparseFieldsetMixin
+from academic import allocation, promotion
+from academic.reports import section_rosters
+from academic.services import EnrollmentService
 
-class AcademicBaseViewSet(viewsets.ModelViewSet):
+def _uuid_list(value):
+    """A list of UUIDs from a request value; None when it is not one."""
+    if value in (None, ''):
+        return []
+    if not isinstance(value, list):
+        return None
+    try:
+        return [uuid.UUID(str(item)) for item in value]
+    except ValueError:
+        return None
+
+
+def _flag(value):
+    return value in (True, 'true', 'True', '1', 1)
+
+
+class AcademicBaseViewSet(SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     Base ViewSet for Academic models with multi-tenancy support.
+    Supports sparse responses via ?fields= and ?include=.
     """
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [CsrfExemptSessionAuthentication]
@@ -78,48 +105,183 @@ class SubjectViewSet(AcademicBaseViewSet):
 
 
 class BatchViewSet(AcademicBaseViewSet):
+    """
+    Extra actions:
+      POST /{id}/promote/  — Promote the batch's students to the next class
+                             (see academic.promotion)
+      POST /{id}/allocate/ — Allocate students to the batch's sections
+                             (see academic.allocation)
+    """
     queryset = Batch.objects.all()
     serializer_class = BatchSerializer
     filterset_fields = ['academic_class', 'is_active']
     search_fields = ['name']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'promote', 'allocate']:
             return [IsOrganizationAdmin()]
         return super().get_permissions()
 
+    @action(detail=True, methods=['post'])
+    def promote(self, request, pk=None):
+        """
+        Body (all optional):
+          { "target_batch": "<uuid>",        existing batch to promote into, or
+            "name": "2026", "start_date": "2026-04-14", "end_date": "2027-03-31",
+                                              the next class's batch to use or create
+            "exclude": ["<student uuid>"],   students held back
+            "deactivate_source": true,       mark this batch inactive afterwards
+            "dry_run": true }                only return the planned changes
+        """
+        batch = self.get_object()
+        data = request.data
+
+        target_batch = None
+        if data.get('target_batch'):
+            try:
+                target_batch = self.get_queryset().select_related('academic_class').get(pk=data['target_batch'])
+            except (Batch.DoesNotExist, ValidationError, ValueError):
+                return Response({'error': 'Target batch not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        dates = {}
+        for field in ('start_date', 'end_date'):
+            if not data.get(field):
+                continue
+            try:
+                dates[field] = parse_date(str(data[field]))
+            except ValueError:
+                dates[field] = None
+            if dates[field] is None:
+                return Response({'error': f'{field} must be a YYYY-MM-DD date.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        exclude = _uuid_list(data.get('exclude'))
+        if exclude is None:
+            return Response({'error': 'exclude must be a list of student ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        plan = promotion.plan_promotion(
+            batch, target_batch=target_batch, name=data.get('name'), exclude=exclude, **dates
+        )
+        if _flag(data.get('dry_run')):
+            return Response(plan.diff())
+        return Response(promotion.execute(
+            plan, user=request.user, deactivate_source=_flag(data.get('deactivate_source'))
+        ))
+
+    @action(detail=True, methods=['post'])
+    def allocate(self, request, pk=None):
+        """
+        Split students across the batch's sections by capacity and gender,
+        with new roll numbers (see academic.allocation).
+        Body: { "students": ["<student uuid>", ...],
+                "sections": ["<section uuid>", ...]  (optional, default all),
+                "dry_run": true }                     (preview only)
+        """
+        batch = self.get_object()
+        data = request.data
+
+        students = _uuid_list(data.get('students'))
+        if not students:
+            return Response({'error': 'students must be a list of student ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        section_ids = _uuid_list(data.get('sections'))
+        if section_ids is None:
+            return Response({'error': 'sections must be a list of section ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        sections = None
+        if section_ids:
+            sections = batch.sections.filter(pk__in=section_ids)
+            if sections.count() != len(set(section_ids)):
+                return Response({'error': 'Section not found in this batch.'}, status=status.HTTP_404_NOT_FOUND)
+
+        result = allocation.allocate(batch, students, sections=sections)
+        if _flag(data.get('dry_run')):
+            return Response(result.diff())
+        return Response(allocation.commit(result, user=request.user), status=status.HTTP_201_CREATED)
+
 
 class SectionViewSet(AcademicBaseViewSet):
+    """
+    Extra actions:
+      GET /roster-report/ — Every section's roster, teachers and class totals
+                            (see academic.reports); honours If-None-Match.
+      GET /{id}/waitlist/ — Students waiting for a seat, in the order they joined
+    """
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     filterset_fields = ['batch', 'batch__academic_class']
     search_fields = ['name', 'room_number']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'roster_report', 'waitlist']:
             return [IsOrganizationAdmin()]
         return super().get_permissions()
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            section = serializer.save()
+            # A larger capacity frees seats for the waitlist
+            EnrollmentService.fill_from_waitlist(section.pk)
+
+    @action(detail=True, methods=['get'])
+    def waitlist(self, request, pk=None):
+        entries = self.get_object().waitlist.select_related('student__person')
+        return Response(SectionWaitlistEntrySerializer(entries, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='roster-report')
+    def roster_report(self, request):
+        organization = request.user.organization
+        if organization is None:
+            return Response({'error': 'You do not belong to an organization.'}, status=status.HTTP_403_FORBIDDEN)
+
+        version, report = section_rosters(organization.pk)
+        etag = f'"{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(report)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
 
 class StudentEnrollmentViewSet(AcademicBaseViewSet):
+    """
+    Enrollments respect Section.capacity: creating one in a full section,
+    or moving one there, answers 409 (see academic.services).
+    """
     queryset = StudentEnrollment.objects.all()
     serializer_class = StudentEnrollmentSerializer
     filterset_fields = ['section', 'section__batch', 'student']
-    search_fields = ['student__first_name', 'student__last_name', 'roll_number']
+    search_fields = ['student__person__first_name', 'student__person__last_name', 'roll_number']
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsOrganizationAdmin()]
         return super().get_permissions()
 
+    def perform_create(self, serializer):
+        # The serializer enrolls through EnrollmentService
+        with transaction.atomic():
+            serializer.save(organization=self.request.user.organization)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            section = serializer.validated_data.get('section')
+            if section is not None:
+                EnrollmentService.move(serializer.instance, section)
+            serializer.save()
 
-class TeacherAssignmentViewSet(AcademicBaseViewSet):
+    def perform_destroy(self, instance):
+        EnrollmentService.withdraw(instance)
+
+
+class TeacherAssignmentViewSet(ExportMixin, AcademicBaseViewSet):
     queryset = TeacherAssignment.objects.all()
     serializer_class = TeacherAssignmentSerializer
     filterset_fields = ['teacher', 'subject', 'section']
-    search_fields = ['teacher__first_name', 'teacher__last_name', 'subject__name']
+    search_fields = ['teacher__person__first_name', 'teacher__person__last_name', 'subject__name']
+    export_name = 'assignments'
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'export']:
             return [IsOrganizationAdmin()]
         return super().get_permissions()
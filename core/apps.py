@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from core.profiling import install_execute_wrapper
+        connection_created.connect(install_execute_wrapper, dispatch_uid='core.profiling')
+
+        from core import metrics
+        metrics.connect_signals()
+
+        from core import images
+        images.connect_signals()
+
+        from core import storage
+        storage.connect_signals()
@@ -0,0 +1,121 @@
+import io
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, MethodNotAllowed, NotAuthenticated, Throttled
+from rest_framework.settings import api_settings
+
+from core.parsers import FastJSONParser
+from core.prefetch import apply_eager_loading, serializer_relation_fields
+from core.renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Native async counterpart of APIView for small I/O-bound endpoints.
+
+    DRF views are sync-only, so under ASGI each request to one is handed to
+    a worker thread. Handlers here are coroutines: they use the async ORM,
+    cache and auth APIs and only hop to a thread for work that has no async
+    API. Responses keep the DRF JSON contract (same renderer, status codes
+    and `error`/`detail` bodies); under WSGI Django runs them in an event
+    loop per request.
+
+    - `request.data` holds the parsed JSON or form body.
+    - With `authentication_required`, the session user is loaded with
+      `request.auser()` and anonymous requests get DRF's 403.
+    - `throttle_classes` are DRF throttles (DEFAULT_THROTTLE_CLASSES unless
+      set), checked after authentication; a refusal is a 429 with Retry-After.
+      Throttles with an `aallow_request()` coroutine (core.throttling) are
+      awaited; others run in a worker thread.
+    - Exceptions raised by the handler or these checks are answered through
+      DRF's EXCEPTION_HANDLER, as in APIView.
+    - Views are CSRF exempt, like CsrfExemptSessionAuthentication.
+    """
+    authentication_required = False
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    renderer_class = FastJSONRenderer
+    parser_class = FastJSONParser
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+        try:
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                raise MethodNotAllowed(request.method)
+            await self.initial(request)
+            return await handler(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(request, exc)
+
+    async def initial(self, request):
+        if self.authentication_required:
+            request.user = await request.auser()
+            if not request.user.is_authenticated:
+                raise NotAuthenticated()
+        await self.check_throttles(request)
+        request.data = self.parse(request)
+
+    def get_throttles(self):
+        return [throttle_class() for throttle_class in self.throttle_classes]
+
+    async def check_throttles(self, request):
+        waits = []
+        for throttle in self.get_throttles():
+            if hasattr(throttle, 'aallow_request'):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                # A DRF throttle without an async API
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                waits.append(throttle.wait())
+        if waits:
+            raise Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def handle_exception(self, request, exc):
+        """Answer an exception as DRF would, through EXCEPTION_HANDLER; re-raise the unhandled ones."""
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # Session authentication sends no WWW-Authenticate challenge: DRF answers 403
+            exc.status_code = status.HTTP_403_FORBIDDEN
+        context = {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': request}
+        response = api_settings.EXCEPTION_HANDLER(exc, context)
+        if response is None:
+            raise exc
+        headers = {name: value for name, value in response.items() if name.lower() != 'content-type'}
+        return self.respond(response.data, status=response.status_code, headers=headers or None)
+
+    def parse(self, request):
+        if request.method in ('GET', 'HEAD', 'OPTIONS', 'DELETE') or not request.body:
+            return {}
+        if request.content_type == 'application/json':
+            return self.parser_class().parse(
+                io.BytesIO(request.body), parser_context={'encoding': request.encoding or 'utf-8'}
+            )
+        return request.POST
+
+    def respond(self, data, status=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            self.renderer_class().render(data),
+            status=status,
+            content_type='application/json',
+            headers=headers,
+        )
+
+
+async def aget_for_serializer(queryset, serializer_class, **lookup):
+    """
+    Fetch one object with every relation `serializer_class` reads eager
+    loaded (see core.prefetch), so serializing it runs no queries. Lazy
+    relation access raises SynchronousOnlyOperation in async code.
+    """
+    paths = [path for paths in serializer_relation_fields(serializer_class).values() for path in paths]
+    return await apply_eager_loading(queryset, paths).aget(**lookup)
@@ -0,0 +1,78 @@
+"""
+Atomic multi-step cache operations, for the token buckets of
+core.throttling and the OTP limits of Users.services.
+
+On django-redis every operation is a Lua script, run from sync code
+through the django-redis connection and from async code through
+redis.asyncio, so coroutines never hand a script call to a worker thread.
+Other cache backends run the same steps in Python under a process lock;
+`alocked()` takes that lock from a coroutine without blocking its event
+loop.
+"""
+import asyncio
+import contextlib
+import threading
+from django.conf import settings
+from django.core.cache import caches
+
+
+class RedisScripts:
+    """
+    Registered `scripts` of one Redis server. `redis` is a sync client and
+    `async_redis` a factory of redis.asyncio clients; both are shared with
+    the cache alias by `for_cache()`.
+
+    An async client keeps its connections on the event loop that opened
+    them, so every thread keeps one client per running loop: one for the
+    lifetime of an ASGI worker, one per request for async views under WSGI.
+    """
+
+    def __init__(self, scripts, redis, async_redis):
+        self.scripts = {script: redis.register_script(script) for script in scripts}
+        self.async_redis = async_redis
+        self._local = threading.local()
+
+    @classmethod
+    def for_cache(cls, alias, scripts, redis=None, async_redis=None):
+        """The scripts on the Redis server of cache `alias`, or None for other cache backends."""
+        if redis is None:
+            if not type(caches[alias]).__module__.startswith('django_redis'):
+                return None
+            from django_redis import get_redis_connection
+            redis = get_redis_connection(alias)
+        return cls(scripts, redis, async_redis or (lambda: _async_client(alias)))
+
+    def run(self, script, keys, args):
+        return self.scripts[script](keys=keys, args=args)
+
+    async def arun(self, script, keys, args):
+        local = self._local
+        loop = asyncio.get_running_loop()
+        if getattr(local, 'loop', None) is not loop:
+            client = self.async_redis()
+            local.loop, local.scripts = loop, {script: client.register_script(script) for script in self.scripts}
+        return await local.scripts[script](keys=keys, args=args)
+
+
+def _async_client(alias):
+    import redis.asyncio
+
+    config = settings.CACHES[alias]
+    location = config['LOCATION']
+    if isinstance(location, str):
+        location = location.split(',')
+    # The primary comes first, as in django-redis
+    url = location[0]
+    options = config.get('OPTIONS', {}).get('CONNECTION_POOL_KWARGS', {})
+    return redis.asyncio.from_url(url, **options)
+
+
+@contextlib.asynccontextmanager
+async def alocked(lock):
+    """Hold a threading lock shared with sync callers; polled, so the event loop keeps running."""
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(0.001)
+    try:
+        yield
+    finally:
+        lock.release()
@@ -0,0 +1,76 @@
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+# Apps whose reads must never lag behind their writes; Users holds AUTH_USER_MODEL
+PRIMARY_ONLY_APPS = {'sessions', 'contenttypes', 'auth', 'Users'}
+
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    """
+    Routing decision for one request. `use_replica` is set for safe
+    methods; the first write pins the rest of the request to the primary.
+    """
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def start_routing(use_replica):
+    state = RoutingState(use_replica)
+    return state, _state.set(state)
+
+
+def end_routing(token):
+    _state.reset(token)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    """
+    Sends reads of safe-method requests to the `replica` alias and
+    everything else to `default`.
+
+    Reads go to the primary outside requests (Celery, management
+    commands), inside transactions, for PRIMARY_ONLY_APPS and for the rest
+    of a request once it has written anything. ReplicaRoutingMiddleware
+    sets up the per-request state.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not replica_configured():
+            return None
+        if not state.use_replica or state.wrote:
+            return PRIMARY
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,33 @@
+"""
+DRF exception handler (REST_FRAMEWORK['EXCEPTION_HANDLER']).
+
+Some refusals are raised below DRF, where an APIException would be an
+unhandled 500 for the admin or a plain Django view: the upload handler
+(core.uploads) raises Django's SuspiciousOperation subclasses, the password
+hashers (core.hashers) a plain HashingBusy. API views answer them with
+their own status code and a `detail` body, like any DRF error, plus
+Retry-After for those with a `wait`.
+"""
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+from core.hashers import HashingBusy
+from core.uploads import UnsupportedUploadType, UploadTooLarge
+
+# Exception class: (status code, error code)
+API_ERRORS = {
+    UploadTooLarge: (status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, 'upload_too_large'),
+    UnsupportedUploadType: (status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, 'unsupported_upload_type'),
+    HashingBusy: (status.HTTP_503_SERVICE_UNAVAILABLE, 'hashing_busy'),
+}
+
+
+def exception_handler(exc, context):
+    for exc_class, (status_code, code) in API_ERRORS.items():
+        if isinstance(exc, exc_class):
+            api_exc = APIException(str(exc), code=code)
+            api_exc.status_code = status_code
+            api_exc.wait = getattr(exc, 'wait', None)
+            exc = api_exc
+            break
+    return drf_exception_handler(exc, context)
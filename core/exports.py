@@ -0,0 +1,175 @@
+"""
+Tabular exports of a tenant's rosters.
+
+An export is a flat list of columns, each a header and a values() lookup
+path, read with values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE): rows
+come off a server-side cursor on PostgreSQL, a chunk at a time, as tuples,
+without building model instances or running serializers. Memory therefore
+stays constant however many rows a tenant has.
+
+- CSV is streamed to the client as rows are read (`stream_csv`).
+- XLSX needs openpyxl; the workbook is written in write-only mode to a
+  temporary file, which is then sent (`write_xlsx`).
+- With `?mode=background` the file is produced by the `export_rows` Celery
+  task and saved to the default storage; the client polls
+  /api/v1/exports/<task id>/ and downloads it from there. Exports are not
+  referenced by any row, so gc_media reclaims them after
+  MEDIA_GC_GRACE_SECONDS.
+
+Lookups that span a to-many relation (a student's enrollments) produce one
+row per related object, like a LEFT OUTER JOIN.
+
+Text that a spreadsheet would read as a formula (starting with =, +, -, @,
+a tab or a carriage return) is written with a leading apostrophe, so a
+user-entered name cannot run a formula when the file is opened. Plain
+numbers such as +977... phone numbers are left as they are.
+"""
+import csv
+import tempfile
+from collections import namedtuple
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+Export = namedtuple('Export', ['model', 'filters', 'ordering', 'columns'])
+
+EXPORTS = {
+    'persons': Export('people.Person', {}, ['last_name', 'first_name', 'id'], [
+        ('ID', 'id'),
+        ('First name', 'first_name'),
+        ('Last name', 'last_name'),
+        ('Email', 'email'),
+        ('Phone', 'phone_number'),
+        ('Gender', 'gender'),
+        ('Date of birth', 'date_of_birth'),
+        ('Address', 'address'),
+        ('Active', 'is_active'),
+        ('Claimed', 'is_claimed'),
+    ]),
+    'students': Export(
+        'people.Person', {'student_profile__isnull': False}, ['last_name', 'first_name', 'id'], [
+            ('ID', 'id'),
+            ('First name', 'first_name'),
+            ('Last name', 'last_name'),
+            ('Admission number', 'student_profile__admission_number'),
+            ('Class', 'student_profile__enrollments__section__batch__academic_class__name'),
+            ('Batch', 'student_profile__enrollments__section__batch__name'),
+            ('Section', 'student_profile__enrollments__section__name'),
+            ('Roll number', 'student_profile__enrollments__roll_number'),
+            ('Enrolled on', 'student_profile__enrollments__enrollment_date'),
+        ]
+    ),
+    'assignments': Export(
+        'academic.TeacherAssignment', {},
+        ['teacher__person__last_name', 'teacher__person__first_name', 'subject__name', 'id'], [
+            ('ID', 'id'),
+            ('Teacher first name', 'teacher__person__first_name'),
+            ('Teacher last name', 'teacher__person__last_name'),
+            ('Employee ID', 'teacher__employee_id'),
+            ('Subject', 'subject__name'),
+            ('Subject code', 'subject__code'),
+            ('Class', 'section__batch__academic_class__name'),
+            ('Batch', 'section__batch__name'),
+            ('Section', 'section__name'),
+        ]
+    ),
+}
+
+
+class Echo:
+    """Write target for csv.writer that hands each line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def filename(name, file_format):
+    return f'{name}.{file_format}'
+
+
+def rows(name, organization_id):
+    """Header followed by every row of export `name` for one organization."""
+    export = EXPORTS[name]
+    yield [header for header, _ in export.columns]
+    queryset = (
+        apps.get_model(export.model)._base_manager
+        .filter(organization_id=organization_id, **export.filters)
+        .order_by(*export.ordering)
+        .values_list(*[path for _, path in export.columns])
+    )
+    yield from queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _text(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not _is_number(value):
+        return "'" + value
+    return value
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _cell(value):
+    # Spreadsheet cells take numbers, dates and strings; UUIDs and the like become text
+    if value is None or isinstance(value, (bool, int, float)) or hasattr(value, 'isoformat'):
+        return value
+    return _text(str(value))
+
+
+def stream_csv(name, organization_id):
+    """Lines of CSV text, produced as rows are read."""
+    writer = csv.writer(Echo())
+    for row in rows(name, organization_id):
+        yield writer.writerow([_text(value) for value in row])
+
+
+def write_xlsx(name, organization_id, target):
+    if openpyxl is None:
+        raise RuntimeError('openpyxl is not installed.')
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(name)
+    for row in rows(name, organization_id):
+        sheet.append([_cell(value) for value in row])
+    workbook.save(target)
+
+
+def write_file(name, organization_id, file_format, target):
+    """Write the whole export to the binary file object `target`."""
+    if file_format == 'xlsx':
+        write_xlsx(name, organization_id, target)
+        return
+    for line in stream_csv(name, organization_id):
+        target.write(line.encode('utf-8'))
+
+
+def temporary_file(name, organization_id, file_format):
+    """The export in an anonymous temporary file, rewound; deleted once closed."""
+    target = tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR)
+    write_file(name, organization_id, file_format, target)
+    target.seek(0)
+    return target
+
+
+def store(name, organization_id, file_format):
+    """Write the export to the default storage; returns the stored name."""
+    with temporary_file(name, organization_id, file_format) as target:
+        return default_storage.save(f'exports/{filename(name, file_format)}', File(target))
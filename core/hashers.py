@@ -0,0 +1,154 @@
+"""
+Password hashers tuned from settings, with a bounded hashing pool.
+
+The hashers read their cost parameters (PASSWORD_PBKDF2_ITERATIONS,
+PASSWORD_ARGON2_*, PASSWORD_BCRYPT_ROUNDS) from settings on every use.
+Django's must_update() compares a stored hash against them, so raising
+or lowering a cost, or switching PASSWORD_HASHER_POLICY (sms/passwords.py),
+re-encodes each password transparently on its owner's next login.
+
+Hashing is CPU-bound by design: a few dozen concurrent logins can starve a
+worker of CPU for every other request it serves. All hashing in a process
+goes through one pool of PASSWORD_HASH_CONCURRENCY slots (default: the CPU
+count). At most PASSWORD_HASH_MAX_WAITING callers queue for a slot, each
+for up to PASSWORD_HASH_WAIT_TIMEOUT seconds; past that the login is
+refused with HashingBusy (a 503 with Retry-After from API views) instead
+of piling up.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from core import metrics
+
+
+class HashingBusy(Exception):
+    # A plain exception: hashers also run outside DRF (the admin,
+    # changepassword). API views answer it with a 503 (core.exceptions).
+    # Seconds, sent as Retry-After
+    wait = 1
+
+    def __init__(self, message='Too many sign-ins in progress, please retry shortly.'):
+        super().__init__(message)
+
+
+class HashingPool:
+    """
+    A counting semaphore with a bounded queue. Re-entrant per thread, since
+    a hasher's verify() calls its own encode().
+    """
+
+    def __init__(self, size, max_waiting, timeout):
+        self.size = size
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.waiting = 0
+
+    @contextmanager
+    def slot(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        # Fast path: a free slot needs no queueing
+        acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                if self.waiting >= self.max_waiting:
+                    metrics.password_hash_rejected('queue_full')
+                    raise HashingBusy()
+                self.waiting += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not acquired:
+                metrics.password_hash_rejected('timeout')
+                raise HashingBusy()
+
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                size = getattr(settings, 'PASSWORD_HASH_CONCURRENCY', None) or os.cpu_count() or 1
+                max_waiting = getattr(settings, 'PASSWORD_HASH_MAX_WAITING', None)
+                _pool = HashingPool(
+                    size,
+                    size * 4 if max_waiting is None else max_waiting,
+                    getattr(settings, 'PASSWORD_HASH_WAIT_TIMEOUT', 2.0),
+                )
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith('PASSWORD_HASH_'):
+        _pool = None
+
+
+class BoundedHasherMixin:
+    """Runs encode() and verify() inside a hashing_pool() slot."""
+
+    def encode(self, *args, **kwargs):
+        with hashing_pool().slot():
+            return super().encode(*args, **kwargs)
+
+    def verify(self, password, encoded):
+        with hashing_pool().slot():
+            return super().verify(password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        with hashing_pool().slot():
+            return super().harden_runtime(password, encoded)
+
+
+class PBKDF2PasswordHasher(BoundedHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or hashers.PBKDF2PasswordHasher.iterations
+
+
+class Argon2PasswordHasher(BoundedHasherMixin, hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_TIME_COST', None) or hashers.Argon2PasswordHasher.time_cost
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', None) or hashers.Argon2PasswordHasher.memory_cost
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', None) or hashers.Argon2PasswordHasher.parallelism
+
+
+class BCryptSHA256PasswordHasher(BoundedHasherMixin, hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return getattr(settings, 'PASSWORD_BCRYPT_ROUNDS', None) or hashers.BCryptSHA256PasswordHasher.rounds
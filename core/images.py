@@ -0,0 +1,208 @@
+"""
+Image pipeline for uploaded photos and logos.
+
+A save that sets a new image on a registered field (PIPELINES) queues
+core.tasks.process_image once the transaction commits. The task, off the
+request path:
+
+- validates the file: a decodable JPEG/PNG/WebP/GIF of at most
+  IMAGE_MAX_PIXELS pixels. Anything else is cleared from the field and
+  deleted from storage (left to `gc_media` with core.storage).
+- re-encodes it with EXIF orientation applied and all metadata (EXIF, GPS,
+  ICC, comments) dropped, downscaled to IMAGE_MAX_DIMENSION. Opaque images
+  become progressive JPEG, images with transparency PNG.
+- writes one WebP thumbnail per variant of the field.
+
+The field then points at the re-encoded file and `<field>_variants` holds
+{'source': <that file>, 'files': {<variant>: <file>}}. File names carry a
+digest of the re-encoded content, so running the task again for the same
+upload writes nothing new; `process_images` backfills existing rows.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from core.storage import refresh_references
+
+logger = logging.getLogger(__name__)
+
+# (width, height, fit): 'cover' crops to fill the box, 'contain' fits inside it
+AVATAR_VARIANTS = {
+    'small': (64, 64, 'cover'),
+    'medium': (256, 256, 'cover'),
+}
+LOGO_VARIANTS = {
+    'small': (64, 64, 'contain'),
+    'medium': (256, 256, 'contain'),
+}
+
+# model label -> {image field: variants}
+PIPELINES = {
+    'people.Person': {'photo': AVATAR_VARIANTS},
+    'Org.OrganizationProfile': {'logo': LOGO_VARIANTS},
+}
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Outcomes of process()
+PROCESSED = 'processed'
+UNCHANGED = 'unchanged'
+INVALID = 'invalid'
+SUPERSEDED = 'superseded'
+MISSING = 'missing'
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def variants_field(field_name):
+    return f'{field_name}_variants'
+
+
+def needs_processing(name, variants):
+    """True for a new upload, and for a cleared field whose variants remain."""
+    return (variants or {}).get('source') != (name or None)
+
+
+def queue_processing(sender, instance, raw=False, **kwargs):
+    """post_save receiver: queue the pipeline for fields holding a new upload."""
+    if raw or not getattr(settings, 'IMAGE_PROCESSING_ENABLED', True):
+        return
+    from core.tasks import process_image
+
+    for field_name in PIPELINES[sender._meta.label]:
+        name = getattr(instance, field_name).name
+        if needs_processing(name, getattr(instance, variants_field(field_name))):
+            transaction.on_commit(
+                lambda pk=instance.pk, field_name=field_name: process_image.delay(sender._meta.label, str(pk), field_name)
+            )
+
+
+def connect_signals():
+    from django.db.models.signals import post_save
+    for label in PIPELINES:
+        post_save.connect(queue_processing, sender=apps.get_model(label), dispatch_uid=f'core.images.{label}')
+
+
+def process(model_label, pk, field_name, force=False):
+    """Run the pipeline for one row; returns one of the outcome constants."""
+    model = apps.get_model(model_label)
+    variants_name = variants_field(field_name)
+    row = model._base_manager.filter(pk=pk).values(field_name, variants_name).first()
+    if row is None:
+        return MISSING
+    name, previous = row[field_name], row[variants_name] or {}
+    storage = model._meta.get_field(field_name).storage
+
+    if not name:
+        if previous and model._base_manager.filter(pk=pk, **{field_name: name}).update(**{variants_name: {}}):
+            for path in previous.get('files', {}).values():
+                storage.delete(path)
+        return MISSING
+
+    if not force and not needs_processing(name, previous) and all(
+        storage.exists(path) for path in previous.get('files', {}).values()
+    ):
+        return UNCHANGED
+
+    try:
+        with storage.open(name, 'rb') as fh:
+            image = load(fh.read())
+    except FileNotFoundError:
+        logger.warning('Image %s of %s %s is missing from storage', name, model_label, pk)
+        return MISSING
+    except InvalidImage as exc:
+        logger.warning('Rejected image %s of %s %s: %s', name, model_label, pk, exc)
+        if model._base_manager.filter(pk=pk, **{field_name: name}).update(**{field_name: '', variants_name: {}}):
+            storage.delete(name)
+        return INVALID
+
+    written = []
+
+    def write(path, content):
+        if not storage.exists(path):
+            path = storage.save(path, content)
+            written.append(path)
+        return path
+
+    directory = posixpath.dirname(name)
+    if previous.get('source') == name:
+        # Already re-encoded: only the variants are (re)built
+        new_name = name
+    else:
+        extension, body = encode_original(image)
+        stem = posixpath.splitext(posixpath.basename(name))[0]
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        new_name = write(f'{directory}/{stem}-{digest}.{extension}', ContentFile(body))
+
+    stem = posixpath.splitext(posixpath.basename(new_name))[0]
+    files = {
+        label: write(f'{directory}/variants/{stem}-{label}.webp', ContentFile(encode_variant(image, *spec)))
+        for label, spec in PIPELINES[model_label][field_name].items()
+    }
+
+    updated = model._base_manager.filter(pk=pk, **{field_name: name}).update(
+        **{field_name: new_name, variants_name: {'source': new_name, 'files': files}}
+    )
+    if not updated:
+        # A newer upload replaced the image meanwhile; its own task handles it
+        for path in written:
+            storage.delete(path)
+        return SUPERSEDED
+
+    refresh_references([new_name, *files.values()])
+    stale = set(previous.get('files', {}).values()) - set(files.values())
+    if name != new_name:
+        stale.add(name)
+    for path in stale:
+        storage.delete(path)
+    return PROCESSED
+
+
+def load(data):
+    max_pixels = getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000)
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in ALLOWED_FORMATS:
+            raise InvalidImage(f'unsupported format {image.format}')
+        if image.width * image.height > max_pixels:
+            raise InvalidImage(f'{image.width}x{image.height} exceeds {max_pixels} pixels')
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as exc:
+        raise InvalidImage(str(exc) or exc.__class__.__name__)
+
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    limit = getattr(settings, 'IMAGE_MAX_DIMENSION', 2048)
+    if max(image.size) > limit:
+        image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+    return image
+
+
+def encode_original(image):
+    """(extension, bytes) of the re-encoded image; saving it drops all metadata."""
+    out = io.BytesIO()
+    if image.mode == 'RGBA':
+        image.save(out, 'PNG', optimize=True)
+        return 'png', out.getvalue()
+    image.save(out, 'JPEG', quality=getattr(settings, 'IMAGE_JPEG_QUALITY', 85), optimize=True, progressive=True)
+    return 'jpg', out.getvalue()
+
+
+def encode_variant(image, width, height, fit):
+    if fit == 'cover':
+        variant = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    else:
+        variant = image.copy()
+        variant.thumbnail((width, height), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    variant.save(out, 'WEBP', quality=getattr(settings, 'IMAGE_VARIANT_QUALITY', 80), method=4)
+    return out.getvalue()
@@ -0,0 +1,165 @@
+import json
+import platform
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from Users.services import otp_service
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Run scripted request mixes against a (generated) tenant through the '
+        'Django test client and report latency percentiles, queries per '
+        'request and requests/second per scenario.'
+    )
+
+    scenarios = ('persons', 'enrollments', 'auth-me', 'login', 'login-otp')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--org', type=str, default=None,
+            help='UUID of the organization (default: the first generate_load_data tenant)'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument(
+            '--scenario', action='append', choices=self.scenarios, dest='selected',
+            help='Only run this scenario (repeatable)'
+        )
+        parser.add_argument('--password', default='password123', help='Password of the tenant users')
+        parser.add_argument('--output', default='benchmark-api.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        from Org.models import Organization
+        from academic.management.commands.generate_load_data import DOMAIN_SUFFIX
+
+        if options['org']:
+            org = Organization.objects.filter(id=options['org']).first()
+        else:
+            org = Organization.objects.filter(
+                domains__domain__endswith=f'.{DOMAIN_SUFFIX}'
+            ).order_by('domain_name').first()
+        if org is None:
+            raise CommandError('No organization to benchmark. Run generate_load_data or pass --org.')
+
+        self.org = org
+        self.password = options['password']
+        self.users = list(org.users.filter(is_active=True).order_by('email').values_list('email', flat=True))
+        if not self.users:
+            raise CommandError(f"Organization {org.id} has no users.")
+
+        # Allows the 'testserver' host and keeps OTP mail in memory.
+        try:
+            setup_test_environment()
+            owns_environment = True
+        except RuntimeError:
+            # Already inside a test run
+            owns_environment = False
+        try:
+            # One client firing hundreds of requests would measure the
+            # throttles' 429s rather than the views.
+            with override_settings(API_THROTTLE_ENABLED=False):
+                results = {
+                    name: self.run_scenario(name, options['warmup'], options['requests'])
+                    for name in options['selected'] or self.scenarios
+                }
+        finally:
+            if owns_environment:
+                teardown_test_environment()
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'organization': str(org.id),
+            'requests_per_scenario': options['requests'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(
+            f"{'scenario':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'rps':>8} {'errors':>7}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['queries_per_request']:>8.1f} {result['rps']:>8.1f} {result['errors']:>7}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_scenario(self, name, warmup, requests):
+        request = getattr(self, 'request_' + name.replace('-', '_'))
+        client = APIClient()
+        if name not in ('login', 'login-otp'):
+            client.force_login(self.org.owner)
+
+        for i in range(warmup):
+            request(client, i)
+
+        latencies = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for i in range(requests):
+            with ExitStack() as stack:
+                # Reads may be routed to a replica alias (core.db_router)
+                captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+                request_started = time.perf_counter()
+                response = request(client, i)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            queries += sum(len(ctx.captured_queries) for ctx in captured)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': requests,
+            'errors': errors,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_ms': sum(latencies) / requests,
+            'queries_per_request': queries / requests,
+            'rps': requests / elapsed,
+        }
+
+    def request_persons(self, client, i):
+        return client.get('/api/v1/people/persons/')
+
+    def request_enrollments(self, client, i):
+        return client.get('/api/v1/academic/enrollments/')
+
+    def request_auth_me(self, client, i):
+        return client.get('/api/v1/auth/me/')
+
+    def request_login(self, client, i):
+        email = self.users[i % len(self.users)]
+        return client.post('/api/v1/auth/login/', {'email': email, 'password': self.password}, format='json')
+
+    def request_login_otp(self, client, i):
+        # Issue the code the mailer would have delivered, then verify it.
+        # The cooldown and issue limits would throttle a benchmark loop.
+        email = self.users[i % len(self.users)]
+        with override_settings(OTP_RESEND_COOLDOWN=0, OTP_ISSUE_LIMIT_PER_SUBJECT=0, OTP_ISSUE_LIMIT_PER_IP=0,
+                               OTP_VERIFY_LIMIT_PER_IP=0):
+            otp = otp_service.issue('login', email).code
+            return client.post('/api/v1/auth/login/verify-otp/', {'email': email, 'otp': otp}, format='json')
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from core.management.commands.benchmark_api import percentile
+
+HOST = 'testserver'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the ASGI and WSGI request stacks on the async auth and lookup '
+        'endpoints at increasing concurrency. Requests go through the real '
+        'ASGIHandler/WSGIHandler and full middleware stack in-process: ASGI '
+        'keeps every request in flight on one event loop, WSGI serves them '
+        'from a pool of worker threads like gunicorn --threads.'
+    )
+
+    endpoints = ('auth-me', 'auth-roles', 'check-org', 'otp-generate')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--org', type=str, default=None,
+            help='UUID of the organization (default: the first generate_load_data tenant)'
+        )
+        parser.add_argument('--requests', type=int, default=400, help='Measured requests per run')
+        parser.add_argument(
+            '--concurrency', default='1,8,32,64',
+            help='Comma separated numbers of requests in flight'
+        )
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=None,
+            help='Worker threads of the WSGI stack (default: the concurrency of the run)'
+        )
+        parser.add_argument(
+            '--endpoint', action='append', choices=self.endpoints, dest='selected',
+            help='Only request this endpoint (repeatable; default: a round robin of all)'
+        )
+        parser.add_argument('--output', default='benchmark-asgi.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        from Org.models import Organization
+        from academic.management.commands.generate_load_data import DOMAIN_SUFFIX
+
+        if options['org']:
+            org = Organization.objects.filter(id=options['org']).first()
+        else:
+            org = Organization.objects.filter(
+                domains__domain__endswith=f'.{DOMAIN_SUFFIX}'
+            ).order_by('domain_name').first()
+        if org is None:
+            raise CommandError('No organization to benchmark. Run generate_load_data or pass --org.')
+        domain = org.domains.values_list('domain', flat=True).first() or org.domain_name
+
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma separated list of integers.')
+
+        # Allows the 'testserver' host and keeps OTP mail in memory.
+        try:
+            setup_test_environment()
+            owns_environment = True
+        except RuntimeError:
+            # Already inside a test run
+            owns_environment = False
+        try:
+            client = APIClient()
+            client.force_login(org.owner)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            self.requests = [
+                self.build_request(name, domain, session, i)
+                for i, name in enumerate(options['selected'] or self.endpoints)
+            ]
+
+            results = []
+            # otp-generate would otherwise measure the resend cooldown
+            with override_settings(OTP_RESEND_COOLDOWN=0, OTP_ISSUE_LIMIT_PER_SUBJECT=0, OTP_ISSUE_LIMIT_PER_IP=0):
+                for level in levels:
+                    threads = options['wsgi_threads'] or level
+                    results.append({
+                        'concurrency': level,
+                        'wsgi_threads': threads,
+                        'wsgi': self.run_wsgi(level, threads, options['requests']),
+                        'asgi': self.run_asgi(level, options['requests']),
+                    })
+        finally:
+            if owns_environment:
+                teardown_test_environment()
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'organization': str(org.id),
+            'endpoints': options['selected'] or list(self.endpoints),
+            'requests_per_run': options['requests'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(
+            f"{'concurrency':>11} {'stack':<5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rps':>8} {'errors':>7}"
+        )
+        for result in results:
+            for stack in ('wsgi', 'asgi'):
+                run = result[stack]
+                self.stdout.write(
+                    f"{result['concurrency']:>11} {stack:<5} {run['p50_ms']:>8.2f} {run['p95_ms']:>8.2f} "
+                    f"{run['p99_ms']:>8.2f} {run['rps']:>8.1f} {run['errors']:>7}"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def build_request(self, name, domain, session, i):
+        """(method, path, query string, JSON body, cookie header) of one endpoint."""
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+        if name == 'auth-me':
+            return 'GET', '/api/v1/auth/me/', '', b'', cookie
+        if name == 'auth-roles':
+            return 'GET', '/api/v1/auth/roles/', '', b'', ''
+        if name == 'check-org':
+            return 'GET', '/api/v1/orgs/check/', f'domain_name={domain}', b'', ''
+        body = json.dumps({'email': f'benchmark{i}@{domain}'}).encode()
+        return 'POST', '/api/v1/auth/otp/generate/', '', body, ''
+
+    def summarize(self, latencies, statuses, elapsed):
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': sum(1 for code in statuses if code >= 400),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_ms': sum(latencies) / len(latencies),
+            'rps': len(latencies) / elapsed,
+        }
+
+    def run_wsgi(self, concurrency, threads, requests):
+        handler = WSGIHandler()
+
+        def call(i):
+            method, path, query, body, cookie = self.requests[i % len(self.requests)]
+            environ = {
+                'REQUEST_METHOD': method,
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SCRIPT_NAME': '',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'REMOTE_ADDR': '127.0.0.1',
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': cookie,
+                'CONTENT_TYPE': 'application/json',
+                'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': BytesIO(body),
+                'wsgi.url_scheme': 'http',
+                'wsgi.errors': BytesIO(),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+                'wsgi.version': (1, 0),
+            }
+            status = []
+            started = time.perf_counter()
+            response = handler(environ, lambda code, headers: status.append(int(code.split()[0])))
+            try:
+                b''.join(response)
+            finally:
+                # Fires request_finished, as a WSGI server would
+                response.close()
+            return (time.perf_counter() - started) * 1000, status[0]
+
+        def worker(indexes):
+            try:
+                return [call(i) for i in indexes]
+            finally:
+                connections.close_all()
+
+        # `concurrency` clients, each sending its share back to back
+        shares = [range(c, requests, concurrency) for c in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(threads, concurrency)) as pool:
+            samples = [sample for share in pool.map(worker, shares) for sample in share]
+        elapsed = time.perf_counter() - started
+        return self.summarize([s[0] for s in samples], [s[1] for s in samples], elapsed)
+
+    def run_asgi(self, concurrency, requests):
+        handler = ASGIHandler()
+
+        async def call(i):
+            method, path, query, body, cookie = self.requests[i % len(self.requests)]
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': method,
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': [
+                    (b'host', HOST.encode()),
+                    (b'cookie', cookie.encode()),
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                ],
+                'client': ('127.0.0.1', 0),
+                'server': (HOST, 80),
+            }
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # The client never disconnects; Django cancels this wait
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return (time.perf_counter() - started) * 1000, status[0]
+
+        async def client(indexes):
+            return [await call(i) for i in indexes]
+
+        async def run():
+            shares = [range(c, requests, concurrency) for c in range(concurrency)]
+            return await asyncio.gather(*(client(share) for share in shares))
+
+        started = time.perf_counter()
+        samples = [sample for share in asyncio.run(run()) for sample in share]
+        elapsed = time.perf_counter() - started
+        return self.summarize([s[0] for s in samples], [s[1] for s in samples], elapsed)
@@ -0,0 +1,146 @@
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from core.hashers import (
+    Argon2PasswordHasher, BCryptSHA256PasswordHasher, HashingBusy, PBKDF2PasswordHasher, hashing_pool,
+)
+from core.management.commands.benchmark_api import percentile
+from sms.passwords import available
+
+PASSWORD = 'password123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure password verifications (the CPU cost of a login) per second '
+        'and per core for each hasher policy and cost, at increasing '
+        'concurrency, through the bounded hashing pool of core.hashers. '
+        'Use it to pick PASSWORD_HASHER_POLICY, the cost settings and '
+        'PASSWORD_HASH_CONCURRENCY for a worker size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy', action='append', choices=('pbkdf2', 'argon2', 'bcrypt'), dest='policies',
+            help='Hasher policy to measure (repeatable; default: every installed one)'
+        )
+        parser.add_argument(
+            '--pbkdf2-iterations', default='',
+            help='Comma separated PBKDF2 iteration counts (default: the configured count)'
+        )
+        parser.add_argument('--seconds', type=float, default=3.0, help='Duration of each run')
+        parser.add_argument(
+            '--concurrency', default=None,
+            help='Comma separated numbers of logins in flight (default: 1, cores and 4 x cores)'
+        )
+        parser.add_argument('--output', default='benchmark-logins.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        try:
+            levels = [int(level) for level in (options['concurrency'] or f'1,{cores},{cores * 4}').split(',')]
+            iterations = [int(count) for count in options['pbkdf2_iterations'].split(',') if count]
+        except ValueError:
+            raise CommandError('--concurrency and --pbkdf2-iterations must be comma separated integers.')
+
+        policies = options['policies'] or [policy for policy in ('pbkdf2', 'argon2', 'bcrypt') if available(policy)]
+        missing = [policy for policy in policies if not available(policy)]
+        if missing:
+            raise CommandError(f"Not installed: {', '.join(missing)}")
+
+        results = []
+        for label, hasher, overrides in self.variants(policies, iterations):
+            with override_settings(**overrides):
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+                for level in dict.fromkeys(levels):
+                    run = self.run(hasher, encoded, level, options['seconds'])
+                    run.update({'variant': label, 'concurrency': level, 'logins_per_core': run['logins_per_second'] / cores})
+                    results.append(run)
+
+        pool = hashing_pool()
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'cores': cores,
+            },
+            'pool': {'size': pool.size, 'max_waiting': pool.max_waiting, 'timeout': pool.timeout},
+            'seconds_per_run': options['seconds'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(
+            f"Pool: {pool.size} slots, {pool.max_waiting} waiting, {pool.timeout}s timeout; {cores} cores"
+        )
+        self.stdout.write(
+            f"{'variant':<24} {'concurrency':>11} {'logins/s':>9} {'per core':>9} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'refused':>8}"
+        )
+        for run in results:
+            self.stdout.write(
+                f"{run['variant']:<24} {run['concurrency']:>11} {run['logins_per_second']:>9.1f} "
+                f"{run['logins_per_core']:>9.1f} {run['p50_ms']:>8.1f} {run['p99_ms']:>8.1f} {run['refused']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def variants(self, policies, iterations):
+        """(label, hasher, settings overrides) of every hasher configuration to measure."""
+        for policy in policies:
+            if policy == 'pbkdf2':
+                for count in iterations or [PBKDF2PasswordHasher().iterations]:
+                    yield f'pbkdf2 {count}', PBKDF2PasswordHasher(), {'PASSWORD_PBKDF2_ITERATIONS': count}
+            elif policy == 'argon2':
+                hasher = Argon2PasswordHasher()
+                yield f'argon2 t={hasher.time_cost} m={hasher.memory_cost}', hasher, {}
+            else:
+                hasher = BCryptSHA256PasswordHasher()
+                yield f'bcrypt {hasher.rounds}', hasher, {}
+
+    def run(self, hasher, encoded, concurrency, seconds):
+        """`concurrency` clients verifying the password back to back for `seconds`."""
+        latencies = []
+        refused = [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def client():
+            samples, rejections = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if not hasher.verify(PASSWORD, encoded):
+                        raise CommandError('Password did not verify')
+                except HashingBusy:
+                    # A real client would back off for Retry-After
+                    rejections += 1
+                    time.sleep(0.01)
+                    continue
+                samples.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(samples)
+                refused[0] += rejections
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(client) for _ in range(concurrency)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'logins': len(latencies),
+            'refused': refused[0],
+            'logins_per_second': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50) or 0,
+            'p99_ms': percentile(latencies, 99) or 0,
+        }
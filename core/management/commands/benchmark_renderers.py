@@ -0,0 +1,86 @@
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare stdlib and fast JSON rendering of /api/v1/people/persons/ pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help='Rows per page (synthetic mode)')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--org', type=str, help='Render real person pages of this organization UUID instead')
+
+    def handle(self, *args, **options):
+        if options['org']:
+            page = self.real_page(options['org'], options['rows'])
+        else:
+            page = self.synthetic_page(options['rows'])
+
+        iterations = options['iterations']
+        results = {}
+        for label, renderer in (('stdlib', JSONRenderer()), ('fast', FastJSONRenderer())):
+            renderer.render(page)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                body = renderer.render(page)
+            results[label] = (time.perf_counter() - started) / iterations
+            self.stdout.write(f"{label:>6}: {results[label] * 1000:.3f} ms/page ({len(body)} bytes)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {results['stdlib'] / results['fast']:.2f}x over {len(page['results'])} rows"
+        ))
+
+    def synthetic_page(self, rows):
+        """A page shaped like PersonSerializer output for students."""
+        now = timezone.now()
+        results = []
+        for i in range(rows):
+            results.append({
+                'id': uuid.uuid4(),
+                'first_name': f'Student{i}',
+                'last_name': 'Sample',
+                'full_name': f'Student{i} Sample',
+                'email': f'student{i}@example.com',
+                'photo': None,
+                'photo_variants': None,
+                'phone_number': '9800000000',
+                'date_of_birth': (now - timedelta(days=5000 + i)).date(),
+                'gender': 'FEMALE',
+                'address': 'Kathmandu',
+                'is_claimed': True,
+                'is_active': True,
+                'user_id': str(uuid.uuid4()),
+                'user_email': f'student{i}@example.com',
+                'student_profile': {'admission_number': f'ADM-{i:05d}'},
+                'teacher_profile': None,
+                'employee_profile': None,
+                'guardian_profile': None,
+                'owner_profile': None,
+                'enrollment_summary': [{
+                    'enrollment_id': str(uuid.uuid4()),
+                    'section': 'A',
+                    'batch': '2024 Session',
+                    'class': 'Class 10',
+                    'roll_number': str(i),
+                }],
+                'created_at': now,
+                'updated_at': now,
+            })
+        return {'count': rows, 'next': None, 'previous': None, 'results': results}
+
+    def real_page(self, org_id, rows):
+        from people.models import Person
+        from people.serializers import PersonSerializer
+
+        persons = Person.objects.filter(organization_id=org_id).select_related('user')[:rows]
+        if not persons:
+            raise CommandError(f"No persons found for organization {org_id}.")
+        request = APIRequestFactory().get('/api/v1/people/persons/')
+        data = PersonSerializer(persons, many=True, context={'request': request}).data
+        return {'count': len(data), 'next': None, 'previous': None, 'results': data}
@@ -0,0 +1,70 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from core.serializers import CompiledSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF and compiled serialization time for list pages of an organization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('org_id', type=str, help='UUID of the organization')
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        from Users.models import CustomUser
+        from Users.serializers import UserDetailSerializer
+        from academic.models import StudentEnrollment
+        from academic.serializers import StudentEnrollmentSerializer
+        from people.models import Person
+        from people.serializers import PersonSerializer
+
+        org_id = options['org_id']
+        rows = options['rows']
+        if not Person.objects.filter(organization_id=org_id).exists():
+            raise CommandError(f"Organization {org_id} has no data to benchmark.")
+
+        profiles = (
+            'user', 'student_profile', 'teacher_profile', 'employee_profile',
+            'guardian_profile', 'owner_profile',
+        )
+        summary = 'student_profile__enrollments__section__batch__academic_class'
+        persons = Person.objects.filter(organization_id=org_id).select_related(*profiles).prefetch_related(summary)
+        pages = (
+            ('persons', PersonSerializer, persons),
+            ('students', PersonSerializer, persons.filter(student_profile__isnull=False)),
+            ('users', UserDetailSerializer, CustomUser.objects.filter(organization_id=org_id).select_related(
+                'organization', *[f'person_profile__{name}' for name in profiles[1:]]
+            ).prefetch_related('roles', f'person_profile__{summary}')),
+            ('enrollments', StudentEnrollmentSerializer, StudentEnrollment.objects.filter(
+                organization_id=org_id
+            ).select_related(
+                'section__batch', *[f'student__person__{name}' for name in profiles]
+            ).prefetch_related(f'student__person__{summary}')),
+        )
+        context = {'request': APIRequestFactory().get('/')}
+
+        for label, serializer_class, queryset in pages:
+            # Materialise the page and warm every relation cache so only
+            # serialization is measured.
+            instances = list(queryset[:rows])
+            if not instances:
+                self.stdout.write(f"{label:>12}: no rows, skipped")
+                continue
+            serializer_class(instances, many=True, context=context).data
+
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                serializer_class(instances, many=True, context=context).data
+            drf = (time.perf_counter() - started) / options['iterations']
+
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                CompiledSerializer(serializer_class(instances, many=True, context=context)).many(instances)
+            compiled = (time.perf_counter() - started) / options['iterations']
+
+            self.stdout.write(
+                f"{label:>12}: drf {drf * 1000:.2f} ms, compiled {compiled * 1000:.2f} ms "
+                f"({drf / compiled:.2f}x, {len(instances)} rows)"
+            )
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from core import storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete media files of the content-addressed storage that no row has '
+        'referenced for the grace period (MEDIA_GC_GRACE_SECONDS), and files '
+        'no row tracks at all. Each file is recounted under a row lock right '
+        'before it is deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=None,
+            help='Seconds a file must have been unreferenced (default: MEDIA_GC_GRACE_SECONDS)'
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Recompute every refcount from the database first, e.g. after bulk updates'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+
+    def handle(self, *args, **options):
+        if not storage.is_content_addressed(default_storage):
+            raise CommandError('The default storage is not core.storage.ContentAddressedStorage.')
+
+        if options['recount']:
+            corrected = storage.recount_references()
+            self.stdout.write(f'Recounted references: {corrected} files corrected')
+
+        grace = settings.MEDIA_GC_GRACE_SECONDS if options['grace'] is None else options['grace']
+        # Bytes left on disk by uploads whose transaction rolled back
+        if options['dry_run']:
+            untracked = storage.untracked_files(default_storage, grace)
+            self.stdout.write(f'Would adopt {len(untracked)} untracked files')
+        else:
+            adopted = storage.adopt_untracked(default_storage, grace)
+            self.stdout.write(f'Adopted {adopted} untracked files')
+
+        files, size = storage.collect_garbage(default_storage, grace, dry_run=options['dry_run'])
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {files} files ({size / 1024 / 1024:.1f} MB)'))
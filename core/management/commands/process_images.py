@@ -0,0 +1,49 @@
+from collections import Counter
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core import images
+from core.tasks import process_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the image pipeline (validate, re-encode, strip metadata, '
+        'thumbnails) over existing photos and logos. Rows already processed '
+        'are skipped unless --force is given, so it is safe to re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', choices=list(images.PIPELINES), dest='models',
+            help='Only process this model (repeatable; default: all)'
+        )
+        parser.add_argument('--organization', help='Only process rows of this organization UUID')
+        parser.add_argument('--force', action='store_true', help='Rebuild variants of processed images too')
+        parser.add_argument(
+            '--queue', action='store_true',
+            help='Queue a Celery task per image instead of processing in this process'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        outcomes = Counter()
+        for label in options['models'] or images.PIPELINES:
+            model = apps.get_model(label)
+            for field_name in images.PIPELINES[label]:
+                rows = model._base_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                if options['organization']:
+                    rows = rows.filter(organization_id=options['organization'])
+                rows = rows.values_list('pk', field_name, images.variants_field(field_name))
+
+                for pk, name, variants in rows.iterator(chunk_size=options['chunk_size']):
+                    if not options['force'] and not images.needs_processing(name, variants):
+                        outcomes[images.UNCHANGED] += 1
+                        continue
+                    if options['queue']:
+                        process_image.delay(label, str(pk), field_name, force=options['force'])
+                        outcomes['queued'] += 1
+                    else:
+                        outcomes[images.process(label, pk, field_name, force=options['force'])] += 1
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(outcomes.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Images: {summary}'))
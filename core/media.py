@@ -0,0 +1,198 @@
+"""
+Access-checked media delivery.
+
+Every file under MEDIA_URL goes through `media_view`, which checks once that
+the requesting user's organization owns a row naming the file (a person's
+photo, an organization logo or one of their variants) and then hands the
+transfer to the web server, so Python workers never stream file bytes:
+
+- 'nginx': `X-Accel-Redirect: <MEDIA_ACCEL_PREFIX><name>` (URL-quoted, as
+  are the X-Sendfile paths), served from an
+  internal location aliasing MEDIA_ROOT:
+
+      location /protected-media/ {
+          internal;
+          alias /srv/sms/media/;
+      }
+
+- 'apache': `X-Sendfile: <absolute path>` (mod_xsendfile or lighttpd);
+- 'django': the view reads the file itself. Development only.
+
+The web server answers range and conditional requests for the first two;
+the 'django' backend handles single byte ranges and If-None-Match /
+If-Modified-Since itself.
+
+Content-addressed names (core.storage) never change content, so they are
+sent with a one-year `immutable` Cache-Control; other names are
+revalidated on every use. Both are `private`: the response depends on who
+asks. Owners of a name are cached for MEDIA_OWNER_CACHE_SECONDS and
+forgotten whenever core.storage recounts the name's references.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+from core import storage
+
+BACKENDS = ('nginx', 'apache', 'django')
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})\.[0-9a-z]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def clean_name(path):
+    """Storage name for a URL path below MEDIA_URL, or None if it leaves MEDIA_ROOT."""
+    name = posixpath.normpath(path).lstrip('/')
+    if not name or name == '.' or name.startswith('..') or name.startswith('.incoming'):
+        return None
+    return name
+
+
+def content_digest(name):
+    match = HASHED_NAME.search(name)
+    return match.group(1) if match else None
+
+
+def owners_key(name):
+    return 'media:owners:' + hashlib.sha256(name.encode()).hexdigest()
+
+
+def owners(name):
+    """Ids of the organizations with a row naming `name`."""
+    key = owners_key(name)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    lookups = {}
+    for model, lookup in storage.file_references():
+        if any(field.name == 'organization' for field in model._meta.concrete_fields):
+            lookups[model] = lookups.get(model, Q()) | Q(**{lookup: name})
+    found = set()
+    for model, condition in lookups.items():
+        found.update(model._base_manager.filter(condition).values_list('organization_id', flat=True).distinct())
+    found = frozenset(found)
+    cache.set(key, found, timeout=settings.MEDIA_OWNER_CACHE_SECONDS)
+    return found
+
+
+def can_access(user, name):
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return user.organization_id is not None and user.organization_id in owners(name)
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, or None to send the
+    whole file (no header, several ranges or a syntax we don't serve).
+    """
+    match = RANGE.match(header or '')
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag is not None and (if_none_match.strip() == '*' or etag in if_none_match)
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def serve_directly(request, name, etag):
+    path = default_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('File not found.')
+
+    if not_modified(request, etag, stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    header = request.headers.get('Range')
+    if header and request.headers.get('If-Range') not in (None, etag, http_date(stat.st_mtime)):
+        header = None
+    try:
+        byte_range = parse_range(header, stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def serve(request, name):
+    """Response delivering `name` with the configured MEDIA_SERVE_BACKEND."""
+    backend = settings.MEDIA_SERVE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f'MEDIA_SERVE_BACKEND must be one of {", ".join(BACKENDS)}, not {backend!r}.')
+
+    digest = content_digest(name)
+    etag = f'"{digest}"' if digest else None
+    if backend == 'django':
+        response = serve_directly(request, name, etag)
+    else:
+        response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+        if backend == 'nginx':
+            # Header values are URIs: quoted, so spaces and non-ASCII names survive
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + name)
+        else:
+            response['X-Sendfile'] = quote(default_storage.path(name))
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if digest else REVALIDATE_CACHE_CONTROL
+    response['Vary'] = 'Cookie'
+    if etag:
+        response['ETag'] = etag
+    return response
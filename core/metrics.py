@@ -0,0 +1,253 @@
+"""
+Prometheus metrics for the API, cache, auth flows, password hashing, Celery and audit history.
+
+Metrics are exported by core.views.metrics_view at /metrics. When several
+worker processes serve the app (gunicorn or uvicorn workers), point
+PROMETHEUS_MULTIPROC_DIR at an empty directory shared by all of them
+before they start, wipe it on every deploy, and add to gunicorn.conf.py:
+
+    from core.metrics import child_exit
+
+prometheus_client is optional; without it every metric is a no-op and
+/metrics answers 503.
+"""
+import os
+import time
+from django.conf import settings
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - metrics are optional
+    prometheus_client = None
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(cls_name, *args, **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, cls_name)(*args, **kwargs)
+
+
+REQUEST_LATENCY = _metric(
+    'Histogram', 'http_request_duration_seconds', 'Request latency by URL name, method and status.',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = _metric('Counter', 'db_queries_total', 'Database queries run while serving requests.', ['view'])
+DB_TIME = _metric('Counter', 'db_query_seconds_total', 'Database time spent while serving requests.', ['view'])
+CACHE_REQUESTS = _metric(
+    'Counter', 'cache_requests_total', 'Cache lookups made while serving requests.', ['result']
+)
+OTP_ISSUED = _metric('Counter', 'otp_issued_total', 'One-time passwords issued.', ['flow'])
+OTP_VERIFIED = _metric('Counter', 'otp_verifications_total', 'One-time password checks.', ['flow', 'result'])
+OTP_REJECTED = _metric(
+    'Counter', 'otp_rejections_total', 'OTP requests refused by cooldown, rate limit or lockout.', ['flow', 'reason'],
+)
+PASSWORD_HASH_REJECTED = _metric(
+    'Counter', 'password_hash_rejections_total', 'Sign-ins refused because the hashing pool was full.', ['reason'],
+)
+TASK_RUNTIME = _metric(
+    'Histogram', 'celery_task_runtime_seconds', 'Celery task run time.', ['task', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+TASK_QUEUE_WAIT = _metric(
+    'Histogram', 'celery_task_queue_wait_seconds', 'Time between publishing a Celery task and its start.', ['task'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+HISTORY_WRITES = _metric(
+    'Counter', 'simple_history_records_total', 'Historical records written by simple_history.', ['model', 'type']
+)
+
+DB_POOL_SIZE = _metric(
+    'Gauge', 'db_pool_connections', 'Connections held by the pool.', ['alias'], multiprocess_mode='livesum'
+)
+DB_POOL_AVAILABLE = _metric(
+    'Gauge', 'db_pool_available_connections', 'Idle connections in the pool.', ['alias'], multiprocess_mode='livesum'
+)
+DB_POOL_WAITING = _metric(
+    'Gauge', 'db_pool_requests_waiting', 'Clients waiting for a pooled connection.', ['alias'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_REQUESTS = _metric('Counter', 'db_pool_requests_total', 'Connections requested from the pool.', ['alias'])
+DB_POOL_WAIT = _metric(
+    'Counter', 'db_pool_request_wait_seconds_total', 'Time clients waited for a pooled connection.', ['alias']
+)
+DB_POOL_ERRORS = _metric('Counter', 'db_pool_errors_total', 'Pool failures by kind.', ['alias', 'kind'])
+
+HISTORY_TYPES = {'+': 'created', '~': 'changed', '-': 'deleted'}
+
+
+def observe_request(view, method, status, seconds, profile):
+    """Record one served request; called by RequestProfilingMiddleware."""
+    view = view or 'unresolved'
+    REQUEST_LATENCY.labels(view, method, str(status)).observe(seconds)
+    if profile.db_queries:
+        DB_QUERIES.labels(view).inc(profile.db_queries)
+        DB_TIME.labels(view).inc(profile.db_time)
+    if profile.cache_hits:
+        CACHE_REQUESTS.labels('hit').inc(profile.cache_hits)
+    if profile.cache_misses:
+        CACHE_REQUESTS.labels('miss').inc(profile.cache_misses)
+    observe_db_pools()
+
+
+_pools_observed_at = 0.0
+
+
+def observe_db_pools(interval=1.0):
+    """
+    Copy psycopg pool statistics into the pool metrics, at most once per
+    `interval` seconds per process. Counters are drained with pop_stats()
+    so each process only reports what happened since its last call.
+    """
+    global _pools_observed_at
+    if not _pooled_aliases():
+        return
+    now = time.monotonic()
+    if now - _pools_observed_at < interval:
+        return
+    _pools_observed_at = now
+
+    from django.db import connections
+    for alias in _pooled_aliases():
+        pool = connections[alias]._connection_pools.get(alias)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        DB_POOL_SIZE.labels(alias).set(stats.get('pool_size', 0))
+        DB_POOL_AVAILABLE.labels(alias).set(stats.get('pool_available', 0))
+        DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        DB_POOL_REQUESTS.labels(alias).inc(stats.get('requests_num', 0))
+        DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        for kind in ('requests_errors', 'connections_errors', 'connections_lost', 'returns_bad'):
+            if stats.get(kind):
+                DB_POOL_ERRORS.labels(alias, kind).inc(stats[kind])
+
+
+_pooled = None
+
+
+def _pooled_aliases():
+    global _pooled
+    if _pooled is None:
+        _pooled = [
+            alias for alias, database in settings.DATABASES.items()
+            if database.get('OPTIONS', {}).get('pool')
+        ]
+    return _pooled
+
+
+def otp_issued(flow):
+    OTP_ISSUED.labels(flow).inc()
+
+
+def otp_verified(flow, success):
+    OTP_VERIFIED.labels(flow, 'success' if success else 'failure').inc()
+
+
+def otp_rejected(flow, reason):
+    OTP_REJECTED.labels(flow, reason).inc()
+
+
+def password_hash_rejected(reason):
+    PASSWORD_HASH_REJECTED.labels(reason).inc()
+
+
+# Signal receivers
+
+def history_record_created(sender, instance, history_instance, **kwargs):
+    HISTORY_WRITES.labels(instance._meta.label, HISTORY_TYPES.get(history_instance.history_type, 'other')).inc()
+
+
+_task_started = {}
+
+
+def task_published(headers=None, **kwargs):
+    if headers is not None:
+        headers['published_at'] = time.time()
+
+
+def task_started(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(0.0, time.time() - published_at))
+
+
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+    observe_db_pools()
+
+
+def connect_signals():
+    from simple_history.signals import post_create_historical_record
+    post_create_historical_record.connect(history_record_created, dispatch_uid='core.metrics.history')
+    try:
+        from celery import signals
+    except ImportError:  # pragma: no cover
+        return
+    signals.before_task_publish.connect(task_published, dispatch_uid='core.metrics.publish', weak=False)
+    signals.task_prerun.connect(task_started, dispatch_uid='core.metrics.prerun', weak=False)
+    signals.task_postrun.connect(task_finished, dispatch_uid='core.metrics.postrun', weak=False)
+
+
+class CeleryQueueCollector:
+    """Reads the depth of METRICS_CELERY_QUEUES from the broker at scrape time."""
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+        from sms.celery import app
+
+        gauge = GaugeMetricFamily('celery_queue_depth', 'Messages waiting in a Celery queue.', labels=['queue'])
+        try:
+            with app.connection_for_read() as conn:
+                conn.ensure_connection(max_retries=1)
+                channel = conn.default_channel
+                for queue in settings.METRICS_CELERY_QUEUES:
+                    _, depth, _ = channel.queue_declare(queue=queue, passive=True)
+                    gauge.add_metric([queue], depth)
+        except Exception:
+            # An unreachable broker must not break the scrape.
+            return
+        yield gauge
+
+
+def render():
+    """Return (body, content_type) of the current metrics."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    body = generate_latest(registry)
+
+    if getattr(settings, 'METRICS_CELERY_QUEUES', None):
+        queues = CollectorRegistry()
+        queues.register(CeleryQueueCollector())
+        body += generate_latest(queues)
+    return body, CONTENT_TYPE_LATEST
+
+
+def child_exit(server, worker):
+    """gunicorn hook: drop live gauges of a dead worker from the shared store."""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,167 @@
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from core import metrics
+from core.db_router import end_routing, replica_configured, start_routing
+from core.profiling import end_profile, instrument_cache, start_profile
+
+logger = logging.getLogger('core.profiling')
+
+
+class RequestProfilingMiddleware:
+    """
+    Records, per request, the DB query count and time, serializer/render
+    time, cache hits and misses and the resolved view name.
+
+    - Adds a `Server-Timing` header (REQUEST_PROFILING_SERVER_TIMING).
+    - Logs one JSON line per request to the 'core.profiling' logger.
+    - Requests slower than SLOW_REQUEST_MS, or running a query slower than
+      SLOW_QUERY_MS, are logged as warnings with their query fingerprints.
+    - Feeds the request, DB and cache metrics of core.metrics.
+
+    Should be the first middleware so the total covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        self.server_timing = getattr(settings, 'REQUEST_PROFILING_SERVER_TIMING', True)
+        self.slow_request = getattr(settings, 'SLOW_REQUEST_MS', 500) / 1000
+        self.slow_query = getattr(settings, 'SLOW_QUERY_MS', 100) / 1000
+        self.cache_aliases = list(settings.CACHES)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_profile(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_profile(token)
+        return self.finish(request, response, profile)
+
+    def start(self):
+        for alias in self.cache_aliases:
+            instrument_cache(caches[alias])
+        return start_profile()
+
+    def finish(self, request, response, profile):
+        elapsed = profile.elapsed
+        match = getattr(request, 'resolver_match', None)
+        profile.view_name = match.view_name if match else None
+        metrics.observe_request(profile.view_name, request.method, response.status_code, elapsed, profile)
+
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(profile, elapsed)
+
+        slow = elapsed >= self.slow_request or any(
+            seconds >= self.slow_query for _, seconds in profile.queries
+        )
+        level = logging.WARNING if slow else logging.INFO
+        if logger.isEnabledFor(level):
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'view': profile.view_name,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'db_queries': profile.db_queries,
+                'db_ms': round(profile.db_time * 1000, 2),
+                'cache_hits': profile.cache_hits,
+                'cache_misses': profile.cache_misses,
+            }
+            for name, seconds in profile.sections.items():
+                record[f'{name}_ms'] = round(seconds * 1000, 2)
+            if slow:
+                record['slow_queries'] = [
+                    {'fingerprint': sql, 'count': count, 'ms': round(total * 1000, 2)}
+                    for sql, count, total in profile.fingerprints(limit=5)
+                ]
+            logger.log(level, json.dumps(record), extra={'profile': record})
+        return response
+
+    @staticmethod
+    def server_timing_header(profile, elapsed):
+        metrics = [f'db;dur={profile.db_time * 1000:.1f};desc="{profile.db_queries} queries"']
+        metrics += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in profile.sections.items()]
+        if profile.cache_hits or profile.cache_misses:
+            metrics.append(f'cache;desc="{profile.cache_hits} hits, {profile.cache_misses} misses"')
+        metrics.append(f'total;dur={elapsed * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets core.db_router.ReplicaRouter send the reads of GET/HEAD/OPTIONS
+    requests to the `replica` database. A request that writes is pinned to
+    the primary from that point on, and with
+    REPLICA_READ_YOUR_WRITES_SECONDS > 0 the session that wrote keeps
+    reading from the primary for that long, hiding replication lag.
+
+    Must come after SessionMiddleware. Unused without a `replica` database.
+    """
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    session_key = '_read_primary_until'
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.window = getattr(settings, 'REPLICA_READ_YOUR_WRITES_SECONDS', 0)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = start_routing(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            end_routing(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state, token = start_routing(await sync_to_async(self.use_replica)(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_routing(token)
+        await sync_to_async(self.finish)(request, state)
+        return response
+
+    def use_replica(self, request):
+        if request.method not in self.safe_methods:
+            return False
+        session = getattr(request, 'session', None)
+        if self.window and session is not None and session.get(self.session_key, 0) > time.time():
+            return False
+        return True
+
+    def finish(self, request, state):
+        session = getattr(request, 'session', None)
+        if state.wrote and self.window and session is not None:
+            session[self.session_key] = time.time() + self.window
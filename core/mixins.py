@@ -1,4 +1,13 @@
+from django.http import FileResponse, StreamingHttpResponse
+from rest_framework import permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from Org.models import OrganizationAdmin
+from core import exports
+from core.prefetch import apply_eager_loading, serializer_relation_fields
+from core.profiling import profile_section
+from core.serializers import CompiledSerializer
 
 class TenantSafeQuerySetMixin:
     """
@@ -21,3 +30,188 @@ class TenantSafeQuerySetMixin:
         # Filter the queryset by these organizations
         # Assumes the model has an 'organization' field (TenantModel)
         return queryset.filter(organization_id__in=admin_org_ids)
+
+
+class CompiledListMixin:
+    """
+    Mixin for ViewSets whose list action should render rows through a
+    CompiledSerializer. The serializer returned by get_serializer() is still
+    built (so context and field selection behave as usual) but never walks
+    the per-row DRF field machinery; the payload is identical.
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        with profile_section('serialize'):
+            serializer = self.get_serializer(rows, many=True)
+            data = CompiledSerializer(serializer).many(rows)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for ViewSets adding `?fields=` and `?include=` to read requests.
+
+    - `?fields=id,first_name` returns only the listed top-level fields.
+    - `?include=student_profile` keeps only the listed relation fields;
+      a bare `?include=` drops all of them.
+    - Unknown names are a 400 listing the valid ones.
+
+    Relation fields and the paths they read come from the serializer
+    (core.prefetch.serializer_relation_fields, with Meta.relation_paths for
+    method fields and properties). Only the relations of selected fields
+    are select_related or prefetched, so an unselected field costs no
+    queries at all. When `?fields=` is given the rows are also loaded with
+    only() the columns the selected fields read; `field_dependencies` lists
+    those columns for fields without a model `source` (e.g.
+    SerializerMethodFields).
+    """
+    field_dependencies = {}
+
+    def get_relation_fields(self):
+        return serializer_relation_fields(self.get_serializer_class())
+
+    def _sparse_param(self, name):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        if name not in request.query_params:
+            return None
+        return {value.strip() for value in request.query_params[name].split(',') if value.strip()}
+
+    def is_field_selected(self, name):
+        fields = self._sparse_param('fields')
+        if fields is not None and name not in fields:
+            return False
+        include = self._sparse_param('include')
+        if include is not None and name in self.get_relation_fields() and name not in include:
+            return False
+        return True
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self._sparse_param('fields') is None and self._sparse_param('include') is None:
+            return serializer
+
+        target = getattr(serializer, 'child', serializer)
+        for name in list(target.fields):
+            if not self.is_field_selected(name):
+                target.fields.pop(name)
+        return serializer
+
+    def check_sparse_params(self):
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        valid = {
+            'fields': [name for name, field in serializer.fields.items() if not field.write_only],
+            'include': list(self.get_relation_fields()),
+        }
+        errors = {}
+        for param, names in valid.items():
+            unknown = (self._sparse_param(param) or set()) - set(names)
+            if unknown:
+                errors[param] = [
+                    f"Unknown names: {', '.join(sorted(unknown))}. Valid names: {', '.join(names) or 'none'}."
+                ]
+        if errors:
+            raise ValidationError(errors)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        self.check_sparse_params()
+
+        paths = [
+            path
+            for name, relation_paths in self.get_relation_fields().items()
+            if self.is_field_selected(name)
+            for path in relation_paths
+        ]
+        queryset = apply_eager_loading(queryset, paths)
+
+        if self._sparse_param('fields') is not None:
+            only = self.get_only_fields(queryset.model, paths)
+            if only:
+                queryset = queryset.only(*only)
+        return queryset
+
+    def get_only_fields(self, model, paths):
+        """
+        Columns needed by the selected fields, or None when a selected field
+        reads something we cannot see (then every column is loaded).
+        """
+        concrete = {field.name for field in model._meta.concrete_fields}
+        relation_fields = self.get_relation_fields()
+        only = {model._meta.pk.name}
+        if 'organization' in concrete:
+            only.add('organization')
+
+        for field in self.get_serializer().fields.values():
+            if field.write_only:
+                continue
+            if field.field_name in self.field_dependencies:
+                only.update(self.field_dependencies[field.field_name])
+            elif field.source != '*' and field.source_attrs[0] in concrete:
+                only.add(field.source_attrs[0])
+            elif field.field_name not in relation_fields:
+                return None
+
+        for path in paths:
+            head = path.split('__', 1)[0]
+            if head in concrete:
+                only.add(head)
+        return sorted(only)
+
+
+class ExportMixin:
+    """
+    Mixin for ViewSets adding `GET export/` for the organization's
+    `export_name` export of core.exports.
+
+    - `?type=csv` (default) streams the rows as they are read;
+      `?type=xlsx` sends a workbook (needs openpyxl).
+    - `?mode=background` queues the export on Celery and answers 202 with
+      a task id to poll at /api/v1/exports/<task id>/.
+    """
+    export_name = None
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        organization = request.user.organization
+        if organization is None:
+            return Response({'error': 'You do not belong to an organization.'}, status=status.HTTP_403_FORBIDDEN)
+
+        file_format = request.query_params.get('type', 'csv')
+        if file_format not in exports.FORMATS:
+            return Response(
+                {'error': f'type must be one of {", ".join(exports.FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if file_format == 'xlsx' and exports.openpyxl is None:
+            return Response({'error': 'openpyxl is not installed.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if request.query_params.get('mode') == 'background':
+            from core.tasks import export_rows
+
+            task = export_rows.delay(self.export_name, str(organization.pk), file_format)
+            return Response(
+                {'task_id': task.id, 'status_url': f'/api/v1/exports/{task.id}/'},
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        filename = exports.filename(self.export_name, file_format)
+        if file_format == 'csv':
+            response = StreamingHttpResponse(
+                exports.stream_csv(self.export_name, organization.pk), content_type=exports.FORMATS['csv']
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        return FileResponse(
+            exports.temporary_file(self.export_name, organization.pk, file_format),
+            as_attachment=True, filename=filename, content_type=exports.FORMATS[file_format]
+        )
@@ -46,3 +46,18 @@ class TenantModel(TimeStampedModel):
 
     class Meta:
         abstract = True
+
+
+class StoredFile(TimeStampedModel):
+    """
+    A file in core.storage.ContentAddressedStorage and how many database
+    values name it. Unreferenced files are reclaimed by `gc_media`.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    # When refcount last dropped to zero (or the upload was not yet saved on a row)
+    orphaned_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
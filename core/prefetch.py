@@ -0,0 +1,140 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+
+def _resolve_path(model, path):
+    """
+    Walk a `__` separated relation path from `model`.
+    Returns a list of (name, is_multi_valued, related_model) hops.
+    """
+    hops = []
+    for name in path.split(LOOKUP_SEP):
+        field = model._meta.get_field(name)
+        if not field.is_relation:
+            raise ValueError(f"'{path}' does not point at a relation of {model.__name__}.")
+        hops.append((name, field.many_to_many or field.one_to_many, field.related_model))
+        model = field.related_model
+    return hops
+
+
+def apply_eager_loading(queryset, paths):
+    """
+    Eager-load every relation path in `paths` on `queryset`.
+
+    Single-valued paths (forward FKs and one-to-ones in either direction)
+    become one select_related() join. A path with a multi-valued hop is
+    prefetched up to that hop, and the single-valued remainder is joined
+    onto the prefetch queryset, so e.g.
+    'student_profile__enrollments__section__batch' costs one extra query
+    instead of one per hop.
+    """
+    select = []
+    prefetch = {}
+    nested_prefetch = []
+
+    for path in dict.fromkeys(paths):
+        hops = _resolve_path(queryset.model, path)
+        multi = next((i for i, hop in enumerate(hops) if hop[1]), None)
+        if multi is None:
+            select.append(path)
+            continue
+
+        lookup = LOOKUP_SEP.join(name for name, _, _ in hops[:multi + 1])
+        rest = hops[multi + 1:]
+        if any(is_multi for _, is_multi, _ in rest):
+            nested_prefetch.append(path)
+            continue
+
+        related_model, rest_paths = prefetch.setdefault(lookup, (hops[multi][2], []))
+        if rest:
+            rest_paths.append(LOOKUP_SEP.join(name for name, _, _ in rest))
+
+    if select:
+        queryset = queryset.select_related(*select)
+    lookups = [
+        Prefetch(lookup, queryset=related_model._default_manager.select_related(*rest_paths))
+        if rest_paths else lookup
+        for lookup, (related_model, rest_paths) in prefetch.items()
+    ]
+    if lookups or nested_prefetch:
+        queryset = queryset.prefetch_related(*lookups, *nested_prefetch)
+    return queryset
+
+
+_relation_fields_cache = {}
+
+
+def serializer_relation_fields(serializer_class):
+    """
+    Map each readable field of `serializer_class` to the relation paths it
+    dereferences, derived from field `source`s and nested serializers
+    (e.g. `source='section.batch.name'` needs 'section__batch'). Fields
+    without a model source, such as SerializerMethodFields or properties,
+    declare theirs in `Meta.relation_paths`.
+    """
+    try:
+        return _relation_fields_cache[serializer_class]
+    except KeyError:
+        pass
+    relation_fields = _serializer_relation_fields(serializer_class())
+    _relation_fields_cache[serializer_class] = relation_fields
+    return relation_fields
+
+
+def _serializer_relation_fields(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    declared = getattr(meta, 'relation_paths', {})
+
+    relation_fields = {}
+    for field in serializer._readable_fields:
+        if field.field_name in declared:
+            paths = list(declared[field.field_name])
+        elif model is None:
+            paths = []
+        else:
+            paths = _field_relation_paths(field, model)
+        if paths:
+            relation_fields[field.field_name] = paths
+    return relation_fields
+
+
+def _field_relation_paths(field, model):
+    if field.source == '*':
+        return []
+
+    if isinstance(field, serializers.BaseSerializer):
+        prefix = _relation_prefix(model, field.source_attrs)
+        if len(prefix) != len(field.source_attrs):
+            return []
+        prefix = LOOKUP_SEP.join(prefix)
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        return list(dict.fromkeys([prefix] + [
+            f'{prefix}{LOOKUP_SEP}{path}'
+            for paths in _serializer_relation_fields(nested).values()
+            for path in paths
+        ]))
+
+    # The pk-only optimisation reads `<fk>_id` straight off the row.
+    if isinstance(field, PrimaryKeyRelatedField) and len(field.source_attrs) == 1:
+        return []
+
+    prefix = _relation_prefix(model, field.source_attrs)
+    return [LOOKUP_SEP.join(prefix)] if prefix else []
+
+
+def _relation_prefix(model, attrs):
+    prefix = []
+    for attr in attrs:
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation:
+            break
+        prefix.append(attr)
+        model = model_field.related_model
+    return prefix
@@ -0,0 +1,162 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_profile', default=None)
+_MISSING = object()
+
+
+class RequestProfile:
+    """
+    Counters collected for one request. Queries are kept as raw
+    (sql, seconds) pairs and only fingerprinted when somebody asks for
+    them, so the per-query cost is an append.
+    """
+    __slots__ = (
+        'started', 'view_name', 'db_queries', 'db_time', 'queries',
+        'sections', 'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_name = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.sections = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def add_section(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def fingerprints(self, limit=10):
+        """
+        Group queries by normalised SQL, slowest groups first:
+        [(fingerprint, count, total_seconds), ...]
+        """
+        grouped = {}
+        for sql, seconds in self.queries:
+            key = fingerprint(sql)
+            count, total = grouped.get(key, (0, 0.0))
+            grouped[key] = (count + 1, total + seconds)
+        rows = [(key, count, total) for key, (count, total) in grouped.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+
+def current_profile():
+    """The RequestProfile of the running request, or None."""
+    return _current.get()
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def end_profile(token):
+    _current.reset(token)
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Time a block of request work (e.g. 'serialize', 'render'). Database
+    time spent inside the block is already counted as 'db' and is left out.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    db_time = profile.db_time
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_section(name, time.perf_counter() - started - (profile.db_time - db_time))
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normalise SQL so queries differing only in literals group together:
+    literals become '?' and IN lists collapse to (...).
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed on every connection; it only costs a
+    context variable lookup outside of profiled requests.
+    """
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        profile.db_queries += 1
+        profile.db_time += seconds
+        profile.queries.append((sql, seconds))
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def instrument_cache(cache):
+    """
+    Count hits and misses of get()/get_many() on a cache instance. Cache
+    handlers hand out one instance per thread, so this runs once per
+    instance and works with any backend.
+    """
+    if getattr(cache, '_profiled', False):
+        return cache
+    get, get_many = cache.get, cache.get_many
+
+    def profiled_get(key, default=None, version=None, **kwargs):
+        value = get(key, _MISSING, version=version, **kwargs)
+        profile = _current.get()
+        if value is _MISSING:
+            if profile is not None:
+                profile.cache_misses += 1
+            return default
+        if profile is not None:
+            profile.cache_hits += 1
+        return value
+
+    def profiled_get_many(keys, version=None, **kwargs):
+        keys = list(keys)
+        profile = _current.get()
+        if profile is None:
+            return get_many(keys, version=version, **kwargs)
+        # Backends without a native get_many() loop over get(); count once.
+        hits, misses = profile.cache_hits, profile.cache_misses
+        found = get_many(keys, version=version, **kwargs)
+        profile.cache_hits = hits + len(found)
+        profile.cache_misses = misses + len(keys) - len(found)
+        return found
+
+    cache.get = profiled_get
+    cache.get_many = profiled_get_many
+    cache._profiled = True
+    return cache
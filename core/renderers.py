@@ -0,0 +1,55 @@
+from rest_framework.renderers import JSONRenderer
+from core.profiling import profile_section
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    UUID, datetime and date values are encoded natively by orjson; anything
+    else (Decimal, lazy translation strings, timedelta, querysets...) goes
+    through DRF's own JSONEncoder.default so the output matches the stdlib
+    renderer value for value. Indented output and payloads orjson refuses
+    (e.g. integers wider than 64 bits) fall back to the stdlib renderer.
+
+    Differences are limited to number spelling (`1e16` instead of `1e+16`)
+    and non-finite floats, which orjson writes as `null` where the strict
+    stdlib renderer raises.
+    """
+    _default = staticmethod(JSONRenderer.encoder_class().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with profile_section('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the stdlib renderer's guarantee that the output is a strict
+        # javascript subset.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
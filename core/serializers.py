@@ -0,0 +1,162 @@
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import Field, ReadOnlyField, SerializerMethodField, SkipField
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField
+
+
+class CompiledSerializer:
+    """
+    Read-only, precompiled counterpart of a bound DRF serializer.
+
+    DRF resolves every field of every row through `Field.get_attribute()`
+    and `Field.to_representation()` with their generic error handling. For
+    list pages we resolve each field once up front into an
+    (name, getter, representer) triple and then run a tight loop per row.
+    Anything unusual (dict instances, callables, missing attributes) is
+    handed back to the original field so the output is identical to
+    `serializer.data`, and serializers overriding `to_representation()`
+    are rendered by their own override.
+    """
+
+    def __init__(self, serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            if type(serializer).to_representation is not serializers.ListSerializer.to_representation:
+                self.many = serializer.to_representation
+            serializer = serializer.child
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            self.to_representation = serializer.to_representation
+            return
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.plan = [self._compile_field(field, model) for field in serializer._readable_fields]
+
+    def to_representation(self, instance):
+        ret = {}
+        for name, getter, represent in self.plan:
+            try:
+                attribute = getter(instance)
+            except SkipField:
+                continue
+
+            if attribute is None or (attribute.__class__ is PKOnlyObject and attribute.pk is None):
+                ret[name] = None
+            else:
+                ret[name] = represent(attribute)
+        return ret
+
+    def many(self, instances):
+        to_representation = self.to_representation
+        if isinstance(instances, models.manager.BaseManager):
+            instances = instances.all()
+        return [to_representation(instance) for instance in instances]
+
+    def _compile_field(self, field, model):
+        return field.field_name, self._compile_getter(field, model), self._compile_representer(field)
+
+    def _compile_getter(self, field, model):
+        if field.source == '*':
+            return _identity
+
+        if type(field) is PrimaryKeyRelatedField and field.pk_field is None and len(field.source_attrs) == 1:
+            attname = _foreign_key_attname(model, field.source_attrs[0])
+            if attname:
+                return _attribute_getter(attname, field)
+
+        if type(field).get_attribute is not Field.get_attribute and not isinstance(field, serializers.BaseSerializer):
+            return field.get_attribute
+
+        if len(field.source_attrs) == 1:
+            return _attribute_getter(field.source_attrs[0], field)
+        return _path_getter(field.source_attrs, field)
+
+    def _compile_representer(self, field):
+        if isinstance(field, serializers.ListSerializer):
+            return CompiledSerializer(field).many
+        if isinstance(field, serializers.BaseSerializer):
+            return CompiledSerializer(field).to_representation
+        if type(field) is SerializerMethodField:
+            return getattr(field.parent, field.method_name)
+        if type(field) is ReadOnlyField:
+            return _identity
+        if type(field) is PrimaryKeyRelatedField and field.pk_field is None:
+            return _pk
+        return field.to_representation
+
+
+def _identity(value):
+    return value
+
+
+def _pk(value):
+    return value.pk if hasattr(value, 'pk') else value
+
+
+def _needs_call(value):
+    # Related managers are callable but DRF passes them through untouched.
+    return callable(value) and not isinstance(value, models.manager.BaseManager)
+
+
+def _foreign_key_attname(model, name):
+    if model is None:
+        return None
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if model_field.concrete and model_field.many_to_one:
+        return model_field.attname
+    return None
+
+
+def _attribute_getter(attr, field):
+    def getter(instance):
+        try:
+            value = getattr(instance, attr)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            return field.get_attribute(instance)
+        if _needs_call(value):
+            return field.get_attribute(instance)
+        return value
+    return getter
+
+
+def _path_getter(attrs, field):
+    def getter(instance):
+        value = instance
+        try:
+            for attr in attrs:
+                value = getattr(value, attr)
+                if _needs_call(value):
+                    return field.get_attribute(instance)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            return field.get_attribute(instance)
+        return value
+    return getter
+
+
+class ImageVariantsField(ReadOnlyField):
+    """
+    URLs of the thumbnails core.images wrote for an image field, by variant
+    name, e.g. `photo_variants = ImageVariantsField()`. None until the
+    upload has been processed.
+    """
+
+    def __init__(self, storage=None, **kwargs):
+        self.storage = storage or default_storage
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        files = (value or {}).get('files')
+        if not files:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for name, path in files.items():
+            url = self.storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
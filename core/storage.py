@@ -0,0 +1,338 @@
+"""
+Content-addressed media storage.
+
+ContentAddressedStorage (the default storage) files every upload under the
+SHA-256 of its bytes, sharded two levels deep below the top directory of
+the requested name:
+
+    profile_photos/photo.jpg -> profile_photos/3f/a9/3fa9...e1.jpg
+
+Identical bytes uploaded under the same directory (the same photo for
+several people, the same logo for several organizations) are stored once.
+
+Every stored file has a StoredFile row whose refcount is the number of
+database values naming it: every FileField backed by this storage and
+the `<field>_variants` JSON of core.images. History tables do not count:
+media is kept for live rows, so a replaced photo is reclaimed even though
+its historical record still names it.
+Saving or deleting a row holding such a field recounts the names it
+held and holds; `delete()` only recounts, because other rows may still
+point at the bytes. A file that drops to zero references is marked
+orphaned, and `gc_media` deletes it after MEDIA_GC_GRACE_SECONDS, checking
+the count again under a row lock first. Uploads take the same row lock, and
+the bytes are removed only after the row deletion commits.
+
+The bytes are filed as soon as they are uploaded, so when the transaction
+saving the upload rolls back, the file stays on disk without a row.
+`gc_media` adopts such untracked files once they are older than the grace
+period, giving them an orphaned row, and then reclaims them like any other.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import DEFERRED
+from django.utils import timezone
+
+SHARD_WIDTH = 2
+SHARD_DEPTH = 2
+# What content_name() produces: <top>/<shard>/<shard>/<sha256><extension>
+CONTENT_NAME = re.compile(r'^(?:[^/]+/)?([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(?:\.[^/]*)?$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save(); never suffix them
+        return name
+
+    def content_name(self, name, digest):
+        top = name.split('/', 1)[0] if '/' in name else ''
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(top, *shards, digest + extension)
+
+    def _save(self, name, content):
+        from core.models import StoredFile
+
+        incoming = os.path.join(self.location, '.incoming')
+        os.makedirs(incoming, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+
+            name = self.content_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            with transaction.atomic():
+                # The row lock orders us with collect_garbage(): either it
+                # deleted the row (and purges the bytes) before we look, or
+                # it finds the grace period restarted below
+                stored = StoredFile.objects.select_for_update().filter(name=name).first()
+                if stored is None:
+                    stored, created = StoredFile.objects.get_or_create(
+                        name=name, defaults={'size': size, 'orphaned_at': timezone.now()}
+                    )
+                else:
+                    created = False
+                if created or not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(temp_path, self.file_permissions_mode)
+                    os.replace(temp_path, full_path)
+                elif not stored.refcount:
+                    # Restart the grace period so gc_media spares it until the row referencing it is saved
+                    StoredFile.objects.filter(pk=stored.pk, refcount=0).update(orphaned_at=timezone.now())
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+    def delete(self, name):
+        refresh_references([name])
+
+    def purge(self, name):
+        """Remove the bytes for good; only gc_media should call this."""
+        super().delete(name)
+
+
+def is_content_addressed(storage):
+    return isinstance(storage, ContentAddressedStorage)
+
+
+def file_references():
+    """(model, lookup) pairs of every database value that can name a stored file."""
+    from core.images import PIPELINES, variants_field
+
+    references = [
+        (model, field_name) for model in apps.get_models() if not _is_history(model)
+        for field_name in _tracked_fields(model)
+    ]
+    for label, fields in PIPELINES.items():
+        model = apps.get_model(label)
+        for field_name, variants in fields.items():
+            for variant in variants:
+                references.append((model, f'{variants_field(field_name)}__files__{variant}'))
+    return references
+
+
+def count_references(name):
+    return sum(model._base_manager.filter(**{lookup: name}).count() for model, lookup in file_references())
+
+
+def refresh_references(names):
+    """Recount the references of `names` and mark the unreferenced ones orphaned."""
+    from django.core.cache import cache
+    from core.media import owners_key
+    from core.models import StoredFile
+
+    names = {name for name in names if name}
+    # Whoever referenced them may have changed too
+    cache.delete_many([owners_key(name) for name in names])
+    for name in names:
+        count = count_references(name)
+        stored = StoredFile.objects.filter(name=name)
+        if count:
+            stored.update(refcount=count, orphaned_at=None)
+        else:
+            stored.filter(orphaned_at__isnull=True).update(refcount=0, orphaned_at=timezone.now())
+            stored.update(refcount=0)
+
+
+def recount_references():
+    """Recompute every refcount from the database; returns the number of rows corrected."""
+    from core.models import StoredFile
+
+    counts = {}
+    for model, lookup in file_references():
+        rows = (
+            model._base_manager.exclude(**{f'{lookup}__isnull': True})
+            .values_list(lookup).annotate(count=models.Count('pk')).order_by()
+        )
+        for name, count in rows:
+            if name:
+                counts[name] = counts.get(name, 0) + count
+
+    corrected = 0
+    now = timezone.now()
+    for stored in StoredFile.objects.only('pk', 'name', 'refcount', 'orphaned_at').iterator(chunk_size=2000):
+        count = counts.get(stored.name, 0)
+        if count != stored.refcount or (count == 0) != (stored.orphaned_at is not None):
+            StoredFile.objects.filter(pk=stored.pk).update(
+                refcount=count, orphaned_at=(stored.orphaned_at or now) if count == 0 else None
+            )
+            corrected += 1
+    return corrected
+
+
+def collect_garbage(storage, grace_seconds, dry_run=False):
+    """
+    Delete stored files that have been unreferenced for `grace_seconds`.
+    Returns (files, bytes) reclaimed, or that would be with `dry_run`.
+    """
+    from core.models import StoredFile
+
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    candidates = StoredFile.objects.filter(refcount=0, orphaned_at__lte=cutoff).values_list('pk', flat=True)
+    files = size = 0
+    for pk in list(candidates.iterator(chunk_size=2000)):
+        with transaction.atomic():
+            # Locks the row: a concurrent upload of the same bytes waits for us.
+            # The refcount and grace period are checked again under the lock.
+            stored = StoredFile.objects.select_for_update().filter(pk=pk).first()
+            if stored is None or stored.refcount or stored.orphaned_at is None or stored.orphaned_at > cutoff:
+                continue
+            count = count_references(stored.name)
+            if count:
+                StoredFile.objects.filter(pk=pk).update(refcount=count, orphaned_at=None)
+                continue
+            files += 1
+            size += stored.size
+            if not dry_run:
+                stored.delete()
+                # Only once the deletion is visible to uploads waiting on the lock
+                transaction.on_commit(lambda name=stored.name: _purge_unclaimed(storage, name))
+    return files, size
+
+
+def untracked_files(storage, grace_seconds):
+    """
+    {name: os.stat_result} of the content-addressed files on disk that have
+    no StoredFile row and have not changed for `grace_seconds`.
+    """
+    from core.models import StoredFile
+
+    cutoff = time.time() - grace_seconds
+    found = {}
+    for root, dirs, files in os.walk(storage.location):
+        dirs[:] = [directory for directory in dirs if directory != '.incoming']
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+            if CONTENT_NAME.match(name):
+                stat = os.stat(path)
+                if stat.st_mtime <= cutoff:
+                    found[name] = stat
+    names = list(found)
+    for start in range(0, len(names), 2000):
+        for name in StoredFile.objects.filter(name__in=names[start:start + 2000]).values_list('name', flat=True):
+            del found[name]
+    return found
+
+
+def adopt_untracked(storage, grace_seconds):
+    """
+    Give every untracked file an orphaned StoredFile row dated from the
+    file, so collect_garbage() recounts and reclaims it under the row lock
+    like any other. Returns the number of files adopted.
+    """
+    from core.models import StoredFile
+
+    adopted = 0
+    for name, stat in untracked_files(storage, grace_seconds).items():
+        orphaned_at = datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc)
+        _, created = StoredFile.objects.get_or_create(
+            name=name, defaults={'size': stat.st_size, 'orphaned_at': orphaned_at}
+        )
+        adopted += created
+    return adopted
+
+
+def _purge_unclaimed(storage, name):
+    from core.models import StoredFile
+
+    # An upload may have filed the same bytes again since the row was deleted
+    if not StoredFile.objects.filter(name=name).exists():
+        storage.purge(name)
+
+
+# Signal receivers keeping refcounts current as rows change
+
+def _is_history(model):
+    # simple_history's historical models
+    return hasattr(model, 'instance_type')
+
+
+def _tracked_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and is_content_addressed(field.storage)
+    ]
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or None
+
+
+def remember_files(sender, instance, **kwargs):
+    # Raw values: going through the FileField descriptor costs a FieldFile per row.
+    # DEFERRED: loaded by .only()/.defer() without the field
+    instance._stored_files = {
+        field: _file_name(instance.__dict__[field]) if field in instance.__dict__ else DEFERRED
+        for field in sender._stored_file_fields
+    }
+
+
+def _load_stored_names(sender, instance, fields):
+    if fields and not instance._state.adding:
+        row = sender._base_manager.filter(pk=instance.pk).values(*fields).first() or {}
+        instance._stored_files.update({field: _file_name(row.get(field)) for field in fields})
+
+
+def files_before_save(sender, instance, raw=False, **kwargs):
+    remembered = getattr(instance, '_stored_files', {})
+    # Loaded or assigned since: the stored name is the one counted
+    _load_stored_names(sender, instance, [
+        field for field, name in remembered.items() if name is DEFERRED and field in instance.__dict__
+    ])
+
+
+def files_before_delete(sender, instance, **kwargs):
+    remembered = getattr(instance, '_stored_files', {})
+    _load_stored_names(sender, instance, [field for field, name in remembered.items() if name is DEFERRED])
+
+
+def files_saved(sender, instance, raw=False, **kwargs):
+    before = getattr(instance, '_stored_files', {})
+    remember_files(sender, instance)
+    # A still deferred field was not saved, so it did not change
+    changed = [
+        name for field in sender._stored_file_fields
+        if before.get(field) is not DEFERRED and before.get(field) != instance._stored_files[field]
+        for name in (before.get(field), instance._stored_files[field])
+    ]
+    refresh_references(changed)
+
+
+def files_deleted(sender, instance, **kwargs):
+    refresh_references(
+        name for name in getattr(instance, '_stored_files', {}).values() if name is not DEFERRED
+    )
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+
+    for model in apps.get_models():
+        fields = _tracked_fields(model)
+        if not fields or _is_history(model):
+            continue
+        model._stored_file_fields = fields
+        uid = f'core.storage.{model._meta.label}'
+        post_init.connect(remember_files, sender=model, dispatch_uid=uid)
+        pre_save.connect(files_before_save, sender=model, dispatch_uid=uid)
+        pre_delete.connect(files_before_delete, sender=model, dispatch_uid=uid)
+        post_save.connect(files_saved, sender=model, dispatch_uid=uid)
+        post_delete.connect(files_deleted, sender=model, dispatch_uid=uid)
@@ -0,0 +1,18 @@
+from celery import shared_task
+from core import exports, images
+
+
+@shared_task(ignore_result=True, acks_late=True, autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def process_image(model_label, pk, field_name, force=False):
+    """Validate, re-encode and thumbnail one uploaded image (see core.images)."""
+    return images.process(model_label, pk, field_name, force=force)
+
+
+@shared_task(acks_late=True)
+def export_rows(name, organization_id, file_format):
+    """Write a roster export to the default storage (see core.exports)."""
+    return {
+        'name': exports.store(name, organization_id, file_format),
+        'organization': organization_id,
+        'filename': exports.filename(name, file_format),
+    }
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+
+class BenchmarkApiCommandTest(TestCase):
+    def setUp(self):
+        call_command(
+            'generate_load_data', students=5, teachers=2, users=3, subjects=2, classes=1,
+            batches=1, sections=2, stdout=StringIO()
+        )
+
+    def benchmark(self, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command('benchmark_api', output=output, stdout=StringIO(), **options)
+            with open(output) as fh:
+                return json.load(fh)
+
+    def test_writes_json_report(self):
+        report = self.benchmark(requests=3, warmup=1)
+
+        self.assertEqual(set(report['results']), {'persons', 'enrollments', 'auth-me', 'login', 'login-otp'})
+        for name, result in report['results'].items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_per_request'], 0)
+
+    @override_settings(API_THROTTLE_ENABLED=True)
+    def test_throttles_are_off_while_measuring(self):
+        report = self.benchmark(requests=40, warmup=0, selected=['login'])
+        self.assertEqual(report['results']['login']['errors'], 0)
+
+
+class BenchmarkApiReplicaTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def test_counts_queries_on_every_alias(self):
+        call_command(
+            'generate_load_data', students=5, teachers=2, users=3, subjects=2, classes=1,
+            batches=1, sections=2, stdout=StringIO()
+        )
+        counts = []
+        for routers in ([], ['core.db_router.ReplicaRouter']):
+            with override_settings(DATABASE_ROUTERS=routers), tempfile.TemporaryDirectory() as tmp:
+                output = os.path.join(tmp, 'results.json')
+                call_command(
+                    'benchmark_api', requests=2, warmup=1, selected=['persons'], output=output, stdout=StringIO()
+                )
+                with open(output) as fh:
+                    counts.append(json.load(fh)['results']['persons']['queries_per_request'])
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,27 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+
+class BenchmarkAsgiCommandTest(TransactionTestCase):
+    # Requests are served from other threads, which only see committed rows
+    def test_compares_both_stacks(self):
+        call_command(
+            'generate_load_data', students=2, teachers=1, users=2, subjects=1, classes=1,
+            batches=1, sections=1, stdout=StringIO()
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command('benchmark_asgi', requests=8, concurrency='1,4', output=output, stdout=StringIO())
+            with open(output) as fh:
+                report = json.load(fh)
+
+        self.assertEqual([result['concurrency'] for result in report['results']], [1, 4])
+        for result in report['results']:
+            for stack in ('wsgi', 'asgi'):
+                self.assertEqual(result[stack]['requests'], 8)
+                self.assertEqual(result[stack]['errors'], 0, stack)
+                self.assertLessEqual(result[stack]['p50_ms'], result[stack]['p99_ms'])
@@ -0,0 +1,68 @@
+import os
+from unittest import mock
+from decouple import Config, RepositoryEmpty
+from django.db import connections
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+from core import metrics
+from sms.database import database_settings, process_role
+
+ENV = {'DB_NAME': 'sms', 'DB_USER': 'sms', 'DB_PASSWORD': 'secret'}
+
+
+def settings_for(role=None, argv=None, **env):
+    with mock.patch.dict(os.environ, {**ENV, **env}, clear=True):
+        config = Config(RepositoryEmpty())
+        if argv is not None:
+            return process_role(config, argv)
+        return database_settings(config, role)
+
+
+class DatabaseSettingsTest(SimpleTestCase):
+    def test_process_roles(self):
+        self.assertEqual(settings_for(argv=['/venv/bin/gunicorn', 'sms.wsgi']), 'web')
+        self.assertEqual(settings_for(argv=['manage.py', 'runserver']), 'web')
+        self.assertEqual(settings_for(argv=['manage.py', 'migrate']), 'command')
+        self.assertEqual(settings_for(argv=['/venv/bin/celery', '-A', 'sms', 'worker']), 'celery')
+        self.assertEqual(settings_for(argv=['manage.py', 'migrate'], DB_PROCESS_ROLE='web'), 'web')
+
+    def test_persistent_mode_is_default(self):
+        database = settings_for('web')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', database['OPTIONS'])
+        self.assertEqual(settings_for('command')['CONN_MAX_AGE'], 0)
+        self.assertEqual(settings_for('celery', DB_CONN_MAX_AGE_CELERY='300')['CONN_MAX_AGE'], 300)
+
+    def test_pool_mode_sizes_per_role(self):
+        web = settings_for('web', DB_CONNECTION_MODE='pool', DB_POOL_MAX_SIZE_WEB='20')
+        celery = settings_for('celery', DB_CONNECTION_MODE='pool')
+        self.assertEqual(web['CONN_MAX_AGE'], 0)
+        self.assertEqual((web['OPTIONS']['pool']['min_size'], web['OPTIONS']['pool']['max_size']), (2, 20))
+        self.assertEqual((celery['OPTIONS']['pool']['min_size'], celery['OPTIONS']['pool']['max_size']), (1, 4))
+        self.assertEqual(web['OPTIONS']['pool']['max_lifetime'], 1800)
+        self.assertEqual(celery['OPTIONS']['application_name'], 'sms-celery')
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            settings_for('web', DB_CONNECTION_MODE='bouncer')
+
+
+class PoolMetricsTest(SimpleTestCase):
+    def test_pool_stats_are_exported(self):
+        pool = mock.Mock()
+        pool.pop_stats.return_value = {
+            'pool_size': 4, 'pool_available': 3, 'requests_waiting': 0,
+            'requests_num': 7, 'requests_wait_ms': 1500, 'connections_lost': 1,
+        }
+        before = REGISTRY.get_sample_value('db_pool_requests_total', {'alias': 'default'}) or 0
+        with mock.patch.object(metrics, '_pooled', ['default']), \
+                mock.patch.object(metrics, '_pools_observed_at', 0.0), \
+                mock.patch.object(type(connections['default']), '_connection_pools', {'default': pool}, create=True):
+            metrics.observe_db_pools()
+
+        self.assertEqual(REGISTRY.get_sample_value('db_pool_connections', {'alias': 'default'}), 4)
+        self.assertEqual(REGISTRY.get_sample_value('db_pool_requests_total', {'alias': 'default'}), before + 7)
+        self.assertGreaterEqual(
+            REGISTRY.get_sample_value('db_pool_errors_total', {'alias': 'default', 'kind': 'connections_lost'}), 1
+        )
@@ -0,0 +1,107 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITransactionTestCase
+from core.db_router import PRIMARY, REPLICA, ReplicaRouter, end_routing, start_routing
+from core.middleware import ReplicaRoutingMiddleware
+from Org.models import Organization
+from people.models import Person
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_ROUTERS=['core.db_router.ReplicaRouter'])
+class ReplicaRouterTest(APITransactionTestCase):
+    # The replica is a mirror of the test database, so the rows have to be
+    # committed (not held in a TestCase transaction) to be visible through it.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Replica Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.client.force_login(self.owner)
+        self.router = ReplicaRouter()
+
+    def test_no_routing_outside_requests(self):
+        self.assertIsNone(self.router.db_for_read(Person))
+        self.assertEqual(self.router.db_for_write(Person), PRIMARY)
+
+    def test_routing_state(self):
+        state, token = start_routing(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Person), REPLICA)
+            # Sessions, auth tables and users are always read from the primary
+            self.assertEqual(self.router.db_for_read(Person._meta.apps.get_model('sessions', 'Session')), PRIMARY)
+            self.assertEqual(self.router.db_for_read(User), PRIMARY)
+            self.router.db_for_write(Person)
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(Person), PRIMARY)
+        finally:
+            end_routing(token)
+
+        state, token = start_routing(False)
+        try:
+            self.assertEqual(self.router.db_for_read(Person), PRIMARY)
+        finally:
+            end_routing(token)
+
+    def test_migrations_skip_replica(self):
+        self.assertFalse(self.router.allow_migrate(REPLICA, 'people'))
+        self.assertIsNone(self.router.allow_migrate(PRIMARY, 'people'))
+
+    def test_safe_requests_read_from_replica(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(connections[PRIMARY]) as primary:
+            response = self.client.get('/api/v1/academic/classes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('academic_academicclass' in q['sql'] for q in replica.captured_queries))
+        # The session and user lookups stay on the primary, so a user who
+        # just signed up or changed role is never read back stale
+        for table in ('django_session', 'users_customuser'):
+            self.assertTrue(any(table in q['sql'].lower() for q in primary.captured_queries))
+            self.assertFalse(any(table in q['sql'].lower() for q in replica.captured_queries))
+
+    def test_writes_go_to_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.post(
+                '/api/v1/auth/otp/generate/', {'email': 'new@example.com'}, format='json'
+            )
+        self.assertLess(response.status_code, 500)
+        self.assertEqual(len(replica.captured_queries), 0)
+
+    @override_settings(REPLICA_READ_YOUR_WRITES_SECONDS=5)
+    def test_read_your_writes_window(self):
+        session = self.client.session
+        session['_read_primary_until'] = time.time() + 5
+        session.save()
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.client.get('/api/v1/academic/classes/')
+        self.assertEqual(len(replica.captured_queries), 0)
+
+        session['_read_primary_until'] = time.time() - 1
+        session.save()
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.client.get('/api/v1/academic/classes/')
+        self.assertGreater(len(replica.captured_queries), 0)
+
+    @override_settings(REPLICA_READ_YOUR_WRITES_SECONDS=5)
+    def test_write_pins_session_to_primary(self):
+        def view(request):
+            Person.objects.create(organization=self.org, first_name="A", last_name="B")
+            # Read back after the write: must not hit the lagging replica
+            self.assertEqual(self.router.db_for_read(Person), PRIMARY)
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        ReplicaRoutingMiddleware(view)(request)
+        self.assertGreater(request.session['_read_primary_until'], time.time())
+        self.assertFalse(ReplicaRoutingMiddleware(view).use_replica(request))
@@ -0,0 +1,160 @@
+import csv
+import io
+import shutil
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from academic.models import AcademicClass, Batch, Section, StudentEnrollment, Subject, TeacherAssignment
+from people.models import Person, Student, Teacher
+from core import exports
+from core.tasks import export_rows
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_SERVE_BACKEND='django')
+class ExportTest(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.admin = User.objects.create_user(email='admin@example.com', password='password123')
+        self.org = Organization.objects.create(
+            org_name='Export Org', domain_name='exports.example.com', email='org@example.com', owner=self.admin
+        )
+        self.admin.organization = self.org
+        self.admin.save()
+        self.admin.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        self.client.force_authenticate(self.admin)
+
+        ac_class = AcademicClass.objects.create(organization=self.org, name='Class 5', level_order=5)
+        batch = Batch.objects.create(
+            organization=self.org, name='2025', academic_class=ac_class, start_date='2025-01-01', end_date='2025-12-31'
+        )
+        self.sections = [
+            Section.objects.create(organization=self.org, batch=batch, name=name) for name in ('A', 'B')
+        ]
+        subject = Subject.objects.create(organization=self.org, name='Maths', academic_class=ac_class)
+
+        for i in range(3):
+            person = Person.objects.create(organization=self.org, first_name=f'S{i}', last_name='Student')
+            student = Student.objects.create(person=person, admission_number=f'ADM{i}')
+            StudentEnrollment.objects.create(
+                organization=self.org, student=student, section=self.sections[0], roll_number=str(i)
+            )
+        # Enrolled twice: one row per enrollment
+        StudentEnrollment.objects.create(organization=self.org, student=student, section=self.sections[1])
+        # Not enrolled anywhere: one row with blank enrollment columns
+        Student.objects.create(person=Person.objects.create(organization=self.org, first_name='New', last_name='Comer'))
+
+        teacher = Teacher.objects.create(
+            person=Person.objects.create(organization=self.org, first_name='T', last_name='Teacher'),
+            employee_id='EMP1'
+        )
+        TeacherAssignment.objects.create(organization=self.org, teacher=teacher, subject=subject, section=self.sections[0])
+
+        other_owner = User.objects.create_user(email='other@example.com', password='password123')
+        other = Organization.objects.create(org_name='Other', email='other-org@example.com', owner=other_owner)
+        Person.objects.create(organization=other, first_name='Not', last_name='Mine')
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_persons_csv_is_streamed_for_the_tenant_only(self):
+        response = self.client.get('/api/v1/people/persons/export/')
+        self.assertIn('attachment; filename="persons.csv"', response['Content-Disposition'])
+        table = self.read_csv(response)
+        self.assertEqual(table[0][:3], ['ID', 'First name', 'Last name'])
+        names = {row[1] for row in table[1:]}
+        self.assertEqual(len(table) - 1, 5)
+        self.assertNotIn('Not', names)
+
+    def test_formulas_are_written_as_text(self):
+        Person.objects.create(organization=self.org, first_name='=HYPERLINK("http://x")', last_name='@SUM(A1)')
+        table = self.read_csv(self.client.get('/api/v1/people/persons/export/'))
+        self.assertIn(['\'=HYPERLINK("http://x")', "'@SUM(A1)"], [row[1:3] for row in table[1:]])
+        self.assertIn(['S0', 'Student'], [row[1:3] for row in table[1:]])
+
+    def test_numbers_are_not_prefixed(self):
+        self.assertEqual(exports._text('+9779812345678'), '+9779812345678')
+        self.assertEqual(exports._text('-12.5'), '-12.5')
+        self.assertEqual(exports._text('+977-1-4412345'), "'+977-1-4412345")
+        self.assertEqual(exports._text('-1+cmd|x'), "'-1+cmd|x")
+
+    def test_students_have_one_row_per_enrollment(self):
+        table = self.read_csv(self.client.get('/api/v1/people/students/export/'))
+        sections = sorted(row[6] for row in table[1:])
+        self.assertEqual(sections, ['', 'A', 'A', 'A', 'B'])
+        self.assertIn(['Class 5', '2025', 'A', '0'], [row[4:8] for row in table[1:]])
+
+    def test_teacher_assignments(self):
+        table = self.read_csv(self.client.get('/api/v1/academic/assignments/export/'))
+        self.assertEqual(table[1][1:], ['T', 'Teacher', 'EMP1', 'Maths', '', 'Class 5', '2025', 'A'])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(exports.rows('students', self.org.pk))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_export_needs_an_org_admin(self):
+        member = User.objects.create_user(email='member@example.com', password='password123', organization=self.org)
+        self.client.force_authenticate(member)
+        response = self.client.get('/api/v1/people/persons/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_type(self):
+        response = self.client.get('/api/v1/people/persons/export/?type=pdf')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @mock.patch.object(exports, 'openpyxl', None)
+    def test_xlsx_without_openpyxl(self):
+        response = self.client.get('/api/v1/people/persons/export/?type=xlsx')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_background_export(self):
+        with mock.patch('core.tasks.export_rows.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = self.client.get('/api/v1/people/persons/export/?mode=background')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status_url'], '/api/v1/exports/task-1/')
+        delay.assert_called_once_with('persons', str(self.org.pk), 'csv')
+
+        result = export_rows('persons', str(self.org.pk), 'csv')
+        finished = mock.Mock(**{'failed.return_value': False, 'successful.return_value': True, 'result': result})
+        with mock.patch('core.views.AsyncResult', return_value=finished):
+            response = self.client.get('/api/v1/exports/task-1/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="persons.csv"', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 6)
+
+        pending = mock.Mock(**{'failed.return_value': False, 'successful.return_value': False, 'status': 'PENDING'})
+        with mock.patch('core.views.AsyncResult', return_value=pending):
+            response = self.client.get('/api/v1/exports/task-1/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        failed = mock.Mock(**{'failed.return_value': True, 'status': 'FAILURE'})
+        with mock.patch('core.views.AsyncResult', return_value=failed):
+            response = self.client.get('/api/v1/exports/task-1/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'FAILURE')
+
+    def test_background_export_of_another_tenant_is_hidden(self):
+        result = export_rows('persons', str(self.org.pk), 'csv')
+        finished = mock.Mock(**{'failed.return_value': False, 'successful.return_value': True, 'result': result})
+        intruder = User.objects.create_superuser(email='root@example.com', password='password123')
+        self.client.force_authenticate(intruder)
+        with mock.patch('core.views.AsyncResult', return_value=finished):
+            response = self.client.get('/api/v1/exports/task-1/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import skipIf
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.hashers import HashingBusy, HashingPool, hashing_pool
+from sms.passwords import available, password_hashers
+
+User = get_user_model()
+
+FAST_PBKDF2 = {
+    'PASSWORD_HASHERS': [
+        'core.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+    'PASSWORD_PBKDF2_ITERATIONS': 1000,
+}
+
+
+def env(**values):
+    return lambda name, default=None, cast=None: values.get(name, default)
+
+
+class PasswordPolicyTest(SimpleTestCase):
+    def test_pbkdf2_is_the_default_and_other_formats_still_verify(self):
+        hashers = password_hashers(env())
+        self.assertEqual(hashers[0], 'core.hashers.PBKDF2PasswordHasher')
+        self.assertIn('django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher', hashers)
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            password_hashers(env(PASSWORD_HASHER_POLICY='md5'))
+
+    @skipIf(available('argon2'), 'argon2-cffi is installed')
+    def test_policy_needs_its_library(self):
+        with self.assertRaisesMessage(ValueError, 'argon2-cffi'):
+            password_hashers(env(PASSWORD_HASHER_POLICY='argon2'))
+
+
+class HashingPoolTest(SimpleTestCase):
+    def hold(self, pool):
+        """Occupy a slot from another thread until the returned event is set."""
+        held, release = threading.Event(), threading.Event()
+
+        def worker():
+            with pool.slot():
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        held.wait(5)
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        return release
+
+    def test_full_queue_refuses_immediately(self):
+        pool = HashingPool(1, max_waiting=0, timeout=5)
+        self.hold(pool)
+        with self.assertRaises(HashingBusy):
+            with pool.slot():
+                pass
+
+    def test_waiter_gives_up_after_timeout(self):
+        pool = HashingPool(1, max_waiting=1, timeout=0.05)
+        self.hold(pool)
+        with self.assertRaises(HashingBusy):
+            with pool.slot():
+                pass
+        self.assertEqual(pool.waiting, 0)
+
+    def test_waiter_gets_a_released_slot(self):
+        pool = HashingPool(1, max_waiting=1, timeout=5)
+        release = self.hold(pool)
+        threading.Timer(0.05, release.set).start()
+        with pool.slot():
+            pass
+
+    def test_slot_is_reentrant(self):
+        pool = HashingPool(1, max_waiting=0, timeout=0)
+        with pool.slot():
+            with pool.slot():
+                pass
+        # Released: another thread can take it now
+        self.hold(pool).set()
+
+
+@override_settings(**FAST_PBKDF2)
+class RehashOnLoginTest(APITestCase):
+    def login(self, password='password123'):
+        return self.client.post(
+            '/api/v1/auth/login/', {'email': 'user@example.com', 'password': password}, format='json'
+        )
+
+    def test_cost_change_rehashes_on_next_login(self):
+        user = User.objects.create_user(email='user@example.com', password='password123')
+        self.assertEqual(user.password.split('$')[1], '1000')
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.password.split('$')[1], '2000')
+
+    def test_old_algorithm_is_upgraded_on_login(self):
+        user = User.objects.create_user(email='user@example.com')
+        User.objects.filter(pk=user.pk).update(
+            password=make_password('password123', hasher='md5')
+        )
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'pbkdf2_sha256')
+
+    def test_failed_login_keeps_the_hash(self):
+        User.objects.create_user(email='user@example.com')
+        legacy = make_password('password123', hasher='md5')
+        User.objects.filter(email='user@example.com').update(password=legacy)
+
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(User.objects.get(email='user@example.com').password, legacy)
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_MAX_WAITING=0)
+    def test_login_is_refused_when_hashing_is_saturated(self):
+        User.objects.create_user(email='user@example.com', password='password123')
+        held, release = threading.Event(), threading.Event()
+
+        def worker():
+            with hashing_pool().slot():
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        held.wait(5)
+        try:
+            response = self.login()
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.data['detail'].code, 'hashing_busy')
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+
+class BenchmarkLoginsCommandTest(SimpleTestCase):
+    def test_reports_logins_per_core(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command(
+                'benchmark_logins', policies=['pbkdf2'], pbkdf2_iterations='1000,2000',
+                seconds=0.05, concurrency='1,2', output=output, stdout=StringIO(),
+            )
+            with open(output) as fh:
+                report = json.load(fh)
+
+        runs = [(run['variant'], run['concurrency']) for run in report['results']]
+        self.assertEqual(runs, [('pbkdf2 1000', 1), ('pbkdf2 1000', 2), ('pbkdf2 2000', 1), ('pbkdf2 2000', 2)])
+        for run in report['results']:
+            self.assertGreater(run['logins'], 0)
+            self.assertGreater(run['logins_per_core'], 0)
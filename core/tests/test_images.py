@@ -0,0 +1,184 @@
+import io
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from Org.models import Organization
+from people.models import Person
+from people.serializers import PersonSerializer
+from core import images
+from core.models import StoredFile
+
+User = get_user_model()
+
+
+def image_file(name='photo.jpg', size=(3000, 2000), mode='RGB', fmt='JPEG', exif=True):
+    image = Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+    out = io.BytesIO()
+    kwargs = {}
+    if exif:
+        data = Image.Exif()
+        data[0x0112] = 6  # Orientation: rotated 90 degrees
+        data[0x010F] = 'PhoneMaker'
+        kwargs['exif'] = data.tobytes()
+    image.save(out, fmt, **kwargs)
+    return SimpleUploadedFile(name, out.getvalue())
+
+
+class ImagePipelineTestMixin:
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        owner = User.objects.create_user(email='owner@example.com', password='password123')
+        self.org = Organization.objects.create(
+            org_name='Image Org', domain_name='images.example.com', email='org@example.com', owner=owner
+        )
+
+    def person(self, photo=None):
+        return Person.objects.create(
+            organization=self.org, first_name='Photo', last_name='Owner', photo=photo or image_file()
+        )
+
+    def files(self):
+        found = []
+        for root, _, names in os.walk(default_storage.location):
+            found += [os.path.relpath(os.path.join(root, name), default_storage.location) for name in names]
+        return sorted(found)
+
+
+class ProcessImageTest(ImagePipelineTestMixin, TestCase):
+    def test_reencodes_strips_metadata_and_writes_variants(self):
+        person = self.person()
+        raw = person.photo.name
+
+        self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.PROCESSED)
+        person.refresh_from_db()
+
+        self.assertNotEqual(person.photo.name, raw)
+        self.assertTrue(person.photo.name.endswith('.jpg'))
+        # The raw upload is left for gc_media
+        self.assertEqual(StoredFile.objects.get(name=raw).refcount, 0)
+        self.assertEqual(StoredFile.objects.get(name=person.photo.name).refcount, 1)
+        self.assertEqual(person.photo_variants['source'], person.photo.name)
+        with default_storage.open(person.photo.name) as fh:
+            original = Image.open(fh)
+            # Orientation applied, longest side capped, no EXIF left
+            self.assertEqual(original.size, (1365, 2048))
+            self.assertFalse(original.getexif())
+        for name, size in (('small', (64, 64)), ('medium', (256, 256))):
+            with default_storage.open(person.photo_variants['files'][name]) as fh:
+                variant = Image.open(fh)
+                self.assertEqual((variant.format, variant.size), ('WEBP', size))
+
+    def test_is_idempotent(self):
+        person = self.person()
+        images.process('people.Person', person.pk, 'photo')
+        person.refresh_from_db()
+        files, variants = self.files(), person.photo_variants
+
+        self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.UNCHANGED)
+        self.assertEqual(images.process('people.Person', person.pk, 'photo', force=True), images.PROCESSED)
+        person.refresh_from_db()
+        self.assertEqual(person.photo_variants, variants)
+        self.assertEqual(self.files(), files)
+
+    def test_missing_variant_is_rebuilt(self):
+        person = self.person()
+        images.process('people.Person', person.pk, 'photo')
+        person.refresh_from_db()
+        default_storage.purge(person.photo_variants['files']['small'])
+
+        self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.PROCESSED)
+        self.assertTrue(default_storage.exists(person.photo_variants['files']['small']))
+
+    def test_transparency_is_kept_as_png(self):
+        person = self.person(image_file('logo.png', (300, 100), 'RGBA', 'PNG', exif=False))
+        images.process('people.Person', person.pk, 'photo')
+        person.refresh_from_db()
+
+        self.assertTrue(person.photo.name.endswith('.png'))
+        with default_storage.open(person.photo_variants['files']['small']) as fh:
+            self.assertEqual(Image.open(fh).mode, 'RGBA')
+
+    def test_invalid_file_is_removed(self):
+        person = self.person()
+        fake = default_storage.save('profile_photos/fake.png', ContentFile(b'<?php echo 1; ?>'))
+        Person.objects.filter(pk=person.pk).update(photo=fake)
+
+        with self.assertLogs('core.images', 'WARNING'):
+            self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.INVALID)
+        person.refresh_from_db()
+        self.assertFalse(person.photo)
+        self.assertEqual(StoredFile.objects.get(name=fake).refcount, 0)
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_oversized_image_is_rejected(self):
+        person = self.person(image_file(size=(100, 100)))
+        with self.assertLogs('core.images', 'WARNING'):
+            self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.INVALID)
+
+    def test_newer_upload_wins(self):
+        person = self.person()
+        original = person.photo.name
+        load = images.load
+
+        def replaced_meanwhile(data):
+            Person.objects.filter(pk=person.pk).update(photo='profile_photos/newer.jpg')
+            return load(data)
+
+        with mock.patch.object(images, 'load', replaced_meanwhile):
+            self.assertEqual(images.process('people.Person', person.pk, 'photo'), images.SUPERSEDED)
+        # What the task wrote is unreferenced, so gc_media will reclaim it
+        written = StoredFile.objects.exclude(name=original)
+        self.assertEqual([stored.refcount for stored in written], [0, 0, 0])
+
+    def test_serializer_exposes_variant_urls(self):
+        person = self.person()
+        self.assertIsNone(PersonSerializer(person).data['photo_variants'])
+
+        images.process('people.Person', person.pk, 'photo')
+        person.refresh_from_db()
+        variants = PersonSerializer(person).data['photo_variants']
+        self.assertEqual(set(variants), {'small', 'medium'})
+        self.assertTrue(variants['small'].startswith('/media/profile_photos/'))
+
+
+@override_settings(IMAGE_PROCESSING_ENABLED=True)
+class QueueProcessingTest(ImagePipelineTestMixin, TestCase):
+    def test_new_upload_is_queued_after_commit(self):
+        with mock.patch('core.tasks.process_image.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                person = self.person()
+            delay.assert_called_once_with('people.Person', str(person.pk), 'photo')
+
+            images.process('people.Person', person.pk, 'photo')
+            person.refresh_from_db()
+            delay.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                person.first_name = 'Renamed'
+                person.save()
+            delay.assert_not_called()
+
+
+class ProcessImagesCommandTest(ImagePipelineTestMixin, TestCase):
+    def test_backfills_unprocessed_rows(self):
+        first, second = self.person(), self.person()
+        images.process('people.Person', first.pk, 'photo')
+
+        out = StringIO()
+        call_command('process_images', model=['people.Person'], stdout=out)
+        self.assertIn('1 processed, 1 unchanged', out.getvalue())
+        second.refresh_from_db()
+        self.assertEqual(second.photo_variants['source'], second.photo.name)
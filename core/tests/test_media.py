@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from Org.models import Organization, OrganizationProfile
+from people.models import Person
+from core.media import IMMUTABLE_CACHE_CONTROL, RangeNotSatisfiable, clean_name, parse_range
+
+User = get_user_model()
+
+PHOTO = bytes(range(256)) * 4
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-2000', 1000), (990, 999))
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1000))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=1000-', 1000)
+
+    def test_clean_name(self):
+        self.assertEqual(clean_name('profile_photos/a.jpg'), 'profile_photos/a.jpg')
+        self.assertIsNone(clean_name('../settings.py'))
+        self.assertIsNone(clean_name('profile_photos/../../x'))
+        self.assertIsNone(clean_name('.incoming/tmp123'))
+
+
+@override_settings(MEDIA_SERVE_BACKEND='django')
+class MediaViewTest(TestCase):
+    def setUp(self):
+        self.media = media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+        self.user = User.objects.create_user(email='owner@example.com', password='password123')
+        self.org = Organization.objects.create(
+            org_name='Media Org', domain_name='media.example.com', email='org@example.com', owner=self.user
+        )
+        self.user.organization = self.org
+        self.user.save()
+        self.person = Person.objects.create(
+            organization=self.org, first_name='Media', last_name='Person',
+            photo=SimpleUploadedFile('photo.jpg', PHOTO),
+        )
+        self.url = f'/media/{self.person.photo.name}'
+
+        stranger = User.objects.create_user(email='stranger@example.com', password='password123')
+        other = Organization.objects.create(
+            org_name='Other Org', domain_name='other.example.com', email='other@example.com', owner=stranger
+        )
+        stranger.organization = other
+        stranger.save()
+        self.stranger = stranger
+
+    def test_member_gets_file_with_immutable_caching(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), PHOTO)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_other_tenants_and_anonymous_get_404(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+    def test_unreferenced_file_is_not_served(self):
+        self.client.force_login(self.user)
+        name = self.person.photo.name
+        self.assertEqual(self.client.get(f'/media/{name}').status_code, 200)
+        self.person.photo = None
+        self.person.save()
+        self.assertEqual(self.client.get(f'/media/{name}').status_code, 404)
+
+    def test_org_logo(self):
+        profile = OrganizationProfile.objects.create(
+            organization=self.org, logo=SimpleUploadedFile('logo.png', b'\x89PNG logo')
+        )
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f'/media/{profile.logo.name}').status_code, 200)
+
+    def test_range_request(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(PHOTO)}')
+        self.assertEqual(b''.join(response.streaming_content), PHOTO[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(PHOTO)}-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(MEDIA_SERVE_BACKEND='nginx', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_nginx_hands_off_without_body(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.person.photo.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    @override_settings(MEDIA_SERVE_BACKEND='apache')
+    def test_apache_hands_off_the_absolute_path(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertTrue(response['X-Sendfile'].endswith(self.person.photo.name))
+        self.assertEqual(response.content, b'')
+
+    def test_hand_off_quotes_the_name(self):
+        name = 'profile_photos/class photo é.jpg'
+        with open(os.path.join(self.media, name), 'wb') as fh:
+            fh.write(PHOTO)
+        Person.objects.filter(pk=self.person.pk).update(photo=name)
+        self.client.force_login(self.user)
+        with override_settings(MEDIA_SERVE_BACKEND='nginx', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(f'/media/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/profile_photos/class%20photo%20%C3%A9.jpg')
+        with override_settings(MEDIA_SERVE_BACKEND='apache'):
+            response = self.client.get(f'/media/{name}')
+        self.assertTrue(response['X-Sendfile'].endswith('/class%20photo%20%C3%A9.jpg'))
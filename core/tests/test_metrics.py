@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from people.models import Person
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsEndpointTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Metrics Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.client.force_login(self.owner)
+
+    @override_settings(METRICS_PUBLIC=True)
+    def test_request_and_db_metrics(self):
+        before = sample('http_request_duration_seconds_count', view='auth-me', method='GET', status='200')
+        queries = sample('db_queries_total', view='auth-me')
+        self.client.get('/api/v1/auth/me/')
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', view='auth-me', method='GET', status='200'), before + 1
+        )
+        self.assertGreater(sample('db_queries_total', view='auth-me'), queries)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds_bucket{', response.content)
+        self.assertIn(b'view="auth-me"', response.content)
+
+    def test_otp_counters(self):
+        issued = sample('otp_issued_total', flow='otp')
+        failed = sample('otp_verifications_total', flow='otp', result='failure')
+        self.client.post('/api/v1/auth/otp/generate/', {'email': 'new@example.com'}, format='json')
+        self.client.post('/api/v1/auth/otp/verify/', {'email': 'new@example.com', 'otp': '000000'}, format='json')
+        self.assertEqual(sample('otp_issued_total', flow='otp'), issued + 1)
+        self.assertEqual(sample('otp_verifications_total', flow='otp', result='failure'), failed + 1)
+
+    def test_history_writes(self):
+        before = sample('simple_history_records_total', model='people.Person', type='created')
+        Person.objects.create(organization=self.org, first_name="A", last_name="B")
+        self.assertEqual(sample('simple_history_records_total', model='people.Person', type='created'), before + 1)
+
+    @override_settings(METRICS_TOKEN='', METRICS_PUBLIC=False)
+    def test_private_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,86 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from people.models import Person
+from core.profiling import fingerprint, instrument_cache, profile_section, start_profile, end_profile
+
+User = get_user_model()
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_literals_are_normalised(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x''y' AND b = 12 AND c IN (%s, %s,%s)"),
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...)",
+        )
+        self.assertEqual(fingerprint("SELECT 1  FROM t\n WHERE id = %s"), "SELECT ? FROM t WHERE id = %s")
+
+    def test_profile_section_only_records_inside_requests(self):
+        with profile_section('serialize'):
+            pass
+        profile, token = start_profile()
+        try:
+            with profile_section('serialize'):
+                pass
+        finally:
+            end_profile(token)
+        self.assertIn('serialize', profile.sections)
+
+    def test_cache_hits_and_misses(self):
+        cache = instrument_cache(caches['default'])
+        cache.set('profiled', 0)
+        profile, token = start_profile()
+        try:
+            self.assertEqual(cache.get('profiled'), 0)
+            self.assertEqual(cache.get('absent', 'default'), 'default')
+            self.assertEqual(cache.get_many(['profiled', 'absent']), {'profiled': 0})
+        finally:
+            end_profile(token)
+        self.assertEqual((profile.cache_hits, profile.cache_misses), (2, 2))
+
+
+class RequestProfilingMiddlewareTest(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Profiled Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.owner.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        Person.objects.create(user=self.owner, organization=self.org, first_name="Owner", last_name="User")
+        self.client.force_login(self.owner)
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/v1/people/persons/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertRegex(timing, r'total;dur=[\d.]+$')
+
+    def test_structured_log(self):
+        with self.assertLogs('core.profiling', level='INFO') as logs:
+            self.client.get('/api/v1/auth/me/')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'auth-me')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertNotIn('slow_queries', record)
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_queries_are_fingerprinted(self):
+        with self.assertLogs('core.profiling', level='WARNING') as logs:
+            self.client.get('/api/v1/people/persons/')
+        record = logs.records[-1].profile
+        self.assertEqual(logs.records[-1].levelname, 'WARNING')
+        self.assertTrue(record['slow_queries'])
+        self.assertNotIn('Owner', json.dumps(record['slow_queries']))
+
+    @override_settings(REQUEST_PROFILING_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.get('/api/v1/auth/me/')
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,203 @@
+import os
+import time
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework.test import APITestCase
+from Org.models import Organization, OrganizationAdmin
+from Org.models.organization import OrganizationDomain, OrganizationProfile
+from Users.models import Role
+from academic.models import (
+    Faculty, AcademicClass, Course, Subject, Batch, Section, StudentEnrollment, TeacherAssignment
+)
+from people.models import Person, Student, Teacher
+
+User = get_user_model()
+
+
+def api_routes():
+    """
+    Named GET routes of sms.urls as (name, takes_pk) pairs, without the
+    admin site, format-suffix variants, DRF api roots and routes taking
+    arguments other than a pk.
+    """
+    def walk(patterns, prefix=''):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, prefix + str(pattern.pattern))
+            else:
+                yield prefix + str(pattern.pattern), pattern
+
+    routes = {}
+    for path, pattern in walk(get_resolver().url_patterns):
+        if not path.startswith('api/') or 'format' in pattern.pattern.regex.groupindex:
+            continue
+        if not pattern.name or pattern.name == 'api-root':
+            continue
+        if set(pattern.pattern.regex.groupindex) - {'pk'}:
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None)
+        if actions is not None:
+            readable = 'get' in actions
+        else:
+            readable = hasattr(getattr(callback, 'view_class', None), 'get')
+        if readable:
+            routes[pattern.name] = 'pk' in pattern.pattern.regex.groupindex
+    return routes
+
+
+class EndpointQueryCountTest(APITestCase):
+    """
+    Every readable endpoint in sms.urls, requested as an org admin, must run
+    the same number of queries for a small and a large tenant.
+
+    Set QUERY_COUNT_REPORT=<path> to write a per-endpoint table of query
+    counts and timings that can be diffed between commits.
+    """
+    small = 10
+    large = 200
+
+    # Extra query strings for endpoints that need them
+    params = {
+        'check-org': {'domain_name': 'school.example.com'},
+    }
+
+    def setUp(self):
+        # Committed as in production: the stats counters are moved on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner = User.objects.create_user(
+                email="owner@example.com", password="password123", approval_status='APPROVED'
+            )
+            self.org = Organization.objects.create(org_name="Load Org", email="org@example.com", owner=self.owner)
+            self.owner.organization = self.org
+            self.owner.save()
+            self.owner.roles.add(Role.objects.create(name='ORG_ADMIN'))
+            OrganizationAdmin.objects.create_admin(self.owner, self.org)
+            OrganizationDomain.objects.create(organization=self.org, domain='school.example.com')
+            OrganizationProfile.objects.create(organization=self.org)
+            Person.objects.create(user=self.owner, organization=self.org, first_name="Owner", last_name="Admin")
+        self.client.force_login(self.owner)
+        self.seeded = 0
+
+    def seed(self, count):
+        """Grow every model of the tenant to `count` rows using bulk inserts."""
+        org = self.org
+        start, self.seeded = self.seeded, count
+        rows = range(start, count)
+        password = make_password(None)
+
+        users = User.objects.bulk_create([
+            User(email=f"user{i}@example.com", password=password, organization=org, approval_status='APPROVED')
+            for i in rows
+        ])
+        OrganizationAdmin.objects.bulk_create([
+            OrganizationAdmin(user=user, organization=org, role='DEPT_ADMIN') for user in users
+        ])
+        faculties = Faculty.objects.bulk_create([Faculty(organization=org, name=f"Faculty {i}") for i in rows])
+        classes = AcademicClass.objects.bulk_create([
+            AcademicClass(organization=org, name=f"Class {i}", level_order=i) for i in rows
+        ])
+        Course.objects.bulk_create([
+            Course(organization=org, name=f"Course {i}", academic_class=ac_class, faculty=faculty)
+            for i, ac_class, faculty in zip(rows, classes, faculties)
+        ])
+        subjects = Subject.objects.bulk_create([
+            Subject(organization=org, name=f"Subject {i}", academic_class=ac_class)
+            for i, ac_class in zip(rows, classes)
+        ])
+        batches = Batch.objects.bulk_create([
+            Batch(
+                organization=org, name=f"Batch {i}", academic_class=ac_class,
+                start_date="2024-01-01", end_date="2024-12-31"
+            )
+            for i, ac_class in zip(rows, classes)
+        ])
+        sections = Section.objects.bulk_create([
+            Section(organization=org, batch=batch, name=f"Section {i}") for i, batch in zip(rows, batches)
+        ])
+
+        student_persons = Person.objects.bulk_create([
+            Person(organization=org, user=user, first_name=f"S{i}", last_name="Student", email=user.email)
+            for i, user in zip(rows, users)
+        ])
+        students = Student.objects.bulk_create([
+            Student(person=person, admission_number=f"ADM{i}") for i, person in zip(rows, student_persons)
+        ])
+        StudentEnrollment.objects.bulk_create([
+            StudentEnrollment(organization=org, student=student, section=section, roll_number=str(i))
+            for i, student, section in zip(rows, students, sections)
+        ])
+
+        teacher_persons = Person.objects.bulk_create([
+            Person(organization=org, first_name=f"T{i}", last_name="Teacher") for i in rows
+        ])
+        teachers = Teacher.objects.bulk_create([
+            Teacher(person=person, employee_id=f"EMP{i}") for i, person in zip(rows, teacher_persons)
+        ])
+        TeacherAssignment.objects.bulk_create([
+            TeacherAssignment(organization=org, teacher=teacher, subject=subject, section=section)
+            for teacher, subject, section in zip(teachers, subjects, sections)
+        ])
+
+    def urls(self):
+        """Resolve every route, taking detail pks from the first row of the matching list."""
+        routes = api_routes()
+        urls = {}
+        for name, takes_pk in sorted(routes.items()):
+            if not takes_pk:
+                urls[name] = reverse(name)
+                continue
+            list_name = name.rsplit('-', 1)[0] + '-list'
+            response = self.client.get(reverse(list_name))
+            data = response.data
+            results = data['results'] if isinstance(data, dict) else data
+            urls[name] = reverse(name, kwargs={'pk': results[0]['id']})
+        return urls
+
+    def measure(self):
+        # Measure cold: seed() bulk-creates rows, which does not invalidate cached reports
+        cache.clear()
+        measurements = {}
+        for name, url in self.urls().items():
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = self.client.get(url, self.params.get(name, {}))
+                elapsed = (time.perf_counter() - started) * 1000
+            self.assertEqual(response.status_code, 200, f"{name}: {url}")
+            measurements[name] = (len(ctx.captured_queries), elapsed)
+        return measurements
+
+    def write_report(self, small, large):
+        path = os.environ.get('QUERY_COUNT_REPORT')
+        if not path:
+            return
+        header = (
+            f"{'endpoint':<32} {'q@' + str(self.small):>7} {'q@' + str(self.large):>7}"
+            f" {'ms@' + str(self.small):>9} {'ms@' + str(self.large):>9}"
+        )
+        lines = [header, '-' * len(header)]
+        for name in sorted(small):
+            lines.append(
+                f"{name:<32} {small[name][0]:>7} {large[name][0]:>7}"
+                f" {small[name][1]:>9.1f} {large[name][1]:>9.1f}"
+            )
+        with open(path, 'w') as fh:
+            fh.write('\n'.join(lines) + '\n')
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.seed(self.small)
+        small = self.measure()
+        self.seed(self.large)
+        large = self.measure()
+        self.write_report(small, large)
+
+        self.assertTrue(small)
+        growth = {
+            name: (small[name][0], large[name][0])
+            for name in small if small[name][0] != large[name][0]
+        }
+        self.assertEqual(growth, {}, "query count grows with tenant size (small, large)")
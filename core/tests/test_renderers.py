@@ -0,0 +1,106 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from people.models import Person
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class FastJSONRendererCompatibilityTest(SimpleTestCase):
+    """
+    The fast renderer must produce the same bytes as DRF's stdlib renderer.
+    """
+    def assertSameOutput(self, data, accepted_media_type=None):
+        expected = JSONRenderer().render(data, accepted_media_type)
+        actual = FastJSONRenderer().render(data, accepted_media_type)
+        self.assertEqual(actual, expected)
+
+    def test_scalars_and_containers(self):
+        self.assertSameOutput({
+            'str': 'plain', 'int': 42, 'neg': -7, 'float': 1.5, 'bool': True,
+            'none': None, 'list': [1, 'two', None], 'nested': {'a': {'b': []}},
+        })
+
+    def test_uuid_and_temporal_values(self):
+        self.assertSameOutput({
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'utc': datetime.datetime(2024, 5, 1, 10, 30, tzinfo=datetime.timezone.utc),
+            'utc_micro': datetime.datetime(2024, 5, 1, 10, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2024, 5, 1, 10, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=45))),
+            'naive': datetime.datetime(2024, 5, 1, 10, 30),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(8, 15),
+            'now': timezone.now(),
+        })
+
+    def test_decimal_lazy_and_timedelta(self):
+        self.assertSameOutput({
+            'decimal': decimal.Decimal('12.50'),
+            'lazy': _('Approved'),
+            'duration': datetime.timedelta(minutes=3),
+        })
+
+    def test_unicode_and_line_separators(self):
+        self.assertSameOutput({'name': 'Ñandú 名前', 'js': 'a\u2028b\u2029c'})
+
+    def test_non_string_keys(self):
+        self.assertSameOutput({1: 'one', None: 'none'})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back_to_stdlib(self):
+        self.assertSameOutput({'a': [1, 2]}, 'application/json; indent=4')
+
+    def test_wide_integers_fall_back_to_stdlib(self):
+        self.assertSameOutput({'big': 2 ** 70})
+
+    def test_aware_time_still_raises(self):
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render({'t': datetime.time(8, 15, tzinfo=datetime.timezone.utc)})
+
+
+class FastJSONParserCompatibilityTest(SimpleTestCase):
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), 'application/json', {})
+
+    def test_same_result_as_stdlib(self):
+        body = json.dumps({'email': 'a@b.com', 'roles': ['STUDENT'], 'n': 1.5, 'name': 'Ñandú'}).encode()
+        self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_wide_integers(self):
+        self.assertEqual(self.parse(FastJSONParser(), b'{"big": 1180591620717411303424}'), {'big': 2 ** 70})
+
+    def test_invalid_json_raises_parse_error(self):
+        for body in (b'{"a": ', b'{"a": NaN}', b'[Infinity]'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+
+class PersonListRenderingTest(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Render Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        for i in range(5):
+            Person.objects.create(organization=self.org, first_name=f"P{i}", last_name="Render", email=f"p{i}@example.com")
+
+    def test_person_page_matches_stdlib_rendering(self):
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get('/api/v1/people/persons/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, APITestCase
+from Org.models import Organization
+from Users.models import Role
+from Users.serializers import UserDetailSerializer, UserSerializer
+from academic.models import AcademicClass, Batch, Section, Subject, StudentEnrollment, TeacherAssignment
+from academic.serializers import (
+    SectionSerializer, StudentEnrollmentSerializer, TeacherAssignmentSerializer
+)
+from people.models import Person, Student, Teacher, Guardian
+from people.serializers import PersonSerializer
+from core.serializers import CompiledSerializer
+
+User = get_user_model()
+
+
+class ShoutingPersonSerializer(PersonSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['first_name'] = data['first_name'].upper()
+        return data
+
+
+class SectionWithShoutingPeopleSerializer(SectionSerializer):
+    people = ShoutingPersonSerializer(source='organization.person_set', many=True, read_only=True)
+
+    class Meta(SectionSerializer.Meta):
+        fields = ['id', 'name', 'people']
+
+
+class CompiledSerializerTest(APITestCase):
+    """
+    CompiledSerializer must produce exactly what the DRF serializer produces.
+    """
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Compiled Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.owner.roles.add(Role.objects.create(name='ORG_ADMIN'))
+        Person.objects.create(user=self.owner, organization=self.org, first_name="Owner", last_name="User")
+
+        ac_class = AcademicClass.objects.create(organization=self.org, name="Class 10", level_order=10)
+        batch = Batch.objects.create(
+            organization=self.org, name="2024", academic_class=ac_class,
+            start_date="2024-01-01", end_date="2024-12-31"
+        )
+        self.section = Section.objects.create(organization=self.org, batch=batch, name="A")
+        subject = Subject.objects.create(organization=self.org, name="Physics", academic_class=ac_class)
+
+        for i in range(3):
+            user = User.objects.create_user(email=f"s{i}@example.com", password="pwd", organization=self.org)
+            person = Person.objects.create(
+                organization=self.org, user=user, first_name=f"S{i}", last_name="Student",
+                email=f"s{i}@example.com", gender='FEMALE', date_of_birth="2010-01-01"
+            )
+            student = Student.objects.create(person=person, admission_number=f"ADM{i}")
+            StudentEnrollment.objects.create(
+                organization=self.org, student=student, section=self.section, roll_number=str(i)
+            )
+
+        guardian = Person.objects.create(organization=self.org, first_name="G", last_name="Guardian")
+        Guardian.objects.create(person=guardian, student=student, occupation="Farmer")
+
+        teacher_person = Person.objects.create(organization=self.org, first_name="T", last_name="Teacher")
+        teacher = Teacher.objects.create(person=teacher_person, employee_id="EMP1")
+        TeacherAssignment.objects.create(organization=self.org, teacher=teacher, subject=subject, section=self.section)
+
+        self.context = {'request': APIRequestFactory().get('/')}
+
+    def assertCompiledMatches(self, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True, context=self.context).data
+        compiled = CompiledSerializer(serializer_class(queryset, many=True, context=self.context)).many(queryset)
+        self.assertEqual(compiled, [dict(row) for row in expected])
+
+    def test_to_representation_overrides_are_kept(self):
+        self.assertCompiledMatches(ShoutingPersonSerializer, Person.objects.filter(organization=self.org))
+        self.assertCompiledMatches(SectionWithShoutingPeopleSerializer, Section.objects.filter(pk=self.section.pk))
+
+    def test_person_serializer(self):
+        self.assertCompiledMatches(PersonSerializer, Person.objects.filter(organization=self.org))
+
+    def test_user_serializers(self):
+        users = User.objects.filter(organization=self.org)
+        self.assertCompiledMatches(UserDetailSerializer, users)
+        self.assertCompiledMatches(UserSerializer, users)
+
+    def test_academic_serializers(self):
+        self.assertCompiledMatches(SectionSerializer, Section.objects.all())
+        self.assertCompiledMatches(StudentEnrollmentSerializer, StudentEnrollment.objects.all())
+        self.assertCompiledMatches(TeacherAssignmentSerializer, TeacherAssignment.objects.all())
+
+    def test_list_endpoints_match_detail_representation(self):
+        self.client.force_authenticate(user=self.owner)
+        for url, queryset, serializer_class in (
+            ('/api/v1/people/persons/', Person.objects.order_by('first_name'), PersonSerializer),
+            ('/api/v1/academic/enrollments/', StudentEnrollment.objects.all(), StudentEnrollmentSerializer),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            by_id = {str(row['id']): row for row in response.data['results']}
+            self.assertEqual(len(by_id), queryset.count())
+            for instance in queryset:
+                expected = serializer_class(instance, context={'request': response.wsgi_request}).data
+                self.assertEqual(by_id[str(instance.id)], dict(expected))
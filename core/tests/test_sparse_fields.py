@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from Users.models import Role
+from academic.models import AcademicClass, Batch, Section, StudentEnrollment
+from people.models import Person, Student
+
+User = get_user_model()
+
+
+class SparseFieldsetTest(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="password123")
+        self.org = Organization.objects.create(org_name="Sparse Org", email="org@example.com", owner=self.owner)
+        self.owner.organization = self.org
+        self.owner.save()
+        self.owner.roles.add(Role.objects.create(name='ORG_ADMIN'))
+
+        ac_class = AcademicClass.objects.create(organization=self.org, name="Class 1", level_order=1)
+        batch = Batch.objects.create(
+            organization=self.org, name="2024", academic_class=ac_class,
+            start_date="2024-01-01", end_date="2024-12-31"
+        )
+        self.section = Section.objects.create(organization=self.org, batch=batch, name="A")
+        self.client.force_authenticate(user=self.owner)
+
+    def add_students(self, count):
+        for _ in range(count):
+            i = Person.objects.count()
+            user = User.objects.create_user(email=f"s{i}@example.com", password="pwd", organization=self.org)
+            person = Person.objects.create(organization=self.org, user=user, first_name=f"S{i}", last_name="Student")
+            student = Student.objects.create(person=person, admission_number=f"ADM{i}")
+            StudentEnrollment.objects.create(organization=self.org, student=student, section=self.section)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_fields_limits_payload(self):
+        self.add_students(2)
+        response, _ = self.count_queries('/api/v1/people/persons/?fields=id,full_name')
+        for row in response.data['results']:
+            self.assertEqual(set(row), {'id', 'full_name'})
+            self.assertEqual(row['full_name'], f"{row['full_name'].split()[0]} Student")
+
+    def test_include_controls_relations(self):
+        self.add_students(2)
+        response, _ = self.count_queries('/api/v1/people/persons/?include=student_profile')
+        row = response.data['results'][0]
+        self.assertIn('first_name', row)
+        self.assertIn('student_profile', row)
+        for name in ('teacher_profile', 'enrollment_summary', 'user_email'):
+            self.assertNotIn(name, row)
+
+        response, _ = self.count_queries('/api/v1/people/persons/?include=')
+        self.assertNotIn('student_profile', response.data['results'][0])
+
+    def test_dropping_enrollment_summary_removes_its_queries(self):
+        self.add_students(3)
+        _, full = self.count_queries('/api/v1/people/persons/')
+        _, without = self.count_queries('/api/v1/people/persons/?include=student_profile,user_email')
+        self.assertLess(without, full)
+
+    def test_query_count_independent_of_rows(self):
+        self.add_students(2)
+        _, small = self.count_queries('/api/v1/people/persons/')
+        _, small_users = self.count_queries('/api/v1/admin/users/')
+        self.add_students(8)
+        _, large = self.count_queries('/api/v1/people/persons/')
+        _, large_users = self.count_queries('/api/v1/admin/users/')
+        self.assertEqual(small, large)
+        self.assertEqual(small_users, large_users)
+
+    def test_user_and_academic_endpoints(self):
+        self.add_students(1)
+        response, _ = self.count_queries('/api/v1/admin/users/?fields=id,email')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'email'})
+        response, _ = self.count_queries('/api/v1/sys-admin/users/?include=&fields=id,roles,person_profile')
+        self.assertEqual(set(response.data['results'][0]), {'id'})
+        response, _ = self.count_queries('/api/v1/academic/sections/?fields=id,name')
+        self.assertEqual(response.data['results'], [{'id': str(self.section.id), 'name': 'A'}])
+
+    def test_retrieve_supports_fields(self):
+        self.add_students(1)
+        person = Person.objects.first()
+        response, _ = self.count_queries(f'/api/v1/people/persons/{person.id}/?fields=id,email')
+        self.assertEqual(set(response.data), {'id', 'email'})
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get('/api/v1/people/persons/?fields=id,bogus')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', response.data['fields'][0])
+        self.assertIn('full_name', response.data['fields'][0])
+
+        response = self.client.get('/api/v1/people/persons/?include=first_name')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('student_profile', response.data['include'][0])
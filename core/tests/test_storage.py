@@ -0,0 +1,187 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from Org.models import Organization, OrganizationProfile
+from people.models import Person
+from core.models import StoredFile
+
+User = get_user_model()
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        owner = User.objects.create_user(email='owner@example.com', password='password123')
+        self.org = Organization.objects.create(
+            org_name='Storage Org', domain_name='storage.example.com', email='org@example.com', owner=owner
+        )
+
+    def person(self, content=b'same photo bytes'):
+        return Person.objects.create(
+            organization=self.org, first_name='Stored', last_name='Person',
+            photo=SimpleUploadedFile('Photo.JPG', content),
+        )
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def age(self, name, days=2):
+        StoredFile.objects.filter(name=name).update(orphaned_at=timezone.now() - timedelta(days=days))
+
+    def test_identical_uploads_share_one_sharded_file(self):
+        first, second = self.person(), self.person()
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertRegex(first.photo.name, r'^profile_photos/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        digest = re.search(r'([0-9a-f]{64})', first.photo.name).group(1)
+        self.assertTrue(first.photo.name.startswith(f'profile_photos/{digest[:2]}/{digest[2:4]}/'))
+        self.assertEqual(StoredFile.objects.get(name=first.photo.name).refcount, 2)
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(first.photo.name)))), 1)
+
+    def test_same_bytes_in_another_field_directory_are_separate(self):
+        person = self.person()
+        profile = OrganizationProfile.objects.create(
+            organization=self.org, logo=SimpleUploadedFile('logo.jpg', b'same photo bytes')
+        )
+        self.assertTrue(profile.logo.name.startswith('org_logos/'))
+        self.assertNotEqual(profile.logo.name, person.photo.name)
+
+    def test_replacing_and_deleting_rows_update_refcounts(self):
+        first, second = self.person(), self.person()
+        shared = first.photo.name
+
+        first.photo = SimpleUploadedFile('new.jpg', b'another photo')
+        first.save()
+        self.assertEqual(StoredFile.objects.get(name=shared).refcount, 1)
+        self.assertEqual(StoredFile.objects.get(name=first.photo.name).refcount, 1)
+
+        second.delete()
+        stored = StoredFile.objects.get(name=shared)
+        self.assertEqual(stored.refcount, 0)
+        self.assertIsNotNone(stored.orphaned_at)
+        # Still on disk until gc_media runs
+        self.assertTrue(default_storage.exists(shared))
+
+    def test_gc_reclaims_only_old_orphans(self):
+        kept = self.person(b'kept').photo.name
+        orphan = self.person(b'orphan')
+        old = orphan.photo.name
+        orphan.delete()
+        fresh = default_storage.save('profile_photos/unsaved.jpg', ContentFile(b'upload in flight'))
+        self.age(old)
+
+        self.assertIn('Would reclaim 1 files', self.gc('--dry-run'))
+        self.assertTrue(default_storage.exists(old))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIn('Reclaimed 1 files', self.gc())
+        self.assertFalse(default_storage.exists(old))
+        self.assertFalse(StoredFile.objects.filter(name=old).exists())
+        self.assertTrue(default_storage.exists(kept))
+        self.assertTrue(default_storage.exists(fresh))
+
+    def test_gc_recounts_before_deleting(self):
+        person = self.person()
+        name = person.photo.name
+        # Bulk updates bypass the signals and leave a stale count behind
+        StoredFile.objects.filter(name=name).update(refcount=0)
+        self.age(name)
+
+        self.assertIn('Reclaimed 0 files', self.gc())
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 1)
+
+    def test_recount_repairs_drift(self):
+        person = self.person()
+        old = person.photo.name
+        new = default_storage.save('profile_photos/x.jpg', ContentFile(b'bulk replaced'))
+        Person.objects.filter(pk=person.pk).update(photo=new)
+        self.age(old)
+
+        output = self.gc('--recount', '--grace', '0')
+        self.assertIn('2 files corrected', output)
+        self.assertIn('Reclaimed 1 files', output)
+        self.assertEqual(StoredFile.objects.get(name=new).refcount, 1)
+
+    def test_bytes_are_removed_after_commit_unless_uploaded_again(self):
+        orphan = self.person(b'collected')
+        name = orphan.photo.name
+        orphan.delete()
+        self.age(name)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertIn('Reclaimed 1 files', self.gc())
+        # Not purged before commit
+        self.assertTrue(default_storage.exists(name))
+
+        # The same bytes arrive between the row deletion and the purge
+        self.assertEqual(default_storage.save('profile_photos/again.jpg', ContentFile(b'collected')), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(default_storage.exists(name))
+
+    def test_files_of_rolled_back_uploads_are_adopted_and_reclaimed(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            name = self.person(b'rolled back').photo.name
+            raise RuntimeError
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertTrue(default_storage.exists(name))
+        legacy = default_storage.path('profile_photos/legacy.jpg')
+        with open(legacy, 'wb') as fh:
+            fh.write(b'not content addressed')
+
+        self.assertIn('Adopted 0 untracked files', self.gc())
+        past = time.time() - 2 * 86400
+        os.utime(default_storage.path(name), (past, past))
+        self.assertIn('Would adopt 1 untracked files', self.gc('--dry-run'))
+        with self.captureOnCommitCallbacks(execute=True):
+            output = self.gc()
+        self.assertIn('Adopted 1 untracked files', output)
+        self.assertIn('Reclaimed 1 files', output)
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(os.path.exists(legacy))
+
+    def test_deferred_file_fields_release_their_old_name(self):
+        old = self.person(b'old photo').photo.name
+        person = Person.objects.only('id', 'first_name').get(photo=old)
+        person.first_name = 'Renamed'
+        person.save()
+        self.assertEqual(StoredFile.objects.get(name=old).refcount, 1)
+
+        person = Person.objects.defer('photo').get(pk=person.pk)
+        person.photo = SimpleUploadedFile('new.jpg', b'new photo')
+        person.save()
+        self.assertEqual(StoredFile.objects.get(name=old).refcount, 0)
+        self.assertEqual(StoredFile.objects.get(name=person.photo.name).refcount, 1)
+
+        Person.objects.defer('photo').get(pk=person.pk).delete()
+        self.assertEqual(StoredFile.objects.get(name=person.photo.name).refcount, 0)
+
+    def test_reupload_of_an_orphan_restarts_its_grace_period(self):
+        orphan = self.person(b'comes back')
+        name = orphan.photo.name
+        orphan.delete()
+        self.age(name)
+
+        default_storage.save('profile_photos/again.jpg', ContentFile(b'comes back'))
+        self.assertIn('Reclaimed 0 files', self.gc())
+        self.assertTrue(default_storage.exists(name))
@@ -0,0 +1,141 @@
+from unittest import skipUnless
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from core import throttling
+from core.throttling import TokenBucket
+from Org.models import Organization
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - only needed for the Lua script tests
+    fakeredis = None
+
+User = get_user_model()
+
+PLANS = {
+    'free': {'tenant': {'rate': '1/m', 'burst': 2}, 'user': {'rate': '1/m', 'burst': 10}},
+    'standard': {'tenant': {'rate': '1/m', 'burst': 5}, 'user': {'rate': '1/m', 'burst': 3}},
+}
+ANON = {'auth': {'rate': '1/m', 'burst': 2}, 'org_check': {'rate': '1/m', 'burst': 3}}
+
+
+class TokenBucketCases:
+    def bucket(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        cache.clear()
+
+    def test_burst_then_refill(self):
+        bucket = self.bucket()
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            self.assertEqual([bucket.take('b', 1, 3) for _ in range(3)], [0, 0, 0])
+            self.assertEqual(bucket.take('b', 1, 3), 1)
+        with mock.patch('core.throttling.time.time', return_value=1002.0):
+            self.assertEqual([bucket.take('b', 1, 3) for _ in range(3)], [0, 0, 1])
+
+    def test_wait_reflects_rate(self):
+        bucket = self.bucket()
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            bucket.take('slow', 1 / 60, 1)
+            self.assertEqual(bucket.take('slow', 1 / 60, 1), 60)
+
+    async def test_async_take_shares_the_buckets(self):
+        bucket = self.bucket()
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            self.assertEqual([await bucket.atake('b', 1, 3) for _ in range(2)], [0, 0])
+            self.assertEqual(bucket.take('b', 1, 3), 0)
+            self.assertEqual(await bucket.atake('b', 1, 3), 1)
+
+
+class CacheTokenBucketTest(TokenBucketCases, SimpleTestCase):
+    def bucket(self):
+        return TokenBucket()
+
+
+@skipUnless(fakeredis, 'fakeredis[lua] is not installed')
+class RedisTokenBucketTest(TokenBucketCases, SimpleTestCase):
+    def bucket(self):
+        server = fakeredis.FakeServer()
+        return TokenBucket(redis=fakeredis.FakeRedis(server=server),
+                           async_redis=lambda: fakeredis.FakeAsyncRedis(server=server))
+
+    async def test_async_take_runs_no_thread(self):
+        bucket = self.bucket()
+        with mock.patch('asgiref.sync.SyncToAsync.__call__', side_effect=AssertionError('thread hop')):
+            self.assertEqual(await bucket.atake('b', 1, 3), 0)
+
+
+@override_settings(API_THROTTLE_ENABLED=True, API_THROTTLE_PLANS=PLANS, API_THROTTLE_ANON=ANON)
+class ThrottleViewsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        throttling._plans.clear()
+        self.orgs = []
+        for name, plan in (('a', 'standard'), ('b', 'standard'), ('c', 'free')):
+            owner = User.objects.create_user(email=f"owner@{name}.example.com", password="password123")
+            org = Organization.objects.create(org_name=name, email=f"org@{name}.example.com", owner=owner, plan=plan)
+            owner.organization = org
+            owner.save()
+            self.orgs.append(org)
+
+    def get_persons(self, user):
+        self.client.force_login(user)
+        return self.client.get('/api/v1/people/persons/')
+
+    def test_user_and_tenant_buckets(self):
+        owner = self.orgs[0].owner
+        colleague = User.objects.create_user(email="colleague@a.example.com", password="x", organization=self.orgs[0])
+        statuses = [self.get_persons(owner).status_code for _ in range(4)]
+        # Standard plan: 3 requests per user
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        # The colleague still has user tokens, the tenant bucket (5) runs dry
+        statuses = [self.get_persons(colleague).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.get_persons(colleague)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+        # Another tenant is not affected
+        self.assertEqual(self.get_persons(self.orgs[1].owner).status_code, 200)
+
+    def test_plan_limits(self):
+        owner = self.orgs[2].owner
+        statuses = [self.get_persons(owner).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_rejection_costs_no_queries(self):
+        for _ in range(3):
+            self.client.get('/api/v1/orgs/check/', {'domain_name': 'missing.example.com'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/orgs/check/', {'domain_name': 'missing.example.com'})
+        self.assertEqual(response.status_code, 429)
+
+        owner = self.orgs[2].owner
+        self.client.force_login(owner)
+        self.client.get('/api/v1/auth/me/')
+        self.client.get('/api/v1/auth/me/')
+        # Only the session and user lookups of authentication remain; the
+        # organization plan is cached in-process.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/auth/me/')
+        self.assertEqual(response.status_code, 429)
+
+    def test_anonymous_buckets_are_separate(self):
+        for _ in range(2):
+            self.client.post('/api/v1/auth/login/', {'email': 'x@example.com', 'password': 'bad'}, format='json')
+        response = self.client.post('/api/v1/auth/otp/generate/', {'email': 'x@example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        # orgs/check/ has its own bucket
+        response = self.client.get('/api/v1/orgs/check/', {'domain_name': 'missing.example.com'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(API_THROTTLE_ENABLED=False)
+    def test_can_be_disabled(self):
+        for _ in range(5):
+            response = self.client.get('/api/v1/orgs/check/', {'domain_name': 'missing.example.com'})
+        self.assertEqual(response.status_code, 404)
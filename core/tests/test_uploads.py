@@ -0,0 +1,128 @@
+import io
+import os
+import shutil
+import tempfile
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser
+from django.test import SimpleTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from rest_framework import status
+from rest_framework.test import APITestCase
+from Org.models import Organization
+from people.models import Person
+from core.uploads import IMAGE_TYPES, UnsupportedUploadType, UploadTooLarge, ValidatingUploadHandler, sniff
+
+User = get_user_model()
+
+
+def png_bytes(size=(100, 100)):
+    out = io.BytesIO()
+    Image.new('RGB', size, (10, 120, 10)).save(out, 'PNG')
+    return out.getvalue()
+
+
+class CountingStream(io.BytesIO):
+    """Request body that records how much of it the parser read."""
+    consumed = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed += len(data)
+        return data
+
+
+class FakeRequest:
+    resolver_match = None
+
+
+class SniffTest(SimpleTestCase):
+    def test_known_signatures(self):
+        self.assertEqual(sniff(png_bytes()[:16]), 'image/png')
+        self.assertEqual(sniff(b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01'), 'image/jpeg')
+        self.assertEqual(sniff(b'RIFF\x10\x00\x00\x00WEBPVP8 '), 'image/webp')
+        self.assertIsNone(sniff(b'RIFF\x10\x00\x00\x00WAVEfmt '))
+        self.assertEqual(sniff(b'name,email\nJo,jo@'), 'text/plain')
+        self.assertIsNone(sniff(b'MZ\x90\x00\x03\x00\x00\x00\x04\x00\x00\x00\xff\xff\x00\x00'))
+
+
+@override_settings(
+    UPLOAD_MAX_FILE_SIZE=64 * 1024, UPLOAD_MAX_REQUEST_SIZE=50 * 1024 * 1024, UPLOAD_ALLOWED_TYPES=IMAGE_TYPES
+)
+class ValidatingUploadHandlerTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        settings = override_settings(FILE_UPLOAD_TEMP_DIR=temp_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def parse(self, data):
+        body = encode_multipart(BOUNDARY, data)
+        self.stream = CountingStream(body)
+        request = FakeRequest()
+        request.upload_handlers = [ValidatingUploadHandler(request), TemporaryFileUploadHandler(request)]
+        meta = {'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': str(len(body))}
+        return MultiPartParser(meta, self.stream, request.upload_handlers).parse()
+
+    def test_accepted_file_streams_to_disk(self):
+        post, files = self.parse({'name': 'x', 'photo': SimpleUploadedFile('a.png', png_bytes())})
+        self.assertEqual(post['name'], 'x')
+        self.assertTrue(files['photo'].temporary_file_path())
+        files['photo'].close()
+
+    def test_wrong_type_is_refused_from_the_first_chunk(self):
+        payload = b'<html>' + b'x' * (10 * 1024 * 1024)
+        with self.assertRaises(UnsupportedUploadType), override_settings(UPLOAD_MAX_FILE_SIZE=20 * 1024 * 1024):
+            self.parse({'photo': SimpleUploadedFile('a.png', payload, content_type='image/png')})
+        # Stopped after the first chunks, not at the end of the 10MB body
+        self.assertLess(self.stream.consumed, 1024 * 1024)
+
+    @override_settings(UPLOAD_ALLOWED_TYPES=None)
+    def test_any_type_without_an_allow_list(self):
+        _, files = self.parse({'report': SimpleUploadedFile('report.csv', b'name,email\n')})
+        self.assertEqual(files['report'].read(), b'name,email\n')
+        files['report'].close()
+
+    def test_oversized_file_is_refused_while_streaming(self):
+        payload = png_bytes() + b'\x00' * (10 * 1024 * 1024)
+        with self.assertRaises(UploadTooLarge):
+            self.parse({'photo': SimpleUploadedFile('a.png', payload)})
+        self.assertLess(self.stream.consumed, 1024 * 1024)
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=1024)
+    def test_oversized_request_is_refused_before_reading(self):
+        with self.assertRaises(UploadTooLarge):
+            self.parse({'photo': SimpleUploadedFile('a.png', png_bytes() + os.urandom(4096))})
+        self.assertEqual(self.stream.consumed, 0)
+
+
+class UploadEndpointTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='password123')
+        org = Organization.objects.create(
+            org_name='Upload Org', domain_name='uploads.example.com', email='org@example.com', owner=self.user
+        )
+        self.user.organization = org
+        self.user.save()
+        Person.objects.create(user=self.user, organization=org, first_name='Up', last_name='Loader')
+        self.client.force_authenticate(self.user)
+
+    def test_disguised_file_gets_415(self):
+        upload = SimpleUploadedFile('photo.png', b'#!/bin/sh\nrm -rf /\n', content_type='image/png')
+        response = self.client.patch('/api/v1/profile/me/', {'photo': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=1024)
+    def test_large_file_gets_413(self):
+        upload = SimpleUploadedFile('photo.png', png_bytes() + os.urandom(4096), content_type='image/png')
+        response = self.client.patch('/api/v1/profile/me/', {'photo': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=1024)
+    def test_refusals_outside_drf_are_client_errors(self):
+        upload = SimpleUploadedFile('photo.png', png_bytes() + os.urandom(4096), content_type='image/png')
+        response = self.client.post('/admin/login/', {'username': 'x', 'photo': upload})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,255 @@
+"""
+Token-bucket API throttling.
+
+Every bucket holds up to `burst` tokens and refills at `rate`; a request
+takes one token. Buckets live in the default cache. With django-redis a
+check is a single Lua script (HMGET, plus HSET/PEXPIRE when the request is
+allowed), so a rejected request costs one Redis round trip and no database
+work. Other cache backends run the same arithmetic under a process lock
+(see core.cache_scripts). Async views check the buckets with
+`aallow_request()`, which awaits redis.asyncio and the async ORM instead
+of blocking the event loop.
+
+Limits come from settings:
+
+    API_THROTTLE_PLANS = {
+        '<plan>': {'tenant': {'rate': '50/s', 'burst': 300}, 'user': {...}},
+    }
+    API_THROTTLE_ANON = {'auth': {'rate': '10/m', 'burst': 20}, 'org_check': {...}}
+
+The plan is Organization.plan, cached per process for
+API_THROTTLE_PLAN_CACHE_SECONDS.
+"""
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+from core.cache_scripts import RedisScripts, alocked
+
+TOKEN_BUCKET_SCRIPT = """
+-- KEYS: bucket
+-- ARGV: tokens per ms, burst, now ms
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+if tokens < 1 then
+    return math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate))
+return 0
+"""
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'100/m' -> tokens per second."""
+    num, period = rate.split('/')
+    return int(num) / PERIODS[period[0]]
+
+
+class TokenBucket:
+    """Token buckets in a cache; take() returns the wait in seconds, 0 if allowed."""
+    _lock = threading.Lock()
+
+    def __init__(self, alias='default', redis=None, async_redis=None):
+        self.cache = caches[alias]
+        self.scripts = RedisScripts.for_cache(alias, [TOKEN_BUCKET_SCRIPT], redis, async_redis)
+
+    def take(self, key, rate, burst):
+        per_ms = rate / 1000
+        now = int(time.time() * 1000)
+        if self.scripts is not None:
+            wait_ms = self.scripts.run(TOKEN_BUCKET_SCRIPT, [self.cache.make_key(key)], [per_ms, burst, now])
+        else:
+            with self._lock:
+                wait_ms, bucket = self._spend(self.cache.get(key), per_ms, burst, now)
+                if bucket:
+                    self.cache.set(key, bucket, timeout=math.ceil(burst / per_ms / 1000))
+        return math.ceil(int(wait_ms) / 1000)
+
+    async def atake(self, key, rate, burst):
+        per_ms = rate / 1000
+        now = int(time.time() * 1000)
+        if self.scripts is not None:
+            wait_ms = await self.scripts.arun(TOKEN_BUCKET_SCRIPT, [self.cache.make_key(key)], [per_ms, burst, now])
+        else:
+            async with alocked(self._lock):
+                wait_ms, bucket = self._spend(await self.cache.aget(key), per_ms, burst, now)
+                if bucket:
+                    await self.cache.aset(key, bucket, timeout=math.ceil(burst / per_ms / 1000))
+        return math.ceil(int(wait_ms) / 1000)
+
+    @staticmethod
+    def _spend(bucket, per_ms, burst, now):
+        # The script above for other cache backends: (wait ms, bucket to store)
+        tokens, ts = bucket or (burst, now)
+        tokens = min(burst, tokens + max(0, now - ts) * per_ms)
+        if tokens < 1:
+            return math.ceil((1 - tokens) / per_ms), None
+        return 0, (tokens - 1, now)
+
+
+_plans = {}
+
+
+def organization_plan(organization_id):
+    """Organization.plan, cached in-process so throttling needs no query per request."""
+    cached = _plans.get(organization_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    from Org.models import Organization
+    plan = Organization.objects.filter(pk=organization_id).values_list('plan', flat=True).first()
+    return _remember_plan(organization_id, plan)
+
+
+async def aorganization_plan(organization_id):
+    cached = _plans.get(organization_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    from Org.models import Organization
+    plan = await Organization.objects.filter(pk=organization_id).values_list('plan', flat=True).afirst()
+    return _remember_plan(organization_id, plan)
+
+
+def _remember_plan(organization_id, plan):
+    ttl = getattr(settings, 'API_THROTTLE_PLAN_CACHE_SECONDS', 60)
+    _plans[organization_id] = (plan, time.monotonic() + ttl)
+    return plan
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses return the bucket key and its (rate, burst)
+    limit, or None to skip throttling the request.
+    """
+    bucket = None
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError('.get_bucket_key() must be overridden')
+
+    def get_limit(self, request, view):
+        raise NotImplementedError('.get_limit() must be overridden')
+
+    async def aget_limit(self, request, view):
+        return self.get_limit(request, view)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if self.skip(request):
+            return True
+        key = self.get_bucket_key(request, view)
+        limit = key and self.get_limit(request, view)
+        if not limit:
+            return True
+        return self.allowed(request, self.get_bucket().take(key, parse_rate(limit['rate']), limit['burst']))
+
+    async def aallow_request(self, request, view):
+        """allow_request() for AsyncAPIView, without blocking the event loop."""
+        self.wait_seconds = None
+        if self.skip(request):
+            return True
+        key = self.get_bucket_key(request, view)
+        limit = key and await self.aget_limit(request, view)
+        if not limit:
+            return True
+        return self.allowed(request, await self.get_bucket().atake(key, parse_rate(limit['rate']), limit['burst']))
+
+    @staticmethod
+    def skip(request):
+        if not getattr(settings, 'API_THROTTLE_ENABLED', True):
+            return True
+        # DRF asks every throttle; once one refuses, the others must not
+        # spend tokens on a request that is rejected anyway.
+        return getattr(request, '_token_bucket_refused', False)
+
+    @staticmethod
+    def get_bucket():
+        if TokenBucketThrottle.bucket is None:
+            TokenBucketThrottle.bucket = TokenBucket()
+        return TokenBucketThrottle.bucket
+
+    def allowed(self, request, wait):
+        if wait:
+            self.wait_seconds = wait
+            request._token_bucket_refused = True
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class PlanRateThrottle(TokenBucketThrottle):
+    """Limits from API_THROTTLE_PLANS[<organization plan>][scope]."""
+    scope = None
+
+    def get_limit(self, request, view):
+        return self.plan_limit(organization_plan(request.user.organization_id))
+
+    async def aget_limit(self, request, view):
+        return self.plan_limit(await aorganization_plan(request.user.organization_id))
+
+    async def aallow_request(self, request, view):
+        # The lazy request.user would load the session user synchronously
+        request.user = await request.auser()
+        return await super().aallow_request(request, view)
+
+    def plan_limit(self, plan):
+        plans = settings.API_THROTTLE_PLANS
+        return (plans.get(plan) or plans['standard']).get(self.scope)
+
+
+class TenantRateThrottle(PlanRateThrottle):
+    """
+    One bucket per organization, shared by all of its users. List it after
+    UserRateThrottle so requests refused per user leave it untouched.
+    """
+    scope = 'tenant'
+
+    def get_bucket_key(self, request, view):
+        if not request.user.is_authenticated or not request.user.organization_id:
+            return None
+        return f'throttle:tenant:{request.user.organization_id}'
+
+
+class UserRateThrottle(PlanRateThrottle):
+    """One bucket per user, so one user cannot drain the tenant bucket alone."""
+    scope = 'user'
+
+    def get_bucket_key(self, request, view):
+        if not request.user.is_authenticated or not request.user.organization_id:
+            return None
+        return f'throttle:user:{request.user.pk}'
+
+
+class AnonRateThrottle(TokenBucketThrottle):
+    """
+    Per-client-IP buckets for the unauthenticated endpoints, one set per
+    scope in API_THROTTLE_ANON. Never reads request.user, so it adds no
+    database work.
+    """
+    scope = None
+
+    def get_bucket_key(self, request, view):
+        return f'throttle:{self.scope}:{self.get_ident(request)}'
+
+    def get_limit(self, request, view):
+        return settings.API_THROTTLE_ANON.get(self.scope)
+
+
+class AuthRateThrottle(AnonRateThrottle):
+    scope = 'auth'
+
+
+class OrgCheckRateThrottle(AnonRateThrottle):
+    scope = 'org_check'
@@ -0,0 +1,118 @@
+"""
+Streaming multipart uploads with early validation.
+
+With FILE_UPLOAD_HANDLERS set to ValidatingUploadHandler followed by
+TemporaryFileUploadHandler, an uploaded file is written to disk chunk by
+chunk (FILE_UPLOAD_TEMP_DIR) and never held in worker memory, so memory
+per request stays at one chunk however large or numerous the uploads.
+
+ValidatingUploadHandler sees every chunk before it reaches the disk and
+stops reading the request as soon as it can tell the upload is refused:
+
+- a Content-Length above the request limit is refused before any byte of
+  the body is read;
+- the running size of each file is checked on every chunk;
+- for views that accept only some types (`upload_allowed_types`, e.g.
+  IMAGE_TYPES), the type is sniffed from the first bytes of each file,
+  ignoring the client's claimed content type and file name.
+
+The handler runs for every request, DRF or not (the admin, plain Django
+views), so refusals are Django's SuspiciousOperation subclasses: a 400
+anywhere, which core.exceptions turns into 413 (UploadTooLarge) or 415
+(UnsupportedUploadType) for API views. Limits come from
+UPLOAD_MAX_FILE_SIZE, UPLOAD_MAX_REQUEST_SIZE and UPLOAD_ALLOWED_TYPES
+(None: any type); a view can override them with `upload_max_file_size`,
+`upload_max_request_size` and `upload_allowed_types` attributes.
+"""
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, SuspiciousOperation
+from django.core.files.uploadhandler import FileUploadHandler
+
+# (content type, [(offset, bytes)]): all parts must match
+SIGNATURES = [
+    ('image/jpeg', [(0, b'\xff\xd8\xff')]),
+    ('image/png', [(0, b'\x89PNG\r\n\x1a\n')]),
+    ('image/gif', [(0, b'GIF87a')]),
+    ('image/gif', [(0, b'GIF89a')]),
+    ('image/webp', [(0, b'RIFF'), (8, b'WEBP')]),
+    ('application/pdf', [(0, b'%PDF-')]),
+    # .xlsx/.docx are zip archives
+    ('application/zip', [(0, b'PK\x03\x04')]),
+]
+# Bytes needed to sniff any type above
+SNIFF_BYTES = 16
+
+# `upload_allowed_types` of the views taking photos and logos
+IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/webp', 'image/gif']
+
+
+class UploadTooLarge(RequestDataTooBig):
+    pass
+
+
+class UnsupportedUploadType(SuspiciousOperation):
+    pass
+
+
+def sniff(head):
+    """Content type of a file from its first bytes, or None if unrecognised."""
+    for content_type, parts in SIGNATURES:
+        if all(head[offset:offset + len(part)] == part for offset, part in parts):
+            return content_type
+    if b'\x00' not in head:
+        try:
+            head.decode('utf-8')
+        except UnicodeDecodeError as exc:
+            # A multi-byte character cut at the end of the sample is fine
+            if exc.start < len(head) - 3:
+                return None
+        return 'text/plain'
+    return None
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """Checks size and type of each uploaded file while it streams in; stores nothing."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        view = getattr(getattr(getattr(request, 'resolver_match', None), 'func', None), 'cls', None)
+        self.max_file_size = getattr(view, 'upload_max_file_size', None) or settings.UPLOAD_MAX_FILE_SIZE
+        self.max_request_size = getattr(view, 'upload_max_request_size', None) or settings.UPLOAD_MAX_REQUEST_SIZE
+        self.allowed_types = getattr(view, 'upload_allowed_types', None) or settings.UPLOAD_ALLOWED_TYPES
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_request_size:
+            raise UploadTooLarge(f'Request body exceeds {self.max_request_size} bytes.')
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.head = b'' if self.allowed_types is not None else None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_file_size:
+            self.abort(UploadTooLarge(f'{self.file_name} exceeds {self.max_file_size} bytes.'))
+        if self.head is not None:
+            self.head += raw_data[:SNIFF_BYTES]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.head is not None:
+            self.check_type()
+        return None
+
+    def check_type(self):
+        content_type = sniff(self.head[:SNIFF_BYTES])
+        self.head = None
+        if content_type not in self.allowed_types:
+            self.abort(UnsupportedUploadType(f'{self.file_name} is not an accepted file type.'))
+
+    def abort(self, exc):
+        # Let the other handlers drop their partial file before the parser stops
+        for handler in getattr(self.request, 'upload_handlers', ()):
+            if handler is not self:
+                handler.upload_interrupted()
+        raise exc
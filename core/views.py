@@ -0,0 +1,70 @@
+import hmac
+from celery.result import AsyncResult
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from Org.permissions import IsOrganizationAdmin
+from Users.authentication import CsrfExemptSessionAuthentication
+from core import media, metrics
+
+
+def metrics_view(request):
+    """
+    Prometheus exposition endpoint. When METRICS_TOKEN is set, scrapers
+    must send it as `Authorization: Bearer <token>`; without one, only
+    METRICS_PUBLIC deployments serve metrics.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f'Bearer {token}'):
+            return JsonResponse({'error': 'Invalid metrics token.'}, status=401)
+    elif not getattr(settings, 'METRICS_PUBLIC', False):
+        return JsonResponse({'error': 'Set METRICS_TOKEN to enable metrics.'}, status=403)
+
+    if metrics.prometheus_client is None:
+        return JsonResponse({'error': 'prometheus_client is not installed.'}, status=503)
+
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
+@require_safe
+def media_view(request, path):
+    """
+    Serve an uploaded file to members of the organization owning it.
+    Anything else, including anonymous requests, gets a 404 so file names
+    cannot be probed. See core/media.py for the delivery backends.
+    """
+    name = media.clean_name(path)
+    if name is None or not media.can_access(request.user, name):
+        raise Http404('File not found.')
+    return media.serve(request, name)
+
+
+class ExportResultView(APIView):
+    """
+    Status of a background export (see core.mixins.ExportMixin): 202 while
+    it runs, 200 with status FAILURE if it failed and, once it has
+    finished, the file itself, handed off like any other media.
+    """
+    authentication_classes = [CsrfExemptSessionAuthentication]
+    permission_classes = [IsOrganizationAdmin]
+
+    def get(self, request, task_id):
+        result = AsyncResult(task_id)
+        if result.failed():
+            # The poll itself worked: the export's failure is its status
+            return Response({'status': result.status, 'error': 'Export failed.'})
+        if not result.successful():
+            return Response({'status': result.status}, status=status.HTTP_202_ACCEPTED)
+
+        export = result.result
+        if export['organization'] != str(request.user.organization_id):
+            return Response({'error': 'Export not found.'}, status=status.HTTP_404_NOT_FOUND)
+        response = media.serve(request, export['name'])
+        response['Content-Disposition'] = f'attachment; filename="{export["filename"]}"'
+        return response
@@ -29,6 +29,8 @@ class Person(TenantModel):
     )
     address = models.TextField(null=True, blank=True)
     photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    # Re-encoded photo and its thumbnails, written by core.images
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -44,7 +46,7 @@ class Person(TenantModel):
     )
     is_active = models.BooleanField(default=True)
 
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=['photo_variants'])
 
     def clean(self):
         super().clean()
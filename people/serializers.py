@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import ImageVariantsField
 from people.models import Person, Student, Teacher, Employee, Guardian, Owner
 
 
@@ -32,6 +33,7 @@ class PersonSerializer(serializers.ModelSerializer):
     user_id = serializers.SerializerMethodField()
     full_name = serializers.SerializerMethodField()
     enrollment_summary = serializers.SerializerMethodField()
+    photo_variants = ImageVariantsField()
     
     student_profile = StudentSerializer(read_only=True)
     teacher_profile = TeacherSerializer(read_only=True)
@@ -42,7 +44,7 @@ class PersonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Person
         fields = [
-            'id', 'first_name', 'last_name', 'full_name', 'email', 'photo',
+            'id', 'first_name', 'last_name', 'full_name', 'email', 'photo', 'photo_variants',
             'phone_number', 'date_of_birth', 'gender', 'address',
             'is_claimed', 'is_active',
             'user_id', 'user_email',
@@ -53,6 +55,12 @@ class PersonSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'is_claimed', 'created_at', 'updated_at',
                             'user_email', 'user_id', 'full_name', 'enrollment_summary']
+        # Relations read by the method fields (see core.prefetch)
+        relation_paths = {
+            'user_email': ['user'],
+            'user_id': ['user'],
+            'enrollment_summary': ['student_profile__enrollments__section__batch__academic_class'],
+        }
 
     def get_user_email(self, obj):
         return obj.user.email if obj.user else None
@@ -67,9 +75,13 @@ class PersonSerializer(serializers.ModelSerializer):
         """Returns list of batch/section enrollments for this person (if Student)."""
         try:
             if hasattr(obj, 'student_profile'):
-                enrollments = obj.student_profile.enrollments.select_related(
-                    'section__batch__academic_class'
-                ).all()
+                student = obj.student_profile
+                if 'enrollments' in getattr(student, '_prefetched_objects_cache', {}):
+                    enrollments = student.enrollments.all()
+                else:
+                    enrollments = student.enrollments.select_related(
+                        'section__batch__academic_class'
+                    ).all()
                 return [
                     {
                         'enrollment_id': str(e.id),
@@ -11,7 +11,10 @@ from Users.authentication import CsrfExemptSessionAuthentication
 from people.serializers import PersonSerializer
 from Org.permissions import IsOrganizationAdmin
 from academic.models import StudentEnrollment, Section
-from academic.serializers import StudentEnrollmentSerializer
+from academic.serializers import SectionWaitlistEntrySerializer, StudentEnrollmentSerializer
+from academic.services import EnrollmentService
+from core.mixins import CompiledListMixin, ExportMixin, SparseFieldsetMixin
+from core.uploads import IMAGE_TYPES
 
 
 from people.serializers import (
@@ -22,6 +25,8 @@ from people.serializers import (
 class ProfileSetupView(APIView):
     authentication_classes = [CsrfExemptSessionAuthentication]
     permission_classes = [IsAuthenticated]
+    # Profile photos (see core/uploads.py)
+    upload_allowed_types = IMAGE_TYPES
 
     def post(self, request):
         try:
@@ -94,14 +99,16 @@ class ProfileSetupView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PersonViewSet(viewsets.ModelViewSet):
+class PersonViewSet(ExportMixin, SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     Full CRUD for People (students, teachers, staff, etc.) within the organization.
     Supports filtering by person_type (STUDENT, TEACHER, STAFF, ...), search, and ordering.
+    Supports sparse responses via ?fields= and ?include= (see SparseFieldsetMixin).
 
     Extra actions:
       POST   /{id}/link-user/    — Link a CustomUser account to this Person
       DELETE /{id}/link-user/    — Unlink the user account from this Person
+      GET    /export/            — CSV/XLSX export of every person (see ExportMixin)
     """
     serializer_class = PersonSerializer
     authentication_classes = [CsrfExemptSessionAuthentication]
@@ -109,17 +116,22 @@ class PersonViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_active', 'is_claimed', 'gender']
     search_fields = ['first_name', 'last_name', 'email', 'phone_number']
+    upload_allowed_types = IMAGE_TYPES
     ordering_fields = ['first_name', 'last_name', 'created_at']
     ordering = ['first_name']
+    field_dependencies = {
+        'full_name': ['first_name', 'last_name'],
+    }
+    export_name = 'persons'
 
     def get_queryset(self):
         user = self.request.user
         if not user.organization:
             return Person.objects.none()
-        return Person.objects.filter(organization=user.organization).select_related('user')
+        return Person.objects.filter(organization=user.organization)
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'link_user']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'link_user', 'export']:
             return [IsOrganizationAdmin()]
         return [IsAuthenticated()]
 
@@ -180,7 +192,9 @@ class StudentViewSet(PersonViewSet):
     Extra actions:
       POST   /{id}/enroll/    — Enroll student into a section
       DELETE /{id}/enroll/    — Remove an existing enrollment
+      GET    /export/         — One row per student and enrollment
     """
+    export_name = 'students'
 
     def get_queryset(self):
         user = self.request.user
@@ -190,7 +204,7 @@ class StudentViewSet(PersonViewSet):
         return Person.objects.filter(
             organization=user.organization,
             student_profile__isnull=False
-        ).select_related('user', 'student_profile')
+        )
 
     def perform_create(self, serializer):
         with transaction.atomic():
@@ -202,7 +216,10 @@ class StudentViewSet(PersonViewSet):
     def enroll(self, request, pk=None):
         """
         POST: Enroll this student into a section.
-              Body: { "section": "<uuid>", "roll_number": "S001" (optional) }
+              Body: { "section": "<uuid>", "roll_number": "S001" (optional),
+                      "waitlist": true (optional) }
+              A full section answers 409, or with "waitlist" adds the
+              student to the section's waitlist (202).
 
         DELETE: Remove an existing enrollment.
                 Body: { "enrollment_id": "<uuid>" }
@@ -222,7 +239,7 @@ class StudentViewSet(PersonViewSet):
                     student=student.student_profile,
                     organization=request.user.organization
                 )
-                enrollment.delete()
+                EnrollmentService.withdraw(enrollment)
                 return Response({'message': 'Enrollment removed successfully.'})
             except StudentEnrollment.DoesNotExist:
                 return Response(
@@ -257,12 +274,18 @@ class StudentViewSet(PersonViewSet):
             )
 
         roll_number = request.data.get('roll_number', '')
-        enrollment = StudentEnrollment.objects.create(
+        enrollment, waitlist_entry = EnrollmentService.enroll(
             student=student.student_profile,
             section=section,
+            organization=request.user.organization,
             roll_number=roll_number,
-            organization=request.user.organization
+            waitlist=bool(request.data.get('waitlist')),
         )
+        if enrollment is None:
+            return Response({
+                'message': 'Section is full; student added to the waitlist.',
+                'waitlist_entry': SectionWaitlistEntrySerializer(waitlist_entry).data
+            }, status=status.HTTP_202_ACCEPTED)
 
         return Response({
             'message': 'Student enrolled successfully.',
@@ -0,0 +1,127 @@
+"""
+Database connection settings per process role.
+
+DB_CONNECTION_MODE selects how connections are managed:
+
+- 'pool' (psycopg 3 native pool, needs psycopg[pool]): every process keeps
+  its own pool, sized per role, with health checks on checkout and
+  connections recycled after DB_POOL_MAX_LIFETIME seconds.
+- 'persistent' (default): one connection per thread kept for
+  DB_CONN_MAX_AGE_<ROLE> seconds and health-checked before reuse.
+- 'per-request': Django's default, a fresh connection per request.
+
+Process roles are 'web' (gunicorn/uvicorn/runserver), 'celery' and
+'command' (other manage.py commands). They are detected from argv and
+can be forced with DB_PROCESS_ROLE. Pool sizes come from
+DB_POOL_MIN_SIZE_<ROLE> / DB_POOL_MAX_SIZE_<ROLE>.
+
+Setting DB_REPLICA_HOST adds a 'replica' alias (same credentials and
+connection mode unless DB_REPLICA_* overrides them) that
+core.db_router.ReplicaRouter reads from.
+"""
+import copy
+import os
+import sys
+
+MODES = ('pool', 'persistent', 'per-request')
+ROLES = ('web', 'celery', 'command')
+
+# (min_size, max_size) of the pool per process role
+POOL_SIZES = {
+    'web': (2, 10),
+    'celery': (1, 4),
+    'command': (1, 2),
+}
+
+# CONN_MAX_AGE per process role in persistent mode
+CONN_MAX_AGE = {
+    'web': 60,
+    'celery': 60,
+    'command': 0,
+}
+
+SERVER_COMMANDS = ('runserver', 'runserver_plus')
+
+
+def process_role(config, argv=None):
+    role = config('DB_PROCESS_ROLE', default='')
+    if role:
+        if role not in ROLES:
+            raise ValueError(f"DB_PROCESS_ROLE must be one of {', '.join(ROLES)}, not '{role}'.")
+        return role
+
+    argv = sys.argv if argv is None else argv
+    if not argv:
+        return 'web'
+    program = os.path.basename(argv[0])
+    # Covers the `celery` script as well as `python -m celery`
+    if 'celery' in argv[0]:
+        return 'celery'
+    if program == 'manage.py' or program == 'django-admin':
+        return 'web' if argv[1:2] and argv[1] in SERVER_COMMANDS else 'command'
+    return 'web'
+
+
+def database_settings(config, role=None):
+    """
+    Build DATABASES['default'] for the given (or detected) process role,
+    reading the environment through the settings' decouple `config`.
+    """
+    role = role or process_role(config)
+    mode = config('DB_CONNECTION_MODE', default='persistent')
+    if mode not in MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {', '.join(MODES)}, not '{mode}'.")
+
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DB_NAME'),
+        'USER': config('DB_USER'),
+        'PASSWORD': config('DB_PASSWORD'),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Shows up in pg_stat_activity
+            'application_name': f'sms-{role}',
+        },
+    }
+
+    if mode == 'pool':
+        min_size, max_size = POOL_SIZES[role]
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'name': f'sms-{role}',
+            'min_size': config(f'DB_POOL_MIN_SIZE_{role.upper()}', default=min_size, cast=int),
+            'max_size': config(f'DB_POOL_MAX_SIZE_{role.upper()}', default=max_size, cast=int),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        }
+    elif mode == 'persistent':
+        database['CONN_MAX_AGE'] = config(f'DB_CONN_MAX_AGE_{role.upper()}', default=CONN_MAX_AGE[role], cast=int)
+    else:
+        database['CONN_MAX_AGE'] = 0
+    return database
+
+
+def replica_settings(config, primary):
+    """
+    Build DATABASES['replica'] from the primary's settings, or return None
+    when DB_REPLICA_HOST is not set.
+    """
+    host = config('DB_REPLICA_HOST', default='')
+    if not host:
+        return None
+
+    database = copy.deepcopy(primary)
+    database['HOST'] = host
+    database['PORT'] = config('DB_REPLICA_PORT', default=primary['PORT'])
+    database['NAME'] = config('DB_REPLICA_NAME', default=primary['NAME'])
+    database['USER'] = config('DB_REPLICA_USER', default=primary['USER'])
+    database['PASSWORD'] = config('DB_REPLICA_PASSWORD', default=primary['PASSWORD'])
+    pool = database['OPTIONS'].get('pool')
+    if pool:
+        pool['name'] = f"{pool['name']}-replica"
+    # The test database has no replica; tests read the primary through it
+    database['TEST'] = {'MIRROR': 'default'}
+    return database
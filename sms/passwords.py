@@ -0,0 +1,51 @@
+"""
+Password hashing policy.
+
+PASSWORD_HASHER_POLICY picks the algorithm new and upgraded hashes use:
+
+- 'pbkdf2' (default): PBKDF2-SHA256, PASSWORD_PBKDF2_ITERATIONS rounds
+  (default: Django's own count).
+- 'argon2': Argon2id, needs argon2-cffi. Tuned with PASSWORD_ARGON2_TIME_COST,
+  PASSWORD_ARGON2_MEMORY_COST (KiB) and PASSWORD_ARGON2_PARALLELISM.
+- 'bcrypt': bcrypt over SHA-256, needs bcrypt. Tuned with PASSWORD_BCRYPT_ROUNDS.
+
+The other hashers stay listed after the preferred one so existing hashes
+keep verifying; Django re-encodes a password with the preferred hasher and
+parameters on the next successful login (see core/hashers.py).
+"""
+import importlib.util
+
+POLICIES = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+
+# Module each policy's hasher needs, if any
+REQUIRES = {
+    'argon2': ('argon2', 'argon2-cffi'),
+    'bcrypt': ('bcrypt', 'bcrypt'),
+}
+
+# Older formats that can still be verified and are then upgraded
+LEGACY_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
+def available(policy):
+    module = REQUIRES.get(policy)
+    return module is None or importlib.util.find_spec(module[0]) is not None
+
+
+def password_hashers(config):
+    """Build PASSWORD_HASHERS for PASSWORD_HASHER_POLICY, preferred hasher first."""
+    policy = config('PASSWORD_HASHER_POLICY', default='pbkdf2')
+    if policy not in POLICIES:
+        raise ValueError(f"PASSWORD_HASHER_POLICY must be one of {', '.join(POLICIES)}, not '{policy}'.")
+    if not available(policy):
+        raise ValueError(f"PASSWORD_HASHER_POLICY '{policy}' needs the {REQUIRES[policy][1]} package.")
+
+    others = [POLICIES[name] for name in POLICIES if name != policy and available(name)]
+    return [POLICIES[policy]] + others + LEGACY_HASHERS
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 from decouple import Config, RepositoryEnv
+from .database import database_settings, replica_settings
+from .passwords import password_hashers
 
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'dev')
 
@@ -74,9 +76,11 @@ USER_APPS = [
 INSTALLED_APPS = USER_APPS + DJANGO_APPS + THIRD_PARTY_APPS
 
 MIDDLEWARE = [
+    'core.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -109,19 +113,38 @@ WSGI_APPLICATION = 'sms.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Connection pooling / persistent connections per process role: see sms/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST', default='localhost'),
-        'PORT': config('DB_PORT', default='5432'),
-    }
+    'default': database_settings(config),
 }
 
+# Optional read replica (DB_REPLICA_HOST). Safe-method requests read from it;
+# see core/db_router.py and core.middleware.ReplicaRoutingMiddleware.
+replica_database = replica_settings(config, DATABASES['default'])
+if replica_database:
+    DATABASES['replica'] = replica_database
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# After a write, keep the session reading from the primary this many seconds
+REPLICA_READ_YOUR_WRITES_SECONDS = config('REPLICA_READ_YOUR_WRITES_SECONDS', default=0, cast=int)
+
 AUTH_USER_MODEL = 'Users.CustomUser'
 
+# Password hashing policy and cost parameters: see sms/passwords.py and core/hashers.py
+PASSWORD_HASHERS = password_hashers(config)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int) or None
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=0, cast=int) or None
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=0, cast=int) or None
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=0, cast=int) or None
+PASSWORD_BCRYPT_ROUNDS = config('PASSWORD_BCRYPT_ROUNDS', default=0, cast=int) or None
+
+# Concurrent password hashes per process (default: CPU count), and how many
+# logins may queue for a slot, for how long, before getting a 503
+PASSWORD_HASH_CONCURRENCY = config('PASSWORD_HASH_CONCURRENCY', default=0, cast=int) or None
+PASSWORD_HASH_MAX_WAITING = config('PASSWORD_HASH_MAX_WAITING', default=16, cast=int)
+PASSWORD_HASH_WAIT_TIMEOUT = config('PASSWORD_HASH_WAIT_TIMEOUT', default=2.0, cast=float)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -171,9 +194,44 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored once per content hash and reference counted; files
+# nothing points at are deleted by `gc_media` after the grace period.
+# See core/storage.py.
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+MEDIA_GC_GRACE_SECONDS = config('MEDIA_GC_GRACE_SECONDS', default=86400, cast=int)
+
+# Media is served by core.views.media_view after a tenant check, which
+# hands the bytes to the web server: 'nginx' (X-Accel-Redirect to an
+# internal location at MEDIA_ACCEL_PREFIX aliasing MEDIA_ROOT), 'apache'
+# (X-Sendfile) or 'django' (the worker reads the file; development only).
+MEDIA_SERVE_BACKEND = config('MEDIA_SERVE_BACKEND', default='django' if DEBUG else 'nginx')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+MEDIA_OWNER_CACHE_SECONDS = config('MEDIA_OWNER_CACHE_SECONDS', default=300, cast=int)
+
 # File Upload Settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+# Files stream to FILE_UPLOAD_TEMP_DIR chunk by chunk and are size/type
+# checked as they arrive (core/uploads.py); none is buffered in memory.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.ValidatingUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_TEMP_DIR = config('FILE_UPLOAD_TEMP_DIR', default=None)
+UPLOAD_MAX_FILE_SIZE = config('UPLOAD_MAX_FILE_SIZE', default=10485760, cast=int)  # 10MB
+UPLOAD_MAX_REQUEST_SIZE = config('UPLOAD_MAX_REQUEST_SIZE', default=20971520, cast=int)  # 20MB
+# Types accepted by views without their own `upload_allowed_types`; None: any
+UPLOAD_ALLOWED_TYPES = None
+# Non-file request data (form fields, JSON bodies) is still read into memory
+DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE', default=2621440, cast=int)  # 2.5MB
+
+# Section roster reports are cached per tenant academic version, so this
+# only bounds how long an unused report stays in the cache (academic/reports.py)
+ACADEMIC_REPORT_CACHE_SECONDS = config('ACADEMIC_REPORT_CACHE_SECONDS', default=86400, cast=int)
+
+# Rows fetched per round trip by roster exports (core/exports.py)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
@@ -191,8 +249,48 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Token buckets per organization and per user (core/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserRateThrottle',
+        'core.throttling.TenantRateThrottle',
+    ],
+    # Also answers the upload refusals raised below DRF (core/exceptions.py)
+    'EXCEPTION_HANDLER': 'core.exceptions.exception_handler',
+    # Proxies in front of the app; the client IP is taken from X-Forwarded-For
+    'NUM_PROXIES': config('NUM_PROXIES', default=None, cast=lambda v: None if v in (None, '') else int(v)),
+}
+
+# API rate limits (core.throttling): token buckets refilled at `rate` and
+# holding at most `burst` requests, per organization plan and, for the
+# unauthenticated endpoints, per client IP.
+API_THROTTLE_ENABLED = config('API_THROTTLE_ENABLED', default=True, cast=bool)
+API_THROTTLE_PLAN_CACHE_SECONDS = 60
+API_THROTTLE_PLANS = {
+    'free': {
+        'tenant': {'rate': '10/s', 'burst': 60},
+        'user': {'rate': '5/s', 'burst': 30},
+    },
+    'standard': {
+        'tenant': {'rate': '50/s', 'burst': 300},
+        'user': {'rate': '10/s', 'burst': 60},
+    },
+    'premium': {
+        'tenant': {'rate': '200/s', 'burst': 1000},
+        'user': {'rate': '30/s', 'burst': 150},
+    },
+}
+API_THROTTLE_ANON = {
+    # auth/* (login, signup, OTP)
+    'auth': {'rate': '30/m', 'burst': 20},
+    # orgs/check/
+    'org_check': {'rate': '2/s', 'burst': 30},
 }
 
 # Celery Configuration (for async tasks)
@@ -203,12 +301,73 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Periodic tasks, run by `celery -A sms beat`
+CELERY_BEAT_SCHEDULE = {
+    # Corrects drift of the materialized dashboard counters (Org/stats.py)
+    'recompute-tenant-statistics': {
+        'task': 'Org.tasks.recompute_statistics',
+        'schedule': config('ORG_STATS_RECOMPUTE_SECONDS', default=3600, cast=float),
+    },
+}
+
 # AI Service Configuration
 AI_SERVICE_ENABLED = config('AI_SERVICE_ENABLED', default=False, cast=bool)
 AI_SERVICE_PROVIDER = config('AI_SERVICE_PROVIDER', default='mock')  # 'mock', 'openai', 'huggingface'
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 HUGGINGFACE_API_KEY = config('HUGGINGFACE_API_KEY', default='')
 
+# Per-request profiling (core.middleware.RequestProfilingMiddleware)
+REQUEST_PROFILING_ENABLED = config('REQUEST_PROFILING_ENABLED', default=True, cast=bool)
+REQUEST_PROFILING_SERVER_TIMING = config('REQUEST_PROFILING_SERVER_TIMING', default=True, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=int)
+
+# One-time passwords (Users.services.OTPService). Limits of 0 are disabled,
+# OTP_MAX_ATTEMPTS=0 included (no lockout). Per-IP limits need a known client IP.
+OTP_LENGTH = 6
+OTP_TTL = config('OTP_TTL', default=300, cast=int)
+OTP_RESEND_COOLDOWN = config('OTP_RESEND_COOLDOWN', default=60, cast=int)
+OTP_MAX_ATTEMPTS = config('OTP_MAX_ATTEMPTS', default=5, cast=int)
+OTP_LOCKOUT_SECONDS = config('OTP_LOCKOUT_SECONDS', default=900, cast=int)
+# Sliding window (seconds) for the per-subject and per-IP limits below
+OTP_RATE_WINDOW = config('OTP_RATE_WINDOW', default=3600, cast=int)
+OTP_ISSUE_LIMIT_PER_SUBJECT = config('OTP_ISSUE_LIMIT_PER_SUBJECT', default=5, cast=int)
+OTP_ISSUE_LIMIT_PER_IP = config('OTP_ISSUE_LIMIT_PER_IP', default=30, cast=int)
+OTP_VERIFY_LIMIT_PER_IP = config('OTP_VERIFY_LIMIT_PER_IP', default=60, cast=int)
+# Password logins also need an emailed code (POST /auth/login/verify-otp/)
+LOGIN_OTP_REQUIRED = config('LOGIN_OTP_REQUIRED', default=False, cast=bool)
+
+# Upload image pipeline (core.images): re-encoding and thumbnails run in Celery
+IMAGE_PROCESSING_ENABLED = config('IMAGE_PROCESSING_ENABLED', default=True, cast=bool)
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=40_000_000, cast=int)
+IMAGE_MAX_DIMENSION = config('IMAGE_MAX_DIMENSION', default=2048, cast=int)
+IMAGE_JPEG_QUALITY = 85
+IMAGE_VARIANT_QUALITY = 80
+
+# Prometheus metrics (core.metrics, served at /metrics). Scrapers send
+# METRICS_TOKEN as a bearer token; without a token the endpoint answers 403
+# unless METRICS_PUBLIC opts in to unauthenticated access (on with DEBUG).
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_PUBLIC = config('METRICS_PUBLIC', default=DEBUG, cast=bool)
+METRICS_CELERY_QUEUES = config('METRICS_CELERY_QUEUES', default='celery', cast=lambda v: [q for q in v.split(',') if q])
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Simple History Configuration
 SIMPLE_HISTORY_HISTORY_ID_USE_UUID = True
 
@@ -4,9 +4,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Stand-in replica for the router tests: a mirror of the test database
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+# Only core.tests.test_db_router turns on replica routing
+DATABASE_ROUTERS = []
+
 # Simplify password hashing for faster tests
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
@@ -14,3 +23,22 @@ PASSWORD_HASHERS = [
 
 # We might need to ensure some other settings are compatible with sqlite if postgres features are used
 # but for basic auth/profile flows, this should be fine.
+
+# Tests should not depend on a running Redis server
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Keep per-request profiling logs out of test output
+LOGGING['loggers']['core.profiling']['level'] = 'ERROR'
+
+# Do not contact a Celery broker when /metrics is scraped
+METRICS_CELERY_QUEUES = []
+
+# Rate limits are exercised by core.tests.test_throttling only
+API_THROTTLE_ENABLED = False
+
+# Image processing is exercised by core.tests.test_images only
+IMAGE_PROCESSING_ENABLED = False
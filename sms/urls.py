@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.views import ExportResultView, media_view, metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,7 +13,11 @@ urlpatterns = [
     path('api/v1/', include('Users.urls')),
     path('api/v1/academic/', include('academic.urls')),
     path('api/v1/people/', include('people.urls')),
-]
+    path('api/v1/exports/<str:task_id>/', ExportResultView.as_view(), name='export-result'),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Uploaded files, access checked and handed off to the web server (core/media.py)
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media_view, name='media'),
+]